@@ -1,29 +1,193 @@
 # anomaly_detector.py
 
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .reference_ranges import CompiledRanges, age_band, compile_ranges, gender_code, normalize_analyte
 from ..schemas.ai_schema import (
     AnomalyDetectionRequest,
     AnomalyDetectionResponse
 )
 
 
+SEVERITIES = ("normal", "mild", "moderate", "critical")
+
+# Out of range by no more than this fraction of the range width counts as mild
+MILD_FRACTION = 0.2
+
+_compiled: Optional[CompiledRanges] = None
+
+
+def get_reference_ranges() -> CompiledRanges:
+    global _compiled
+
+    if _compiled is None:
+        _compiled = compile_ranges()
+
+    return _compiled
+
+
+def _bounds(values: np.ndarray) -> List[Optional[float]]:
+    """float32 bounds as rounded floats, None where the bound does not apply."""
+    return [None if v != v else v for v in values.astype(np.float64).round(4).tolist()]
+
+
 class AnomalyDetectionService:
 
+    def __init__(self, ranges: Optional[CompiledRanges] = None):
+        self.ranges = ranges or get_reference_ranges()
+
+    # =========================
+    # Batch evaluation
+    # =========================
+
+    def _grade(self, values, low, high, critical_low, critical_high):
+        """Severity code (index into SEVERITIES) and direction (-1 low, +1 high) per cell."""
+        with np.errstate(invalid="ignore"):
+            below = values < low
+            above = values > high
+
+            # One-sided ranges measure the excess against the bound itself
+            one_sided = np.isnan(low) | np.isnan(high)
+            width = np.where(one_sided, np.abs(np.where(np.isnan(low), high, low)), high - low)
+            excess = np.where(below, low - values, np.where(above, values - high, 0.0))
+            ratio = excess / np.where(width > 0, width, 1.0)
+
+            severity = np.zeros(values.shape, dtype=np.int8)
+            out_of_range = below | above
+            severity[out_of_range] = 1
+            severity[out_of_range & (ratio > MILD_FRACTION)] = 2
+            severity[(values < critical_low) | (values > critical_high)] = 3
+
+        direction = np.where(below, -1, np.where(above, 1, 0)).astype(np.int8)
+
+        return severity, direction
+
+    def grade_matrix(self, values: np.ndarray, ages: np.ndarray, genders: np.ndarray):
+        """
+        Grade a (panels x analytes) value matrix, NaN where not measured.
+        Returns severity, direction and the low/high bounds used, all the
+        same shape as `values`.
+        """
+        ranges = self.ranges
+
+        # Gather every panel's bounds at once
+        lookup = (np.arange(values.shape[1])[None, :], genders[:, None], age_band(ages)[:, None])
+        low, high = ranges.low[lookup], ranges.high[lookup]
+
+        severity, direction = self._grade(
+            values, low, high, ranges.critical_low[lookup], ranges.critical_high[lookup]
+        )
+
+        return severity, direction, low, high
+
+    def evaluate_batch(self, panels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate many lab panels in one pass.
+
+        Each panel is {"patient_id", "age", "gender", "lab_values"}. Values
+        are laid out as a (panels x analytes) matrix and compared against
+        the age/gender-specific bounds with array operations.
+        """
+        ranges = self.ranges
+        count, analytes = len(panels), len(ranges.analytes)
+
+        ages = np.full(count, np.nan, dtype=np.float32)
+        genders = np.zeros(count, dtype=np.intp)
+        names: List[Dict[int, str]] = []
+        unrecognized: List[List[str]] = []
+
+        # Each distinct parameter name is normalised once per batch
+        resolved: Dict[str, Optional[int]] = {}
+        rows, columns, readings = [], [], []
+
+        for row, panel in enumerate(panels):
+            if panel.get("age") is not None:
+                ages[row] = panel["age"]
+            genders[row] = gender_code(panel.get("gender"))
+
+            panel_names, panel_unknown = {}, []
+            for name, value in (panel.get("lab_values") or {}).items():
+                if name not in resolved:
+                    resolved[name] = ranges.index.get(normalize_analyte(name))
+                column = resolved[name]
+
+                if column is None or type(value) not in (int, float):
+                    panel_unknown.append(name)
+                    continue
+
+                rows.append(row)
+                columns.append(column)
+                readings.append(value)
+                panel_names[column] = name
+
+            names.append(panel_names)
+            unrecognized.append(panel_unknown)
+
+        values = np.full((count, analytes), np.nan, dtype=np.float32)
+        values[rows, columns] = readings
+
+        severity, direction, low, high = self.grade_matrix(values, ages, genders)
+
+        panel_severity = severity.max(axis=1) if analytes else np.zeros(count, dtype=np.int8)
+        findings: List[List[Dict[str, Any]]] = [[] for _ in range(count)]
+
+        # Only flagged cells become Python objects
+        flagged_rows, flagged_columns = np.nonzero(severity)
+        cells = (flagged_rows, flagged_columns)
+
+        for row, column, value, reference_low, reference_high, sign, grade in zip(
+            flagged_rows.tolist(),
+            flagged_columns.tolist(),
+            values[cells].astype(np.float64).round(4).tolist(),
+            _bounds(low[cells]),
+            _bounds(high[cells]),
+            direction[cells].tolist(),
+            severity[cells].tolist(),
+        ):
+            findings[row].append({
+                "parameter": names[row][column],
+                "analyte": ranges.analytes[column],
+                "value": value,
+                "unit": ranges.units[column],
+                "reference_low": reference_low,
+                "reference_high": reference_high,
+                "direction": "low" if sign < 0 else "high",
+                "severity": SEVERITIES[grade],
+            })
+
+        return [
+            {
+                "patient_id": panel.get("patient_id"),
+                "anomaly_detected": grade > 0,
+                "severity_level": SEVERITIES[grade],
+                "findings": findings[row],
+                "unrecognized_parameters": unrecognized[row],
+            }
+            for row, (panel, grade) in enumerate(zip(panels, panel_severity.tolist()))
+        ]
+
+    # =========================
+    # Single panel
+    # =========================
+
     def detect_anomaly(self, data: dict) -> dict:
         """Detect anomalies in patient data"""
         try:
-            lab_values = data.get("lab_values", {})
-            flagged = []
-
-            for key, value in lab_values.items():
-                if isinstance(value, (int, float)) and value > 100:  # example threshold
-                    flagged.append(key)
+            result = self.evaluate_batch([data])[0]
+            flagged = [finding["parameter"] for finding in result["findings"]]
 
             return {
-                "anomaly_detected": len(flagged) > 0,
+                "anomaly_detected": result["anomaly_detected"],
                 "flagged_parameters": flagged,
-                "severity_level": "High" if flagged else "Normal",
-                "confidence_score": 0.85,
-                "details": "Some lab values exceed normal threshold." if flagged else "All values within normal range.",
+                "severity_level": result["severity_level"],
+                "findings": result["findings"],
+                "confidence_score": 1.0 if data.get("lab_values") else 0.0,
+                "details": (
+                    f"{len(flagged)} value(s) outside the reference range." if flagged
+                    else "All values within reference range."
+                ),
             }
         except Exception as e:
             return {
@@ -36,15 +200,15 @@ class AnomalyDetectionService:
 
     def detect(self, request: AnomalyDetectionRequest) -> AnomalyDetectionResponse:
         """Legacy method for schema compatibility"""
-        flagged = []
-
-        for key, value in request.lab_values.items():
-            if value > 100:   # example threshold
-                flagged.append(key)
+        result = self.evaluate_batch([{"lab_values": request.lab_values}])[0]
+        flagged = [finding["parameter"] for finding in result["findings"]]
 
         return AnomalyDetectionResponse(
-            anomalies_detected=len(flagged) > 0,
+            anomalies_detected=result["anomaly_detected"],
             flagged_parameters=flagged,
-            severity_level="High" if flagged else "Normal",
-            explanation="Some lab values exceed normal threshold."
-        )
\ No newline at end of file
+            severity_level=result["severity_level"],
+            explanation=(
+                "Some lab values are outside the adult reference range." if flagged
+                else "All values within reference range."
+            )
+        )
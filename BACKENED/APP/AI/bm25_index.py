@@ -0,0 +1,172 @@
+# bm25_index.py
+
+"""
+BM25 inverted index stored next to the vector index.
+
+Files (all plain arrays, memory-mapped on load):
+
+    bm25.json               chunk count, average length, k1, b
+    bm25_terms.txt          sorted vocabulary, one term per line
+    bm25_term_offsets.npy   int64, start of each term's postings (+ end)
+    bm25_postings.npy       uint32 chunk ids, grouped by term
+    bm25_tf.npy             uint16 term frequency for each posting
+    bm25_doc_lengths.npy    uint32 token count of each chunk
+"""
+
+import json
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .embeddings import tokenize
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class BM25IndexBuilder:
+
+    def __init__(self):
+        # Flat (term, chunk, tf) triples; grouped by term once, on save
+        self._vocabulary: Dict[str, int] = {}
+        self._term_ids = array("I")
+        self._chunk_ids = array("I")
+        self._tfs = array("H")
+        self._doc_lengths = array("I")
+
+    def add(self, texts: List[str]):
+        """Index texts; chunk ids continue from the previous call."""
+        for text in texts:
+            chunk_id = len(self._doc_lengths)
+            tokens = tokenize(text)
+            self._doc_lengths.append(len(tokens))
+
+            for term, tf in Counter(tokens).items():
+                self._term_ids.append(self._vocabulary.setdefault(term, len(self._vocabulary)))
+                self._chunk_ids.append(chunk_id)
+                self._tfs.append(min(tf, 65535))
+
+    def save(self, directory: Path):
+        directory = Path(directory)
+        terms = sorted(self._vocabulary)
+
+        # Renumber terms alphabetically, then group postings by term
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[[self._vocabulary[term] for term in terms]] = np.arange(len(terms))
+        term_ids = rank[np.frombuffer(self._term_ids, dtype=np.uint32)] if terms else np.empty(0, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+
+        postings = np.frombuffer(self._chunk_ids, dtype=np.uint32)[order]
+        tfs = np.frombuffer(self._tfs, dtype=np.uint16)[order]
+        doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32)
+
+        (directory / "bm25_terms.txt").write_text("\n".join(terms), encoding="utf-8")
+        np.save(directory / "bm25_term_offsets.npy", offsets)
+        np.save(directory / "bm25_postings.npy", postings)
+        np.save(directory / "bm25_tf.npy", tfs)
+        np.save(directory / "bm25_doc_lengths.npy", doc_lengths)
+
+        with open(directory / "bm25.json", "w") as meta:
+            json.dump({
+                "chunks": len(doc_lengths),
+                "terms": len(terms),
+                "avg_length": float(doc_lengths.mean()) if len(doc_lengths) else 0.0,
+                "k1": BM25_K1,
+                "b": BM25_B,
+            }, meta, indent=2)
+
+
+class BM25Index:
+
+    def __init__(self, directory: str):
+        directory = Path(directory)
+
+        with open(directory / "bm25.json") as meta:
+            self.meta = json.load(meta)
+
+        text = (directory / "bm25_terms.txt").read_text(encoding="utf-8")
+        self.terms = text.split("\n") if text else []
+        self.term_offsets = np.load(directory / "bm25_term_offsets.npy", mmap_mode="r")
+        self.postings = np.load(directory / "bm25_postings.npy", mmap_mode="r")
+        self.tfs = np.load(directory / "bm25_tf.npy", mmap_mode="r")
+        self.doc_lengths = np.load(directory / "bm25_doc_lengths.npy", mmap_mode="r")
+
+        self.chunks = self.meta["chunks"]
+        self.avg_length = self.meta["avg_length"] or 1.0
+        self.k1 = self.meta["k1"]
+        self.b = self.meta["b"]
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return (Path(directory) / "bm25.json").is_file()
+
+    def _term_id(self, term: str) -> int:
+        position = bisect_left(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            return position
+        return -1
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (chunk_id, bm25 score) pairs for the query's terms."""
+        chunk_ids, contributions = [], []
+
+        for term in set(tokenize(query)):
+            term_id = self._term_id(term)
+            if term_id < 0:
+                continue
+
+            start, end = int(self.term_offsets[term_id]), int(self.term_offsets[term_id + 1])
+            ids = np.asarray(self.postings[start:end], dtype=np.int64)
+            tf = np.asarray(self.tfs[start:end], dtype=np.float32)
+            lengths = np.asarray(self.doc_lengths[ids], dtype=np.float32)
+
+            df = end - start
+            idf = math.log(1 + (self.chunks - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths / self.avg_length)
+
+            chunk_ids.append(ids)
+            contributions.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        if not chunk_ids:
+            return []
+
+        ids, inverse = np.unique(np.concatenate(chunk_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+
+        top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+# =========================
+# Rank Fusion
+# =========================
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[int, float]]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge ranked (chunk_id, score) lists by reciprocal rank.
+    Scores are scaled so a chunk ranked first by every list scores 1.0.
+    """
+    fused: Dict[int, float] = defaultdict(float)
+
+    for ranking in rankings:
+        for rank, (chunk_id, _) in enumerate(ranking, start=1):
+            fused[chunk_id] += 1.0 / (k + rank)
+
+    best_possible = len(rankings) / (k + 1) if rankings else 1.0
+
+    return sorted(
+        ((chunk_id, score / best_possible) for chunk_id, score in fused.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
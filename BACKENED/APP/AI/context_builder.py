@@ -0,0 +1,233 @@
+# context_builder.py
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import get_logger
+from .llm_provider import LLMClient, LLMError
+from ..schemas.ai_schema import AIMemoryEntry, AITokenUsage
+
+
+logger = get_logger(__name__)
+
+
+# =========================
+# Token Counting
+# =========================
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+
+    # tiktoken may be missing, or unable to fetch its BPE file offline
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+                except Exception as e:
+                    logger.warning(f"tiktoken unavailable ({e}); estimating tokens from length")
+                    _encoding_failed = True
+
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return max(1, len(text) // 4)
+
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# =========================
+# Context Builder
+# =========================
+
+SUMMARY_SYSTEM_PROMPT = """
+You maintain a running summary of a conversation between a user and a hospital AI assistant.
+Keep symptoms, medications, test results and any advice already given.
+Be concise and factual. Do not add anything that was not said.
+"""
+
+
+@dataclass
+class ConversationContext:
+    prompt: str
+    usage: AITokenUsage
+
+
+@dataclass
+class _RollingSummary:
+    text: str
+    # Timestamp of the newest turn folded in, so a sliding memory window
+    # does not cause turns to be summarized twice
+    last_folded: str
+
+
+def _render_turn(turn: AIMemoryEntry) -> str:
+    return f"User: {turn.message}\nAI: {turn.response}"
+
+
+class ConversationContextBuilder:
+    """
+    Builds the chat prompt under a token budget.
+
+    The last `recent_turns` exchanges are quoted verbatim; anything older is
+    folded into a per-session rolling summary that is only extended with the
+    turns it has not seen yet, so each turn is summarized once.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        token_budget: int = settings.AI_CONTEXT_TOKEN_BUDGET,
+        recent_turns: int = settings.AI_CONTEXT_RECENT_TURNS,
+        summary_max_tokens: int = settings.AI_CONTEXT_SUMMARY_TOKENS,
+        max_sessions: int = settings.AI_MEMORY_MAX_SESSIONS,
+    ):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.max_sessions = max_sessions
+        self._summaries: "OrderedDict[str, _RollingSummary]" = OrderedDict()
+        self.stats = {"requests": 0, "prompt_tokens": 0, "summaries": 0, "summary_failures": 0}
+
+    def _render(
+        self,
+        summary: str,
+        turns: List[AIMemoryEntry],
+        message: str,
+        context: Optional[Dict[str, Any]],
+    ) -> str:
+        history = "\n".join(_render_turn(turn) for turn in turns)
+
+        if summary:
+            history = f"Summary of earlier conversation:\n{summary}\n\n{history}".strip()
+
+        return f"""
+        Previous Conversation:
+        {history}
+
+        Current Message:
+        {message}
+
+        Additional Context:
+        {context}
+        """
+
+    def _split(
+        self,
+        history: List[AIMemoryEntry],
+        fixed_tokens: int,
+    ) -> Tuple[List[AIMemoryEntry], List[AIMemoryEntry]]:
+        """Return (older turns to summarize, recent turns to quote verbatim)."""
+        cut = max(len(history) - self.recent_turns, 0)
+        older, recent = list(history[:cut]), list(history[cut:])
+
+        # Leave room for the summary, then drop verbatim turns oldest-first
+        available = self.token_budget - fixed_tokens - self.summary_max_tokens
+        recent_tokens = [count_tokens(_render_turn(turn)) for turn in recent]
+
+        while recent and sum(recent_tokens) > available:
+            older.append(recent.pop(0))
+            recent_tokens.pop(0)
+
+        return older, recent
+
+    async def _summarize(self, session_id: Optional[str], older: List[AIMemoryEntry]) -> str:
+        if not older:
+            return ""
+
+        cached = self._summaries.get(session_id) if session_id else None
+        last_folded = cached.last_folded if cached else ""
+        unseen = [turn for turn in older if turn.timestamp > last_folded]
+
+        if not unseen:
+            self._summaries.move_to_end(session_id)
+            return cached.text
+
+        prompt = f"""
+        Current summary:
+        {cached.text if cached else "(none)"}
+
+        New conversation turns:
+        {chr(10).join(_render_turn(turn) for turn in unseen)}
+
+        Rewrite the summary so it also covers the new turns.
+        """
+
+        try:
+            text = await self.llm.generate_response(
+                prompt=prompt,
+                system_message=SUMMARY_SYSTEM_PROMPT,
+                temperature=0.0,
+                max_tokens=self.summary_max_tokens,
+            )
+        except LLMError as e:
+            # Keep the old summary; the unseen turns are retried next request
+            self.stats["summary_failures"] += 1
+            logger.warning(f"Could not update conversation summary: {e}")
+            return cached.text if cached else ""
+
+        self.stats["summaries"] += 1
+
+        if session_id:
+            self._summaries[session_id] = _RollingSummary(text=text, last_folded=unseen[-1].timestamp)
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+
+        return text
+
+    async def build(
+        self,
+        session_id: Optional[str],
+        history: List[AIMemoryEntry],
+        message: str,
+        context: Optional[Dict[str, Any]],
+        system_prompt: str,
+    ) -> ConversationContext:
+
+        fixed_tokens = count_tokens(system_prompt) + count_tokens(self._render("", [], message, context))
+        older, recent = self._split(history, fixed_tokens)
+        summary = await self._summarize(session_id, older)
+
+        prompt = self._render(summary, recent, message, context)
+        prompt_tokens = count_tokens(system_prompt) + count_tokens(prompt)
+        summary_tokens = count_tokens(summary)
+
+        self.stats["requests"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+
+        if prompt_tokens > self.token_budget:
+            logger.warning(f"Chat prompt is {prompt_tokens} tokens, over the {self.token_budget} budget")
+
+        return ConversationContext(
+            prompt=prompt,
+            usage=AITokenUsage(
+                prompt_tokens=prompt_tokens,
+                summary_tokens=summary_tokens,
+                history_tokens=prompt_tokens - fixed_tokens,
+                turns_verbatim=len(recent),
+                turns_summarized=len(older),
+                token_budget=self.token_budget,
+            ),
+        )
+
+    def forget(self, session_id: str):
+        self._summaries.pop(session_id, None)
@@ -0,0 +1,105 @@
+# document_loader.py
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+
+TEXT_SUFFIXES = {".txt", ".md"}
+PDF_SUFFIXES = {".pdf"}
+
+
+@dataclass
+class DocumentChunk:
+    document_name: str
+    page_number: Optional[int]
+    text: str
+
+
+# =========================
+# Readers
+# =========================
+
+def _read_text(path: Path) -> List[Tuple[Optional[int], str]]:
+    return [(None, path.read_text(encoding="utf-8", errors="ignore"))]
+
+
+def _read_pdf(path: Path) -> List[Tuple[Optional[int], str]]:
+    # Imported lazily so plain-text corpora work without the PDF parser
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("pypdf is required to ingest PDF files: pip install pypdf")
+
+    reader = PdfReader(str(path))
+    return [(number, page.extract_text() or "") for number, page in enumerate(reader.pages, start=1)]
+
+
+def read_document(path: Path) -> List[Tuple[Optional[int], str]]:
+    """Return (page_number, text) pairs; text files are a single unnumbered page."""
+    suffix = path.suffix.lower()
+
+    if suffix in TEXT_SUFFIXES:
+        return _read_text(path)
+    if suffix in PDF_SUFFIXES:
+        return _read_pdf(path)
+
+    raise ValueError(f"Unsupported document type: {path.name}")
+
+
+def find_documents(paths: Iterable[str]) -> List[Path]:
+    """Expand files and directories into the supported documents they contain."""
+    documents = []
+
+    for raw in paths:
+        path = Path(raw)
+
+        if path.is_dir():
+            documents.extend(
+                sorted(p for p in path.rglob("*") if p.suffix.lower() in TEXT_SUFFIXES | PDF_SUFFIXES)
+            )
+        elif path.is_file():
+            documents.append(path)
+        else:
+            raise FileNotFoundError(raw)
+
+    return documents
+
+
+# =========================
+# Chunking
+# =========================
+
+def chunk_text(
+    text: str,
+    chunk_words: int = settings.RAG_CHUNK_WORDS,
+    overlap_words: int = settings.RAG_CHUNK_OVERLAP,
+) -> List[str]:
+    """Split text into windows of `chunk_words` words that overlap by `overlap_words`."""
+    words = text.split()
+    if not words:
+        return []
+
+    step = max(chunk_words - overlap_words, 1)
+    chunks = []
+
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+
+    return chunks
+
+
+def load_chunks(
+    paths: Iterable[str],
+    chunk_words: int = settings.RAG_CHUNK_WORDS,
+    overlap_words: int = settings.RAG_CHUNK_OVERLAP,
+) -> Iterator[DocumentChunk]:
+    """Stream chunks from every document, page by page, so pages stay attributable."""
+    for path in find_documents(paths):
+        for page_number, text in read_document(path):
+            for chunk in chunk_text(text, chunk_words, overlap_words):
+                yield DocumentChunk(document_name=path.name, page_number=page_number, text=chunk)
@@ -0,0 +1,100 @@
+# embeddings.py
+
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps codes like "e11.9" and "ace-inhibitor" whole."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+# =========================
+# Embedders
+# =========================
+
+class Embedder(ABC):
+    """
+    Turns text into fixed-size, L2-normalised float32 vectors, so a dot
+    product is a cosine similarity.
+    """
+
+    name = "base"
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """One row per text, shape (len(texts), dim)."""
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+@lru_cache(maxsize=200_000)
+def _feature_slot(feature: str, dim: int) -> Tuple[int, float]:
+    # blake2b instead of hash(): Python salts str hashes per process
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashingEmbedder(Embedder):
+    """
+    Offline default: signed feature hashing of word unigrams and bigrams.
+    Deterministic across processes and machines, needs no model download,
+    and matches on shared vocabulary rather than meaning.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = settings.RAG_EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+            for feature in features:
+                slot, sign = _feature_slot(feature, self.dim)
+                vectors[row, slot] += sign
+
+        # Sublinear term frequency, then unit length
+        np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        return vectors / norms
+
+
+EMBEDDERS: Dict[str, Callable[..., Embedder]] = {
+    "hashing": HashingEmbedder,
+}
+
+
+def register_embedder(name: str, factory: Callable[..., Embedder]):
+    """Make an embedder selectable through the RAG_EMBEDDER setting."""
+    EMBEDDERS[name] = factory
+
+
+def get_embedder(name: Optional[str] = None, **options) -> Embedder:
+    """Build an embedder by name; options (e.g. dim) go to its factory."""
+    name = name or settings.RAG_EMBEDDER
+    factory = EMBEDDERS.get(name)
+
+    if factory is None:
+        raise ValueError(f"Unknown RAG_EMBEDDER: {name}")
+
+    return factory(**options)
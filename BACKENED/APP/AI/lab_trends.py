@@ -0,0 +1,307 @@
+# lab_trends.py
+
+"""
+Per-patient lab baselines for drift detection.
+
+Every analyte a patient has had measured keeps a few numbers: an
+exponentially weighted mean and variance, a reading count and the last
+value. A new result is scored against that patient's own baseline
+(z-score) and then folded in, so each update costs O(1) however long
+the history is.
+
+Reports are read from `reports` (documents with `patient_id`, `date`
+YYYY-MM-DD and a `lab_values` mapping). Each patient's state is
+checkpointed to `lab_baselines` along with the highest report `_id`
+applied, so later calls only read reports inserted since. A new report
+dated before the latest one applied (a backdated entry) makes the
+patient's state rebuild from their full history.
+
+Edits to an already applied report's `lab_values` or `date` are not
+detected; call `reset_patient` (DELETE /ai/anomaly/{patient_id}/baseline)
+after correcting a report so the next call replays from scratch.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from app import database
+from app.config import settings
+from app.database import run_in_db_executor
+from app.utils.logger import get_logger
+from .reference_ranges import normalize_analyte
+
+
+logger = get_logger(__name__)
+
+# Floor on the baseline spread, as a fraction of the mean, so a patient
+# whose first readings happen to match does not flag trivial changes
+MIN_RELATIVE_STD = 0.02
+
+
+@dataclass
+class AnalyteBaseline:
+    count: int = 0
+    mean: float = 0.0
+    variance: float = 0.0
+    last_value: Optional[float] = None
+    last_date: Optional[str] = None
+
+    def std(self) -> float:
+        return max(math.sqrt(self.variance), MIN_RELATIVE_STD * abs(self.mean), 1e-9)
+
+    def z_score(self, value: float) -> float:
+        return (value - self.mean) / self.std()
+
+    def update(self, value: float, alpha: float, observed_on: Optional[str]):
+        """Fold one reading into the exponentially weighted mean and variance."""
+        if self.count == 0:
+            self.mean, self.variance = value, 0.0
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+
+        self.count += 1
+        self.last_value = value
+        self.last_date = observed_on
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "n": self.count,
+            "mean": self.mean,
+            "var": self.variance,
+            "last": self.last_value,
+            "date": self.last_date,
+        }
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "AnalyteBaseline":
+        return cls(document["n"], document["mean"], document["var"], document.get("last"), document.get("date"))
+
+
+@dataclass
+class PatientLabState:
+    patient_id: str
+    baselines: Dict[str, AnalyteBaseline] = field(default_factory=dict)
+    # Latest report date applied, and highest report _id (insertion order)
+    last_report_date: Optional[str] = None
+    last_report_id: Any = None
+    reports_applied: int = 0
+    latest_findings: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "_id": self.patient_id,
+            "baselines": {name: b.to_document() for name, b in self.baselines.items()},
+            "last_report_date": self.last_report_date,
+            "last_report_id": self.last_report_id,
+            "reports_applied": self.reports_applied,
+            "latest_findings": self.latest_findings,
+        }
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "PatientLabState":
+        return cls(
+            patient_id=document["_id"],
+            baselines={
+                name: AnalyteBaseline.from_document(b)
+                for name, b in document.get("baselines", {}).items()
+            },
+            last_report_date=document.get("last_report_date"),
+            last_report_id=document.get("last_report_id"),
+            reports_applied=document.get("reports_applied", 0),
+            latest_findings=document.get("latest_findings", []),
+        )
+
+
+def _replay_order(report: Dict[str, Any]):
+    # Undated reports sort first, as they do in MongoDB
+    return report.get("date") or "", report["_id"]
+
+
+class LabTrendTracker:
+    """
+    Flags lab results that drift from the patient's own history.
+
+    A reading is flagged when it lies `z_threshold` baseline deviations
+    from the patient's weighted mean, once that analyte has at least
+    `warmup` earlier readings.
+    """
+
+    def __init__(
+        self,
+        alpha: float = settings.LAB_TREND_ALPHA,
+        z_threshold: float = settings.LAB_TREND_Z_THRESHOLD,
+        warmup: int = settings.LAB_TREND_WARMUP,
+        max_patients: int = settings.LAB_TREND_MAX_PATIENTS,
+    ):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.max_patients = max_patients
+        self._states: "OrderedDict[str, PatientLabState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # =========================
+    # Scoring
+    # =========================
+
+    def observe(
+        self,
+        state: PatientLabState,
+        lab_values: Dict[str, Any],
+        observed_on: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Score one report's values against the baselines, then update them."""
+        findings = []
+
+        for name, value in (lab_values or {}).items():
+            if type(value) not in (int, float):
+                continue
+
+            analyte = normalize_analyte(name)
+            baseline = state.baselines.get(analyte)
+            if baseline is None:
+                baseline = state.baselines[analyte] = AnalyteBaseline()
+
+            if baseline.count >= self.warmup:
+                z_score = baseline.z_score(value)
+
+                if abs(z_score) >= self.z_threshold:
+                    findings.append({
+                        "parameter": name,
+                        "analyte": analyte,
+                        "value": float(value),
+                        "baseline_mean": round(baseline.mean, 4),
+                        "baseline_std": round(baseline.std(), 4),
+                        "z_score": round(z_score, 2),
+                        "direction": "high" if z_score > 0 else "low",
+                        "date": observed_on,
+                    })
+
+            baseline.update(float(value), self.alpha, observed_on)
+
+        return findings
+
+    def apply_reports(self, state: PatientLabState, reports: Iterable[Dict[str, Any]]) -> int:
+        """Replay reports (in date order) onto the state; returns how many were applied."""
+        applied = 0
+
+        for report in reports:
+            state.latest_findings = self.observe(state, report.get("lab_values"), report.get("date"))
+            state.last_report_date = report.get("date")
+            if state.last_report_id is None or report["_id"] > state.last_report_id:
+                state.last_report_id = report["_id"]
+            state.reports_applied += 1
+            applied += 1
+
+        return applied
+
+    # =========================
+    # State and checkpoints
+    # =========================
+
+    def _cache(self, state: PatientLabState):
+        with self._lock:
+            self._states[state.patient_id] = state
+            self._states.move_to_end(state.patient_id)
+
+            while len(self._states) > self.max_patients:
+                self._states.popitem(last=False)
+
+    def load_state(self, patient_id: str) -> PatientLabState:
+        # The checkpoint wins: another worker may have moved it forward
+        if database.db is not None:
+            try:
+                document = database.lab_baselines.find_one({"_id": patient_id})
+                if document:
+                    return PatientLabState.from_document(document)
+            except Exception as e:
+                logger.warning(f"Could not load lab baselines for {patient_id}: {e}")
+
+        with self._lock:
+            state = self._states.get(patient_id)
+
+        return state or PatientLabState(patient_id=patient_id)
+
+    def checkpoint(self, state: PatientLabState):
+        self._cache(state)
+
+        if database.db is None:
+            return
+
+        try:
+            database.lab_baselines.replace_one({"_id": state.patient_id}, state.to_document(), upsert=True)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint lab baselines for {state.patient_id}: {e}")
+
+    def _reports_since(self, state: PatientLabState) -> List[Dict[str, Any]]:
+        """Reports inserted after the last one applied, in (date, _id) order."""
+        query: Dict[str, Any] = {"patient_id": state.patient_id, "lab_values": {"$type": "object"}}
+
+        if state.last_report_id is not None:
+            query["_id"] = {"$gt": state.last_report_id}
+
+        reports = list(database.reports.find(query, {"date": 1, "lab_values": 1}).sort("_id", 1))
+        reports.sort(key=_replay_order)
+        return reports
+
+    # =========================
+    # Public API
+    # =========================
+
+    def analyze_patient(self, patient_id: str) -> Dict[str, Any]:
+        """
+        Bring the patient's baselines up to date with any new reports and
+        return the drift flagged on their most recent one.
+        """
+        if database.db is None:
+            raise RuntimeError("Database not connected")
+
+        state = self.load_state(patient_id)
+        reports = self._reports_since(state)
+
+        # A backdated report belongs before readings already folded in
+        if reports and state.last_report_id is not None and _replay_order(reports[0])[0] < (state.last_report_date or ""):
+            logger.info(f"Backdated report for {patient_id}, rebuilding lab baselines")
+            state = PatientLabState(patient_id=patient_id)
+            reports = self._reports_since(state)
+
+        processed = self.apply_reports(state, reports)
+
+        if processed:
+            self.checkpoint(state)
+
+        findings = state.latest_findings
+
+        return {
+            "patient_id": patient_id,
+            "anomaly_detected": bool(findings),
+            "flagged_parameters": [finding["parameter"] for finding in findings],
+            "findings": findings,
+            "reports_processed": processed,
+            "reports_total": state.reports_applied,
+            "last_report_date": state.last_report_date,
+            "baselines": {
+                name: {"mean": round(b.mean, 4), "std": round(b.std(), 4), "readings": b.count}
+                for name, b in state.baselines.items()
+            },
+        }
+
+    def reset_patient(self, patient_id: str):
+        """Drop the patient's baselines so the next analysis replays every report."""
+        with self._lock:
+            self._states.pop(patient_id, None)
+
+        if database.db is not None:
+            database.lab_baselines.delete_one({"_id": patient_id})
+
+    async def analyze_patient_async(self, patient_id: str) -> Dict[str, Any]:
+        return await run_in_db_executor(self.analyze_patient)(patient_id)
+
+    async def reset_patient_async(self, patient_id: str):
+        await run_in_db_executor(self.reset_patient)(patient_id)
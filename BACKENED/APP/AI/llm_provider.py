@@ -1,42 +1,365 @@
-import google.generativeai as genai
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Optional
+
 from app.config import settings
+from app.utils.logger import get_logger
+from .response_cache import LLMResponseCache, make_cache_key
+
+
+logger = get_logger(__name__)
+
 
+class LLMError(Exception):
+    """Raised when the provider still fails after every retry."""
 
-class LLMProvider:
 
-    def __init__(self):
-        # Configure Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+# =========================
+# Providers
+# =========================
 
-    def generate_response(
+class LLMProvider(ABC):
+    """
+    Minimal provider interface: one async completion call.
+    Providers do no retrying or throttling; LLMClient handles that.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def generate(
         self,
         prompt: str,
         system_message: str,
-        temperature: float = 0.3,
-        max_tokens: int = 500
+        temperature: float,
+        max_tokens: int,
     ) -> str:
+        """Return the full completion text."""
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas as they arrive. Defaults to one full chunk."""
+        yield await self.generate(prompt, system_message, temperature, max_tokens)
+
+
+class GeminiProvider(LLMProvider):
 
-        try:
-            # Gemini does not use system/user roles like OpenAI
-            # So we merge system + user into one structured prompt
+    name = "gemini"
 
-            full_prompt = f"""
+    def __init__(self, model_name: str = settings.LLM_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    def _get_model(self):
+        # Imported lazily so the app (and the fake provider) work without the SDK
+        if self._model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._model = genai.GenerativeModel(self.model_name)
+
+        return self._model
+
+    def _build_prompt(self, prompt: str, system_message: str) -> str:
+        # Gemini does not use system/user roles like OpenAI
+        # So we merge system + user into one structured prompt
+
+        return f"""
 {system_message}
 
 User:
 {prompt}
 """
 
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": temperature,
-                    "max_output_tokens": max_tokens,
-                }
+    async def generate(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+
+        response = await self._get_model().generate_content_async(
+            self._build_prompt(prompt, system_message),
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            }
+        )
+
+        return response.text.strip()
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+
+        response = await self._get_model().generate_content_async(
+            self._build_prompt(prompt, system_message),
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            },
+            stream=True,
+        )
+
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Offline provider for development and load tests.
+    Sleeps for a configurable latency and returns a deterministic answer.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = settings.FAKE_LLM_LATENCY_SECONDS, failure_rate: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+
+    async def generate(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        await asyncio.sleep(self.latency_seconds)
+
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Simulated provider failure")
+
+        return f"[fake-llm] Response to: {' '.join(prompt.split())[:200]}"
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        text = await self.generate(prompt, system_message, temperature, max_tokens)
+
+        # Spread the words out to mimic token-by-token delivery
+        for word in text.split(" "):
+            await asyncio.sleep(self.latency_seconds / 20)
+            yield word + " "
+
+
+PROVIDERS: Dict[str, Callable[[], LLMProvider]] = {
+    "gemini": GeminiProvider,
+    "fake": FakeLLMProvider,
+}
+
+
+def register_llm_provider(name: str, factory: Callable[[], LLMProvider]):
+    """Make a provider selectable through the LLM_PROVIDER setting."""
+    PROVIDERS[name] = factory
+
+
+# =========================
+# Shared Client
+# =========================
+
+class LLMClient:
+    """
+    Process-wide entry point for every AI service.
+    Bounds concurrent provider calls, enforces a deadline per attempt and
+    retries failures with jittered exponential backoff. Callers with
+    repeatable prompts can opt into the exact-match response cache.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout_seconds: float = settings.LLM_TIMEOUT_SECONDS,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        backoff_seconds: float = settings.LLM_RETRY_BACKOFF_SECONDS,
+        cache: Optional[LLMResponseCache] = None,
+    ):
+        self.provider = provider
+        self.cache = cache if cache is not None else LLMResponseCache()
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "timeouts": 0, "failures": 0}
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, base * 2^attempt]
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+
+    async def generate_response(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        timeout: Optional[float] = None,
+        cache: bool = False,
+        bypass_cache: bool = False,
+    ) -> str:
+        """
+        `cache` looks the request up in the response cache first and stores
+        the answer afterwards; `bypass_cache` skips the lookup but still
+        refreshes the stored answer. Concurrent identical requests are
+        coalesced into a single provider call either way.
+        """
+
+        model = getattr(self.provider, "model_name", self.provider.name)
+        key = make_cache_key(system_message, prompt, model, temperature, max_tokens)
+
+        if cache and not bypass_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Identical requests already in flight share one provider call
+        flight = self._inflight.get(key)
+
+        if flight is not None:
+            self.stats["coalesced"] += 1
+        else:
+            flight = asyncio.ensure_future(
+                self._generate(prompt, system_message, temperature, max_tokens, timeout, key if cache else None)
             )
+            self._inflight[key] = flight
+            flight.add_done_callback(partial(self._land, key))
+
+        # Shielded so one caller disconnecting does not cancel the others
+        return await asyncio.shield(flight)
+
+    def _land(self, key: str, flight: "asyncio.Future[str]"):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+        # Mark the error as retrieved even if every waiter went away
+        if not flight.cancelled():
+            flight.exception()
+
+    async def _generate(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: Optional[float],
+        cache_key: Optional[str] = None,
+    ) -> str:
+
+        deadline = timeout or self.timeout_seconds
+        self.stats["calls"] += 1
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self.provider.generate(prompt, system_message, temperature, max_tokens),
+                        timeout=deadline,
+                    )
+
+                if cache_key:
+                    await self.cache.put(cache_key, response)
+
+                return response
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                error = f"timed out after {deadline}s"
+            except Exception as e:
+                error = str(e)
+
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                logger.warning(f"LLM call failed ({error}), retry {attempt + 1}/{self.max_retries}")
+                await asyncio.sleep(self._backoff(attempt))
+
+        self.stats["failures"] += 1
+        raise LLMError(f"LLM provider '{self.provider.name}' failed: {error}")
+
+    async def stream_response(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield text deltas from the provider.
+        The deadline applies to each wait for the next chunk. Failures are
+        retried only until the first chunk is sent; after that the stream
+        cannot be replayed, so they surface as LLMError.
+        """
+
+        deadline = timeout or self.timeout_seconds
+        self.stats["calls"] += 1
+
+        for attempt in range(self.max_retries + 1):
+            started = False
+
+            try:
+                async with self._semaphore:
+                    chunks = self.provider.stream(prompt, system_message, temperature, max_tokens).__aiter__()
+
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline)
+                        except StopAsyncIteration:
+                            return
+
+                        started = True
+                        yield chunk
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                error = f"timed out after {deadline}s"
+            except Exception as e:
+                error = str(e)
+
+            if started or attempt == self.max_retries:
+                break
+
+            self.stats["retries"] += 1
+            logger.warning(f"LLM stream failed ({error}), retry {attempt + 1}/{self.max_retries}")
+            await asyncio.sleep(self._backoff(attempt))
+
+        self.stats["failures"] += 1
+        raise LLMError(f"LLM provider '{self.provider.name}' failed: {error}")
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the shared client, creating it from settings on first use."""
+    global _client
+
+    if _client is None:
+        factory = PROVIDERS.get(settings.LLM_PROVIDER)
+        if factory is None:
+            raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER}")
+        _client = LLMClient(factory())
+
+    return _client
+
 
-            return response.text.strip()
+def configure_llm_client(provider: LLMProvider, **limits) -> LLMClient:
+    """Replace the shared client, e.g. with FakeLLMProvider for load tests."""
+    global _client
 
-        except Exception as e:
-            return f"Error: {str(e)}"
\ No newline at end of file
+    _client = LLMClient(provider, **limits)
+    return _client
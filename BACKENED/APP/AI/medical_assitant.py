@@ -1,13 +1,16 @@
 # medical_assistant.py
 
 from datetime import datetime
-from .llm_provider import LLMProvider
+from typing import AsyncIterator, List
+from .context_builder import ConversationContext, ConversationContextBuilder
+from .llm_provider import get_llm_client
 from .memory import AIMemoryStore
+from .safety_filter import SafetyVerdict, get_safety_screen
 from ..schemas.ai_schema import (
     AIChatRequest,
     AIChatResponse,
+    AIStreamChunk,
     AIResponseType,
-    AISafetyMeta,
     AIMemoryEntry
 )
 
@@ -15,8 +18,10 @@ from ..schemas.ai_schema import (
 class MedicalAssistantService:
 
     def __init__(self):
-        self.llm = LLMProvider()
+        self.llm = get_llm_client()
         self.memory_store = AIMemoryStore()
+        self.context_builder = ConversationContextBuilder(self.llm)
+        self.safety = get_safety_screen()
 
     def _build_system_prompt(self, role: str) -> str:
         """
@@ -39,39 +44,25 @@ class MedicalAssistantService:
 
         return base_prompt
 
-    def chat(self, request: AIChatRequest) -> AIChatResponse:
+    async def _build_context(self, request: AIChatRequest, system_prompt: str) -> ConversationContext:
 
         # Retrieve memory (if session exists)
         previous_conversation = []
         if request.session_id:
-            previous_conversation = self.memory_store.get_session_memory(request.session_id)
-
-        conversation_context = "\n".join(
-            [f"User: {m.message}\nAI: {m.response}" for m in previous_conversation]
-        )
-
-        system_prompt = self._build_system_prompt(request.role)
-
-        final_prompt = f"""
-        Previous Conversation:
-        {conversation_context}
-
-        Current Message:
-        {request.message}
-
-        Additional Context:
-        {request.context}
-        """
-
-        ai_text = self.llm.generate_response(
-            prompt=final_prompt,
-            system_message=system_prompt,
-            temperature=0.3
+            previous_conversation = await self.memory_store.get_session_memory_async(request.session_id)
+
+        return await self.context_builder.build(
+            session_id=request.session_id,
+            history=previous_conversation,
+            message=request.message,
+            context=request.context,
+            system_prompt=system_prompt,
         )
 
+    async def _remember(self, request: AIChatRequest, ai_text: str):
         # Save memory
         if request.session_id:
-            self.memory_store.add_entry(
+            await self.memory_store.add_entry_async(
                 AIMemoryEntry(
                     session_id=request.session_id,
                     user_id=request.user_id,
@@ -81,23 +72,95 @@ class MedicalAssistantService:
                 )
             )
 
-        # Simple safety check
-        restricted = False
-        reason = None
-
-        dangerous_keywords = ["suicide", "kill", "overdose"]
-
-        if any(word in request.message.lower() for word in dangerous_keywords):
-            restricted = True
-            reason = "Potentially harmful medical content detected."
-
+    def _response(self, text: str, verdict: SafetyVerdict, usage=None) -> AIChatResponse:
         return AIChatResponse(
-            response=ai_text,
+            response=text,
             response_type=AIResponseType.chat,
-            safety=AISafetyMeta(
-                restricted_content=restricted,
-                reason=reason
-            ),
+            safety=verdict.to_meta(),
             confidence_score=0.93,
-            timestamp=str(datetime.utcnow())
-        )
\ No newline at end of file
+            timestamp=str(datetime.utcnow()),
+            usage=usage
+        )
+
+    async def chat(self, request: AIChatRequest) -> AIChatResponse:
+
+        # Screen before anything reaches the provider (including the history summary)
+        verdict = self.safety.check_input(request.message)
+        if verdict.blocked:
+            return self._response(verdict.refusal(), verdict)
+
+        system_prompt = self._build_system_prompt(request.role)
+        conversation = await self._build_context(request, system_prompt)
+
+        ai_text = await self.llm.generate_response(
+            prompt=conversation.prompt,
+            system_message=system_prompt,
+            temperature=0.3
+        )
+
+        verdict = verdict.merge(self.safety.check_output(ai_text))
+        if verdict.blocked:
+            return self._response(verdict.refusal(), verdict, conversation.usage)
+
+        await self._remember(request, ai_text)
+
+        return self._response(ai_text, verdict, conversation.usage)
+
+    async def chat_stream(self, request: AIChatRequest) -> AsyncIterator[AIStreamChunk]:
+        """
+        Yield the reply as it is generated, then a final `done` chunk.
+        Memory is only written once the whole reply has arrived, so an
+        interrupted stream never leaves a half answer in the session.
+
+        Each chunk is screened before it is sent, and text that could still
+        be the start of a term is held until the next chunk; a blocked term
+        ends the stream with a refusal in place of the rest of the reply.
+        """
+
+        verdict = self.safety.check_input(request.message)
+        if verdict.blocked:
+            yield AIStreamChunk(chunk=verdict.refusal(), done=False)
+            yield AIStreamChunk(chunk="", done=True, safety=verdict.to_meta())
+            return
+
+        parts: List[str] = []
+        system_prompt = self._build_system_prompt(request.role)
+        conversation = await self._build_context(request, system_prompt)
+        scanner = self.safety.scanner("output")
+        output = SafetyVerdict()
+
+        stream = self.llm.stream_response(
+            prompt=conversation.prompt,
+            system_message=system_prompt,
+            temperature=0.3
+        )
+
+        try:
+            async for text in stream:
+                output.matches.extend(scanner.feed(text))
+                if output.blocked:
+                    break
+
+                released = scanner.release()
+                if released:
+                    parts.append(released)
+                    yield AIStreamChunk(chunk=released, done=False)
+            else:
+                output.matches.extend(scanner.finish())
+                released = scanner.release()
+                if released and not output.blocked:
+                    parts.append(released)
+                    yield AIStreamChunk(chunk=released, done=False)
+        finally:
+            # Stop the provider call if the reply was cut off
+            await stream.aclose()
+
+        self.safety.record("output", output)
+        verdict = verdict.merge(output)
+
+        if verdict.blocked:
+            yield AIStreamChunk(chunk=("\n\n" if parts else "") + verdict.refusal(), done=False)
+        else:
+            await self._remember(request, "".join(parts).strip())
+
+        yield AIStreamChunk(chunk="", done=True, usage=conversation.usage, safety=verdict.to_meta())
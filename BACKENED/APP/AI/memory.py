@@ -1,16 +1,158 @@
 # memory.py
 
-from typing import List
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+from app import database
+from app.config import settings
+from app.database import run_in_db_executor
+from app.utils.logger import get_logger
 from ..schemas.ai_schema import AIMemoryEntry
 
 
+logger = get_logger(__name__)
+
+
 class AIMemoryStore:
+    """
+    Conversation memory keyed by session.
+
+    Each session keeps only its last `max_turns` exchanges, and once more
+    than `max_sessions` are held the least recently used one is dropped.
+    With `persist` enabled every turn is also written to the
+    `ai_conversations` collection (one document per session, trimmed to the
+    same window), so sessions survive restarts and are shared by workers.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = settings.AI_MEMORY_MAX_SESSIONS,
+        max_turns: int = settings.AI_MEMORY_MAX_TURNS,
+        persist: bool = settings.AI_MEMORY_PERSIST,
+    ):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.persist = persist
+        self._sessions: "OrderedDict[str, Deque[AIMemoryEntry]]" = OrderedDict()
+        # Persistent calls run on the DB thread pool, so guard the dict
+        self._lock = threading.Lock()
+
+    # =========================
+    # In-process cache
+    # =========================
+
+    def _evict_idle(self):
+        # Caller holds the lock; the front of the OrderedDict is least recently used
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _cache_session(self, session_id: str, entries: List[AIMemoryEntry]) -> Deque[AIMemoryEntry]:
+        with self._lock:
+            session = deque(entries, maxlen=self.max_turns)
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict_idle()
+
+            return session
+
+    def _append_cached(self, entry: AIMemoryEntry):
+        with self._lock:
+            session = self._sessions.get(entry.session_id)
+
+            if session is None:
+                session = deque(maxlen=self.max_turns)
+                self._sessions[entry.session_id] = session
+
+            session.append(entry)
+            self._sessions.move_to_end(entry.session_id)
+            self._evict_idle()
+
+    def _get_cached(self, session_id: str) -> Optional[List[AIMemoryEntry]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+
+            self._sessions.move_to_end(session_id)
+            return list(session)
 
-    def __init__(self):
-        self.memory: List[AIMemoryEntry] = []
+    # =========================
+    # Persistence
+    # =========================
+
+    def _collection(self):
+        if not self.persist:
+            return None
+        return database.ai_conversations
+
+    def _load_session(self, session_id: str) -> Optional[List[AIMemoryEntry]]:
+        collection = self._collection()
+        if collection is None:
+            return None
+
+        try:
+            document = collection.find_one({"_id": session_id}, {"turns": {"$slice": -self.max_turns}})
+        except Exception as e:
+            logger.warning(f"Could not load AI session {session_id}: {e}")
+            return None
+
+        turns = document.get("turns", []) if document else []
+        return [AIMemoryEntry(session_id=session_id, **turn) for turn in turns]
+
+    def _save_entry(self, entry: AIMemoryEntry):
+        collection = self._collection()
+        if collection is None:
+            return
+
+        turn = entry.dict(exclude={"session_id"})
+
+        try:
+            collection.update_one(
+                {"_id": entry.session_id},
+                {
+                    "$push": {"turns": {"$each": [turn], "$slice": -self.max_turns}},
+                    "$set": {"user_id": entry.user_id, "updated_at": entry.timestamp},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist AI session {entry.session_id}: {e}")
+
+    # =========================
+    # Public API
+    # =========================
 
     def add_entry(self, entry: AIMemoryEntry):
-        self.memory.append(entry)
+        self._append_cached(entry)
+        self._save_entry(entry)
+
+    def get_session_memory(self, session_id: str) -> List[AIMemoryEntry]:
+        # The stored copy wins when persisting, since another worker may
+        # have added turns; the cache covers database outages.
+        stored = self._load_session(session_id)
+        if stored is not None:
+            self._cache_session(session_id, stored)
+            return stored
+
+        return self._get_cached(session_id) or []
+
+    def clear_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+        collection = self._collection()
+        if collection is not None:
+            collection.delete_one({"_id": session_id})
+
+    # Only persistent stores touch MongoDB, so only they need the thread pool
+
+    async def add_entry_async(self, entry: AIMemoryEntry):
+        if self.persist:
+            return await run_in_db_executor(self.add_entry)(entry)
+        return self.add_entry(entry)
 
-    def get_session_memory(self, session_id: str):
-        return [m for m in self.memory if m.session_id == session_id]
\ No newline at end of file
+    async def get_session_memory_async(self, session_id: str) -> List[AIMemoryEntry]:
+        if self.persist:
+            return await run_in_db_executor(self.get_session_memory)(session_id)
+        return self.get_session_memory(session_id)
@@ -1,6 +1,6 @@
 # prescription.py
 
-from .llm_provider import LLMProvider
+from .llm_provider import get_llm_client
 from ..schemas.ai_schema import (
     PrescriptionExplanationRequest,
     PrescriptionExplanationResponse
@@ -10,9 +10,9 @@ from ..schemas.ai_schema import (
 class PrescriptionService:
 
     def __init__(self):
-        self.llm = LLMProvider()
+        self.llm = get_llm_client()
 
-    def explain(self, request: PrescriptionExplanationRequest) -> PrescriptionExplanationResponse:
+    async def explain(self, request: PrescriptionExplanationRequest) -> PrescriptionExplanationResponse:
 
         system_message = """
         You are a medical prescription explanation assistant.
@@ -26,9 +26,11 @@ class PrescriptionService:
         {request.prescription_text}
         """
 
-        explanation = self.llm.generate_response(
+        explanation = await self.llm.generate_response(
             prompt=prompt,
-            system_message=system_message
+            system_message=system_message,
+            cache=True,
+            bypass_cache=request.bypass_cache
         )
 
         return PrescriptionExplanationResponse(
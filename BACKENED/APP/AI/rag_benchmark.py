@@ -0,0 +1,131 @@
+# rag_benchmark.py
+
+"""
+Recall / latency benchmark for the RAG vector index.
+
+Builds indexes over synthetic clustered unit vectors (embedding cost is
+excluded, so this measures the index alone) and compares IVF search at
+several nprobe values against exact brute-force search.
+
+Usage:
+    python -m app.AI.rag_benchmark --sizes 10000 100000 1000000 --dim 384
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .document_loader import DocumentChunk
+from .vector_index import VectorIndex, VectorIndexWriter, default_nlist
+
+
+WRITE_BATCH = 50_000
+
+
+def _clustered_vectors(rng: np.random.Generator, rows: int, dim: int, clusters: int) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentile_ms(samples: List[float], percentile: float) -> float:
+    return round(float(np.percentile(samples, percentile)) * 1000, 2)
+
+
+def run_benchmark(
+    rows: int,
+    dim: int,
+    queries: int,
+    k: int,
+    nprobes: List[int],
+    workdir: Path,
+    seed: int = 0,
+) -> Dict[str, object]:
+    rng = np.random.default_rng(seed)
+    clusters = max(16, rows // 500)
+    index_dir = workdir / f"index_{rows}"
+
+    started = time.perf_counter()
+    writer = VectorIndexWriter(str(index_dir), "synthetic", dim)
+
+    for start in range(0, rows, WRITE_BATCH):
+        count = min(WRITE_BATCH, rows - start)
+        chunks = [DocumentChunk("synthetic", None, str(start + i)) for i in range(count)]
+        writer.add(_clustered_vectors(rng, count, dim, clusters), chunks)
+
+    nlist = max(default_nlist(rows), int(np.sqrt(rows)))
+    writer.finish(nlist)
+    build_seconds = time.perf_counter() - started
+
+    index = VectorIndex(str(index_dir))
+    probe_rows = rng.choice(rows, queries, replace=False)
+    # Queries are indexed rows nudged by noise of about 30% of their length
+    noise = rng.standard_normal((queries, dim)).astype(np.float32) * (0.3 / np.sqrt(dim))
+    query_vectors = np.asarray(index.vectors[np.sort(probe_rows)]) + noise
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    exact, brute_times = [], []
+    for query in query_vectors:
+        started = time.perf_counter()
+        exact.append({chunk_id for chunk_id, _ in index.search_brute_force(query, k)})
+        brute_times.append(time.perf_counter() - started)
+
+    result = {
+        "rows": rows,
+        "dim": dim,
+        "nlist": nlist,
+        "build_seconds": round(build_seconds, 2),
+        "brute": {"p50_ms": _percentile_ms(brute_times, 50), "p95_ms": _percentile_ms(brute_times, 95)},
+        "ivf": [],
+    }
+
+    for nprobe in nprobes:
+        hits, times = 0, []
+
+        for query, truth in zip(query_vectors, exact):
+            started = time.perf_counter()
+            found = {chunk_id for chunk_id, _ in index.search_ivf(query, k, nprobe)}
+            times.append(time.perf_counter() - started)
+            hits += len(found & truth)
+
+        result["ivf"].append({
+            "nprobe": nprobe,
+            f"recall@{k}": round(hits / (k * queries), 3),
+            "p50_ms": _percentile_ms(times, 50),
+            "p95_ms": _percentile_ms(times, 95),
+        })
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG vector search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--workdir", default=None, help="keep the built indexes here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        workdir = Path(args.workdir or scratch)
+
+        for rows in args.sizes:
+            result = run_benchmark(rows, args.dim, args.queries, args.k, args.nprobe, workdir)
+
+            print(f"\n{rows:,} chunks x {result['dim']} dims, {result['nlist']} lists, built in {result['build_seconds']}s")
+            print(f"  brute force     p50 {result['brute']['p50_ms']:>8} ms   p95 {result['brute']['p95_ms']:>8} ms")
+            for row in result["ivf"]:
+                print(
+                    f"  ivf nprobe={row['nprobe']:<4} p50 {row['p50_ms']:>8} ms   p95 {row['p95_ms']:>8} ms"
+                    f"   recall@{args.k} {row[f'recall@{args.k}']}"
+                )
+
+
+if __name__ == "__main__":
+    main()
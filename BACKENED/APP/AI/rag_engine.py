@@ -1,26 +1,170 @@
 # rag_engine.py
 
-from .llm_provider import LLMProvider
+"""
+Retrieval over the clinical guideline corpus.
+
+Usage:
+    python -m app.AI.rag_engine ingest guidelines/ extra.pdf [--nlist N]
+    python -m app.AI.rag_engine search "first-line treatment for hypertension"
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import get_logger
+from .bm25_index import BM25Index, BM25IndexBuilder, reciprocal_rank_fusion
+from .document_loader import load_chunks
+from .embeddings import Embedder, get_embedder
+from .llm_provider import get_llm_client
+from .vector_index import VectorIndex, VectorIndexWriter, resolve_build
 from ..schemas.ai_schema import RAGSource
 
 
+logger = get_logger(__name__)
+
+EMBED_BATCH_SIZE = 256
+
+
+# =========================
+# Ingestion
+# =========================
+
+def ingest_documents(
+    paths: Iterable[str],
+    index_dir: str = settings.RAG_INDEX_DIR,
+    embedder: Optional[Embedder] = None,
+    nlist: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Chunk, embed and index every text/PDF document under `paths`, building
+    the BM25 index over the same chunk ids. Rebuilds everything; running
+    engines keep serving the previous build and switch on their next query.
+    """
+    embedder = embedder or get_embedder()
+    writer = VectorIndexWriter(index_dir, embedder.name, embedder.dim)
+    lexical = BM25IndexBuilder()
+    batch = []
+
+    def flush():
+        texts = [c.text for c in batch]
+        writer.add(embedder.embed(texts), batch)
+        lexical.add(texts)
+
+    for chunk in load_chunks(paths):
+        batch.append(chunk)
+
+        if len(batch) >= EMBED_BATCH_SIZE:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+
+    lexical.save(writer.staging)
+    writer.finish(nlist)
+
+    return {"index_dir": index_dir, "chunks": writer.rows, "embedder": embedder.name, "dim": embedder.dim}
+
+
+# =========================
+# Query
+# =========================
+
 class RAGEngine:
 
-    def __init__(self):
-        self.llm = LLMProvider()
+    def __init__(self, index_dir: str = settings.RAG_INDEX_DIR):
+        self.llm = get_llm_client()
+        self.index_dir = index_dir
+        # (vector index, BM25 index, embedder) of one build, swapped as a unit
+        self._loaded: Optional[Tuple[VectorIndex, Optional[BM25Index], Embedder]] = None
+
+    def _load(self) -> Optional[Tuple[VectorIndex, Optional[BM25Index], Embedder]]:
+        loaded = self._loaded
+        build = resolve_build(self.index_dir)
+
+        if build is None or (loaded is not None and loaded[0].directory == build):
+            return loaded
+
+        # A newer build was ingested; keep serving the current one if it cannot be opened
+        try:
+            index = VectorIndex(str(build))
+            lexical = BM25Index(str(build)) if BM25Index.exists(str(build)) else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load RAG index build {build}: {e}")
+            return loaded
+
+        # Queries must be embedded exactly like the indexed chunks
+        embedder = get_embedder(index.manifest["embedder"], dim=index.dim)
+        self._loaded = loaded = (index, lexical, embedder)
+
+        return loaded
+
+    def reload(self):
+        """Drop the loaded build; the next query opens the live one."""
+        self._loaded = None
+
+    def _rank(self, loaded, question: str, top_k: int, mode: str, retrieval: str):
+        index, lexical, embedder = loaded
 
-    def query(self, question: str):
+        if retrieval == "bm25" and lexical is not None:
+            return lexical.search(question, top_k)
 
-        sources = [
-            RAGSource(
-                document_name="cardiology_guidelines.pdf",
-                page_number=12,
-                snippet="Hypertension treatment includes ACE inhibitors...",
-                score=0.87
-            )
-        ]
+        if retrieval == "vector" or lexical is None:
+            return index.search(embedder.embed_query(question), k=top_k, mode=mode)
 
-        context = "\n".join([s.snippet for s in sources])
+        # Hybrid: exact terms (drug names, ICD codes) from BM25, meaning from vectors
+        depth = max(top_k, settings.RAG_FUSION_DEPTH)
+        vector_hits = index.search(embedder.embed_query(question), k=depth, mode=mode)
+        lexical_hits = lexical.search(question, depth)
+
+        return reciprocal_rank_fusion([vector_hits, lexical_hits], k=settings.RAG_RRF_K)[:top_k]
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int = settings.RAG_TOP_K,
+        mode: str = settings.RAG_SEARCH_MODE,
+        retrieval: str = settings.RAG_RETRIEVAL,
+    ) -> List[RAGSource]:
+        """
+        Scored sources for a question. With hybrid retrieval the score is
+        the reciprocal-rank fusion of vector and BM25 ranks, scaled to 0-1.
+        """
+        loaded = self._load()
+        if loaded is None or not loaded[0].rows:
+            return []
+        index = loaded[0]
+
+        if retrieval not in ("hybrid", "vector", "bm25"):
+            raise ValueError(f"Unknown retrieval: {retrieval}")
+
+        sources = []
+
+        for chunk_id, score in self._rank(loaded, question, top_k, mode, retrieval):
+            chunk = index.get_chunk(chunk_id)
+            sources.append(RAGSource(
+                document_name=chunk.document_name,
+                page_number=chunk.page_number,
+                snippet=chunk.text,
+                score=round(score, 4),
+            ))
+
+        return sources
+
+    async def query(self, question: str, top_k: int = settings.RAG_TOP_K):
+
+        # Scanning the memory-mapped index is blocking work
+        sources = await asyncio.to_thread(self.retrieve, question, top_k)
+
+        if not sources:
+            return "No indexed guideline covers this question.", sources
+
+        context = "\n\n".join(
+            [f"[{s.document_name}, page {s.page_number or '-'}]\n{s.snippet}" for s in sources]
+        )
 
         system_message = """
         You are a hospital knowledge assistant.
@@ -35,9 +179,44 @@ class RAGEngine:
         {question}
         """
 
-        answer = self.llm.generate_response(
+        answer = await self.llm.generate_response(
             prompt=prompt,
             system_message=system_message
         )
 
-        return answer, sources
\ No newline at end of file
+        return answer, sources
+
+
+# =========================
+# Command Line
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the RAG guideline index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="rebuild the index from documents")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--index-dir", default=settings.RAG_INDEX_DIR)
+    ingest.add_argument("--nlist", type=int, default=None, help="IVF lists (0 disables partitioning)")
+
+    search = commands.add_parser("search", help="show the top sources for a question")
+    search.add_argument("question")
+    search.add_argument("--index-dir", default=settings.RAG_INDEX_DIR)
+    search.add_argument("--k", type=int, default=settings.RAG_TOP_K)
+    search.add_argument("--mode", choices=["auto", "brute", "ivf"], default=settings.RAG_SEARCH_MODE)
+    search.add_argument("--retrieval", choices=["hybrid", "vector", "bm25"], default=settings.RAG_RETRIEVAL)
+
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        result = ingest_documents(args.paths, args.index_dir, nlist=args.nlist)
+    else:
+        engine = RAGEngine(args.index_dir)
+        result = [source.dict() for source in engine.retrieve(args.question, args.k, args.mode, args.retrieval)]
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# reference_ranges.py
+
+"""
+Lab reference ranges by analyte, gender and age band.
+
+Each row of REFERENCE_RANGES applies to one gender ("any", "male" or
+"female") and an age range in years; the most specific matching row wins.
+`None` means the bound does not apply (e.g. HDL has no upper limit).
+Values are typical adult/paediatric laboratory ranges and should be
+replaced with the hospital laboratory's own table where they differ.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+GENDERS = ("any", "male", "female")
+
+# Lower edges in years: infant, child, adolescent, adult, older adult
+AGE_BAND_EDGES = np.array([0, 1, 13, 18, 65], dtype=np.float32)
+DEFAULT_AGE = 40.0
+
+# analyte, unit, gender, min age, max age (exclusive), low, high, critical low, critical high
+REFERENCE_RANGES: List[Tuple] = [
+    ("hemoglobin", "g/dL", "any", 0, 1, 9.5, 14.0, 7.0, 20.0),
+    ("hemoglobin", "g/dL", "any", 1, 13, 11.5, 15.5, 7.0, 20.0),
+    ("hemoglobin", "g/dL", "male", 13, 200, 13.5, 17.5, 7.0, 20.0),
+    ("hemoglobin", "g/dL", "female", 13, 200, 12.0, 15.5, 7.0, 20.0),
+    ("wbc", "10^9/L", "any", 0, 1, 6.0, 17.5, 2.0, 30.0),
+    ("wbc", "10^9/L", "any", 1, 13, 5.0, 14.5, 2.0, 30.0),
+    ("wbc", "10^9/L", "any", 13, 200, 4.0, 11.0, 2.0, 30.0),
+    ("platelets", "10^9/L", "any", 0, 200, 150.0, 450.0, 50.0, 1000.0),
+    ("glucose", "mg/dL", "any", 0, 200, 70.0, 99.0, 40.0, 400.0),
+    ("hba1c", "%", "any", 0, 200, 4.0, 5.6, None, 12.0),
+    ("sodium", "mmol/L", "any", 0, 200, 135.0, 145.0, 120.0, 160.0),
+    ("potassium", "mmol/L", "any", 0, 18, 3.4, 4.7, 2.5, 6.5),
+    ("potassium", "mmol/L", "any", 18, 200, 3.5, 5.1, 2.5, 6.5),
+    ("chloride", "mmol/L", "any", 0, 200, 98.0, 107.0, 80.0, 120.0),
+    ("calcium", "mg/dL", "any", 0, 200, 8.5, 10.5, 6.5, 13.0),
+    ("creatinine", "mg/dL", "any", 0, 13, 0.3, 0.7, None, 4.0),
+    ("creatinine", "mg/dL", "male", 13, 200, 0.74, 1.35, None, 4.0),
+    ("creatinine", "mg/dL", "female", 13, 200, 0.59, 1.04, None, 4.0),
+    ("bun", "mg/dL", "any", 0, 65, 7.0, 20.0, None, 100.0),
+    ("bun", "mg/dL", "any", 65, 200, 8.0, 23.0, None, 100.0),
+    ("alt", "U/L", "male", 0, 200, 7.0, 55.0, None, 1000.0),
+    ("alt", "U/L", "female", 0, 200, 7.0, 45.0, None, 1000.0),
+    ("alt", "U/L", "any", 0, 200, 7.0, 55.0, None, 1000.0),
+    ("ast", "U/L", "any", 0, 200, 8.0, 48.0, None, 1000.0),
+    ("total_cholesterol", "mg/dL", "any", 0, 200, None, 200.0, None, None),
+    ("ldl", "mg/dL", "any", 0, 200, None, 100.0, None, None),
+    ("hdl", "mg/dL", "male", 0, 200, 40.0, None, None, None),
+    ("hdl", "mg/dL", "female", 0, 200, 50.0, None, None, None),
+    ("hdl", "mg/dL", "any", 0, 200, 40.0, None, None, None),
+    ("triglycerides", "mg/dL", "any", 0, 200, None, 150.0, None, 1000.0),
+    ("tsh", "mIU/L", "any", 0, 200, 0.4, 4.0, 0.01, 20.0),
+    ("crp", "mg/L", "any", 0, 200, None, 10.0, None, None),
+    ("systolic_bp", "mmHg", "any", 18, 200, 90.0, 120.0, 70.0, 180.0),
+    ("diastolic_bp", "mmHg", "any", 18, 200, 60.0, 80.0, 40.0, 120.0),
+    ("heart_rate", "bpm", "any", 0, 1, 100.0, 160.0, 60.0, 220.0),
+    ("heart_rate", "bpm", "any", 1, 13, 70.0, 120.0, 50.0, 200.0),
+    ("heart_rate", "bpm", "any", 13, 200, 60.0, 100.0, 40.0, 150.0),
+    ("temperature", "C", "any", 0, 200, 36.1, 37.2, 35.0, 40.0),
+    ("spo2", "%", "any", 0, 200, 95.0, None, 88.0, None),
+]
+
+ALIASES: Dict[str, str] = {
+    "hb": "hemoglobin",
+    "hgb": "hemoglobin",
+    "haemoglobin": "hemoglobin",
+    "white_blood_cells": "wbc",
+    "plt": "platelets",
+    "platelet_count": "platelets",
+    "blood_glucose": "glucose",
+    "fasting_glucose": "glucose",
+    "blood_sugar": "glucose",
+    "a1c": "hba1c",
+    "na": "sodium",
+    "k": "potassium",
+    "cl": "chloride",
+    "ca": "calcium",
+    "urea": "bun",
+    "cholesterol": "total_cholesterol",
+    "ldl_cholesterol": "ldl",
+    "hdl_cholesterol": "hdl",
+    "pulse": "heart_rate",
+    "oxygen_saturation": "spo2",
+}
+
+
+def normalize_analyte(name: str) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_")
+    return ALIASES.get(key, key)
+
+
+def age_band(ages: np.ndarray) -> np.ndarray:
+    """Band index for each age; unknown ages (NaN) count as adults."""
+    ages = np.where(np.isnan(ages), DEFAULT_AGE, ages)
+    return np.searchsorted(AGE_BAND_EDGES, ages, side="right") - 1
+
+
+def gender_code(gender: Optional[str]) -> int:
+    value = str(getattr(gender, "value", gender) or "").lower()
+    return GENDERS.index(value) if value in GENDERS else 0
+
+
+@dataclass
+class CompiledRanges:
+    """Dense lookup arrays indexed [analyte, gender, age band]; NaN = no bound."""
+    analytes: List[str]
+    index: Dict[str, int]
+    units: List[str]
+    low: np.ndarray
+    high: np.ndarray
+    critical_low: np.ndarray
+    critical_high: np.ndarray
+
+
+def compile_ranges(rows: List[Tuple] = REFERENCE_RANGES) -> CompiledRanges:
+    analytes = sorted({row[0] for row in rows})
+    index = {name: i for i, name in enumerate(analytes)}
+    units = [""] * len(analytes)
+
+    shape = (len(analytes), len(GENDERS), len(AGE_BAND_EDGES))
+    bounds = {name: np.full(shape, np.nan, dtype=np.float32) for name in ("low", "high", "critical_low", "critical_high")}
+    specificity = np.full(shape, -1, dtype=np.int8)
+
+    for analyte, unit, gender, min_age, max_age, low, high, critical_low, critical_high in rows:
+        a = index[analyte]
+        units[a] = unit
+        # Table rows are written on band edges, so a band belongs to a row when it starts inside it
+        bands = np.nonzero((AGE_BAND_EDGES >= min_age) & (AGE_BAND_EDGES < max_age))[0]
+        genders = range(len(GENDERS)) if gender == "any" else [GENDERS.index(gender)]
+        rank = 0 if gender == "any" else 1
+
+        for g in genders:
+            for b in bands:
+                if rank < specificity[a, g, b]:
+                    continue
+                specificity[a, g, b] = rank
+                for name, value in zip(bounds, (low, high, critical_low, critical_high)):
+                    bounds[name][a, g, b] = np.nan if value is None else value
+
+    # Unknown gender falls back to the wider of the male and female ranges
+    unset = specificity[:, 0, :] < 0
+    male, female = GENDERS.index("male"), GENDERS.index("female")
+
+    for name, widest in (("low", np.fmin), ("high", np.fmax), ("critical_low", np.fmin), ("critical_high", np.fmax)):
+        merged = widest(bounds[name][:, male, :], bounds[name][:, female, :])
+        bounds[name][:, 0, :] = np.where(unset, merged, bounds[name][:, 0, :])
+
+    return CompiledRanges(analytes=analytes, index=index, units=units, **bounds)
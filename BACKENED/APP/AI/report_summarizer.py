@@ -1,6 +1,6 @@
 # report_summarizer.py
 
-from .llm_provider import LLMProvider
+from .llm_provider import get_llm_client
 from app.schemas.ai_schema import (
     ReportSummaryRequest,
     ReportSummaryResponse
@@ -10,9 +10,9 @@ from app.schemas.ai_schema import (
 class ReportSummarizerService:
 
     def __init__(self):
-        self.llm = LLMProvider()
+        self.llm = get_llm_client()
 
-    def summarize(self, request: ReportSummaryRequest) -> ReportSummaryResponse:
+    async def summarize(self, request: ReportSummaryRequest) -> ReportSummaryResponse:
 
         system_message = """
         You are a medical report summarization AI.
@@ -25,9 +25,11 @@ class ReportSummarizerService:
         {request.report_text}
         """
 
-        summary = self.llm.generate_response(
+        summary = await self.llm.generate_response(
             prompt=prompt,
-            system_message=system_message
+            system_message=system_message,
+            cache=True,
+            bypass_cache=request.bypass_cache
         )
 
         return ReportSummaryResponse(
@@ -0,0 +1,215 @@
+# response_cache.py
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def make_cache_key(
+    system_message: str,
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """Content address for one completion request."""
+    payload = json.dumps(
+        [system_message, prompt, model, round(float(temperature), 4), max_tokens],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _DiskTier:
+    """
+    SQLite-backed second tier, shared by every worker on the host.
+    Calls block, so the cache runs them in a worker thread.
+
+    Holds at most `max_rows` rows: once a put takes the table over the cap
+    (and every `purge_every` puts regardless), expired rows are deleted,
+    then the rows closest to expiry until 90% of the cap is left, so the
+    puts that follow do not each trigger another trim.
+    """
+
+    LOW_WATER = 0.9
+
+    def __init__(
+        self,
+        path: str,
+        max_rows: int = settings.LLM_CACHE_DISK_MAX_ROWS,
+        purge_every: int = settings.LLM_CACHE_DISK_PURGE_EVERY,
+    ):
+        self.path = path
+        self.max_rows = max_rows
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires_at ON llm_cache (expires_at)")
+            # Other workers write too, so this is an estimate, re-read after each trim
+            self._rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        row = self._connect().execute(
+            "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, response: str, expires_at: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at),
+            )
+
+        with self._lock:
+            self._rows += 1
+            self._puts += 1
+            due = self._rows > self.max_rows or self._puts % self.purge_every == 0
+
+        if due:
+            self.trim()
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def trim(self) -> int:
+        """Purge expired rows; if still over max_rows, evict the soonest-expiring down to the low-water mark."""
+        removed = self.purge_expired()
+
+        with self._connect() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if rows > self.max_rows:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (int(self.max_rows * self.LOW_WATER),),
+                ).rowcount
+                rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+        with self._lock:
+            self._rows = rows
+
+        return removed
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache for LLM completions.
+
+    Entries live in a size-bounded LRU with a TTL. When `disk_path` is set,
+    misses fall through to a SQLite file (capped at LLM_CACHE_DISK_MAX_ROWS)
+    so answers survive restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.LLM_CACHE_TTL_SECONDS,
+        disk_path: Optional[str] = settings.LLM_CACHE_DISK_PATH,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._disk = None
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+        if disk_path:
+            try:
+                self._disk = _DiskTier(disk_path)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache disabled ({disk_path}): {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return response
+
+            del self._entries[key]
+            self.stats["expired"] += 1
+
+        if self._disk is not None:
+            try:
+                stored = await asyncio.to_thread(self._disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache read failed: {e}")
+                stored = None
+
+            if stored is not None:
+                response, expires_at = stored
+                self._remember(key, response, expires_at)
+                self.stats["disk_hits"] += 1
+                return response
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, response: str):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, response, expires_at)
+
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.put, key, response, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache write failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers; returns how many were removed."""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+
+        for key in expired:
+            del self._entries[key]
+
+        removed = len(expired)
+        if self._disk is not None:
+            removed += self._disk.purge_expired()
+
+        return removed
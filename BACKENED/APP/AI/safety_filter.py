@@ -0,0 +1,308 @@
+# safety_filter.py
+
+"""
+Multi-pattern safety screening for assistant inputs and outputs.
+
+Terms come from a lexicon file (SAFETY_LEXICON_PATH, default
+safety_lexicon.txt next to this module), one per line:
+
+    term <TAB> category [<TAB> action [<TAB> scope]]
+
+action is `flag` (answer, but mark the reply as restricted) or `block`
+(refuse); scope is `input`, `output` or `both`. Lines starting with #
+are comments.
+
+All terms are compiled into one Aho-Corasick automaton per scope, so a
+text is scanned in a single pass however many terms there are. Matching
+is case-insensitive, treats any run of non-alphanumerics as one space
+and only matches whole words ("kill" does not match "painkiller").
+Scanners keep their automaton state between feeds, so streamed output
+is screened chunk by chunk, including terms split across chunks, and
+the tail of a chunk that may still turn into a match is held back until
+the next chunk settles it.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import get_logger
+from ..schemas.ai_schema import AISafetyMeta
+
+
+logger = get_logger(__name__)
+
+DEFAULT_LEXICON_PATH = Path(__file__).with_name("safety_lexicon.txt")
+
+ACTIONS = ("flag", "block")
+SCOPES = ("input", "output")
+
+FLAGGED_REASON = "Potentially harmful medical content detected."
+
+REFUSALS = {
+    "self_harm": (
+        "I'm really sorry you're feeling this way, and I can't help with that. "
+        "Please reach out right now to emergency services or a local crisis line, "
+        "or talk to a doctor or someone you trust."
+    ),
+}
+DEFAULT_REFUSAL = "I can't help with that request. Please consult a licensed doctor."
+
+
+@dataclass(frozen=True)
+class SafetyTerm:
+    term: str
+    category: str
+    action: str = "flag"
+
+
+def _fold(char: str) -> str:
+    return char.lower() if char.isalnum() else " "
+
+
+def normalize_term(text: str) -> str:
+    return " ".join("".join(_fold(c) for c in text).split())
+
+
+# =========================
+# Automaton
+# =========================
+
+class AhoCorasick:
+    """Trie with failure links; output[state] lists every pattern ending there."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[int, ...]] = [()]
+        self.depth: List[int] = [0]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                following = self.goto[state].get(char)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.depth.append(self.depth[state] + 1)
+                    self.goto[state][char] = following
+                state = following
+            self.output[state] += (pattern_id,)
+
+        # Breadth-first, so every failure target is finished before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+
+            for char, following in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                self.fail[following] = self.goto[fallback].get(char, 0)
+                self.output[following] += self.output[self.fail[following]]
+                queue.append(following)
+
+    def step(self, state: int, char: str) -> int:
+        while True:
+            following = self.goto[state].get(char)
+            if following is not None:
+                return following
+            if state == 0:
+                return 0
+            state = self.fail[state]
+
+
+class SafetyScanner:
+    """
+    Incremental scan of one text; feed() chunks in order, then finish().
+
+    release() returns the text fed so far that can no longer be part of a
+    match. The tail the automaton is still partway into stays held until a
+    later chunk settles it, or until finish().
+    """
+
+    def __init__(self, automaton: AhoCorasick, terms: List[SafetyTerm]):
+        self._automaton = automaton
+        self._terms = terms
+        # Patterns are stored as " term ", so start as if after a space
+        self._state = automaton.step(0, " ")
+        self._after_space = True
+        self._finished = False
+        self._held = ""
+        self._fed = 0
+        # Offset in the text of each character the automaton stepped on
+        self._offsets: "deque[int]" = deque(maxlen=max(automaton.depth))
+
+    def _scan(self, text: str) -> List[SafetyTerm]:
+        automaton, state, after_space = self._automaton, self._state, self._after_space
+        offsets = self._offsets
+        found = []
+
+        for offset, char in enumerate(text, start=self._fed):
+            char = _fold(char)
+            if char == " ":
+                if after_space:
+                    continue
+                after_space = True
+            else:
+                after_space = False
+
+            state = automaton.step(state, char)
+            offsets.append(offset)
+            for pattern_id in automaton.output[state]:
+                found.append(self._terms[pattern_id])
+
+        self._state, self._after_space = state, after_space
+        return found
+
+    def feed(self, text: str) -> List[SafetyTerm]:
+        found = self._scan(text)
+        self._held += text
+        self._fed += len(text)
+        return found
+
+    def finish(self) -> List[SafetyTerm]:
+        # The closing boundary for a term at the very end of the text
+        self._finished = True
+        return self._scan(" ")
+
+    def release(self) -> str:
+        depth = self._automaton.depth[self._state]
+
+        if self._finished or not depth:
+            keep = 0
+        elif depth > len(self._offsets):
+            # Still inside the implied space before the text
+            keep = len(self._held)
+        else:
+            keep = self._fed - self._offsets[-depth]
+
+        released = self._held[:len(self._held) - keep]
+        self._held = self._held[len(self._held) - keep:]
+        return released
+
+
+# =========================
+# Verdicts
+# =========================
+
+@dataclass
+class SafetyVerdict:
+    matches: List[SafetyTerm] = field(default_factory=list)
+
+    @property
+    def blocked(self) -> bool:
+        return any(match.action == "block" for match in self.matches)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted({match.category for match in self.matches})
+
+    def merge(self, other: "SafetyVerdict") -> "SafetyVerdict":
+        return SafetyVerdict(self.matches + other.matches)
+
+    def refusal(self) -> str:
+        for match in self.matches:
+            if match.action == "block" and match.category in REFUSALS:
+                return REFUSALS[match.category]
+        return DEFAULT_REFUSAL
+
+    def to_meta(self) -> AISafetyMeta:
+        if not self.matches:
+            return AISafetyMeta(restricted_content=False)
+
+        if self.blocked:
+            reason = f"Request declined: {', '.join(self.categories)} content."
+        else:
+            reason = FLAGGED_REASON
+
+        return AISafetyMeta(restricted_content=True, reason=reason, categories=self.categories)
+
+
+# =========================
+# Screen
+# =========================
+
+def load_lexicon(path: Path) -> Dict[str, List[SafetyTerm]]:
+    """Terms per scope; a `both` line lands in each."""
+    terms: Dict[str, Dict[str, SafetyTerm]] = {scope: {} for scope in SCOPES}
+
+    with open(path, encoding="utf-8") as lexicon:
+        for number, line in enumerate(lexicon, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+
+            columns = [column.strip() for column in line.rstrip("\n").split("\t")]
+            term, category = normalize_term(columns[0]), columns[1] if len(columns) > 1 else "general"
+            action = columns[2] if len(columns) > 2 and columns[2] else "flag"
+            scope = columns[3] if len(columns) > 3 and columns[3] else "both"
+
+            if not term or action not in ACTIONS or scope not in SCOPES + ("both",):
+                logger.warning(f"Skipping safety lexicon line {number}: {line.strip()!r}")
+                continue
+
+            for target in (SCOPES if scope == "both" else (scope,)):
+                existing = terms[target].get(term)
+                # A duplicate term keeps the stricter action
+                if existing is None or (existing.action == "flag" and action == "block"):
+                    terms[target][term] = SafetyTerm(term, category, action)
+
+    return {scope: list(entries.values()) for scope, entries in terms.items()}
+
+
+class SafetyScreen:
+
+    def __init__(self, lexicon: Dict[str, List[SafetyTerm]]):
+        self._terms = lexicon
+        self._automata = {
+            scope: AhoCorasick(f" {term.term} " for term in terms)
+            for scope, terms in lexicon.items()
+        }
+        self.stats = {"inputs_screened": 0, "inputs_blocked": 0, "outputs_screened": 0, "outputs_blocked": 0}
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "SafetyScreen":
+        return cls(load_lexicon(Path(path or DEFAULT_LEXICON_PATH)))
+
+    @property
+    def term_count(self) -> int:
+        return sum(len(terms) for terms in self._terms.values())
+
+    def scanner(self, scope: str) -> SafetyScanner:
+        return SafetyScanner(self._automata[scope], self._terms[scope])
+
+    def record(self, scope: str, verdict: SafetyVerdict):
+        self.stats[f"{scope}s_screened"] += 1
+        if verdict.blocked:
+            self.stats[f"{scope}s_blocked"] += 1
+
+    def _check(self, scope: str, text: str) -> SafetyVerdict:
+        scanner = self.scanner(scope)
+        verdict = SafetyVerdict(scanner.feed(text) + scanner.finish())
+        self.record(scope, verdict)
+
+        return verdict
+
+    def check_input(self, text: str) -> SafetyVerdict:
+        return self._check("input", text)
+
+    def check_output(self, text: str) -> SafetyVerdict:
+        return self._check("output", text)
+
+
+_screen: Optional[SafetyScreen] = None
+
+
+def get_safety_screen() -> SafetyScreen:
+    global _screen
+
+    if _screen is None:
+        _screen = SafetyScreen.from_file(settings.SAFETY_LEXICON_PATH)
+        logger.info(f"Safety screen loaded with {_screen.term_count} terms")
+
+    return _screen
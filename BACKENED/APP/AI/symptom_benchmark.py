@@ -0,0 +1,114 @@
+# symptom_benchmark.py
+
+"""
+Throughput benchmark for the symptom checker.
+
+Builds a synthetic knowledge table (conditions x symptoms-per-condition
+rows over a shared symptom vocabulary), then times predict_batch over a
+triage queue, its sparse scoring step on its own, and calling predict
+once per query.
+
+Usage:
+    python -m app.AI.symptom_benchmark --conditions 5000 --queries 10000
+"""
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+
+from .symptom_checker import Condition, SymptomChecker, SymptomKnowledgeBase
+
+
+def _synthetic_knowledge(rng: np.random.Generator, conditions: int, per_condition: int, vocabulary: int):
+    table = [
+        Condition(f"condition_{i}", float(rng.uniform(0.001, 0.2)), 0, 200, "any", "Consult a doctor.")
+        for i in range(conditions)
+    ]
+    links = [
+        (f"condition_{i}", f"symptom_{s}", round(float(rng.uniform(0.2, 1.0)), 2))
+        for i in range(conditions)
+        for s in rng.choice(vocabulary, per_condition, replace=False)
+    ]
+    return SymptomKnowledgeBase(table, links)
+
+
+def run_benchmark(
+    conditions: int,
+    per_condition: int,
+    vocabulary: int,
+    queries: int,
+    symptoms_per_query: int,
+    top_k: int,
+    single_sample: int,
+    seed: int = 0,
+) -> Dict[str, object]:
+    rng = np.random.default_rng(seed)
+
+    started = time.perf_counter()
+    checker = SymptomChecker(_synthetic_knowledge(rng, conditions, per_condition, vocabulary))
+    build_seconds = time.perf_counter() - started
+
+    queue = [
+        {
+            "symptoms": [f"symptom_{s}" for s in rng.choice(vocabulary, symptoms_per_query, replace=False)],
+            "age": float(rng.integers(0, 95)),
+            "gender": None,
+        }
+        for _ in range(queries)
+    ]
+
+    started = time.perf_counter()
+    checker.predict_batch(queue, top_k)
+    batch_seconds = time.perf_counter() - started
+
+    # The vectorised scoring alone, on already encoded queries
+    encoded = [checker.encode(query["symptoms"])[0] for query in queue]
+    ages = np.array([query["age"] for query in queue])
+    started = time.perf_counter()
+    checker._score(encoded, ages, np.zeros(queries, dtype=np.int64))
+    score_seconds = time.perf_counter() - started
+
+    # Per-query calls on a sample, extrapolated to the full queue
+    sample = queue[:single_sample]
+    started = time.perf_counter()
+    for query in sample:
+        checker.predict(query["symptoms"], query["age"], query["gender"], top_k)
+    single_seconds = (time.perf_counter() - started) / max(len(sample), 1) * queries
+
+    return {
+        "rows": conditions * per_condition,
+        "conditions": conditions,
+        "queries": queries,
+        "build_seconds": round(build_seconds, 3),
+        "batch_seconds": round(batch_seconds, 3),
+        "scoring_seconds": round(score_seconds, 3),
+        "one_at_a_time_seconds": round(single_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark symptom-to-condition ranking")
+    parser.add_argument("--conditions", type=int, default=5_000)
+    parser.add_argument("--symptoms-per-condition", type=int, default=12)
+    parser.add_argument("--vocabulary", type=int, default=3_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--symptoms-per-query", type=int, default=4)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--single-sample", type=int, default=500, help="queries timed one at a time")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.conditions, args.symptoms_per_condition, args.vocabulary,
+        args.queries, args.symptoms_per_query, args.k, args.single_sample,
+    )
+
+    print(f"\n{result['rows']:,} rows, {result['conditions']:,} conditions, compiled in {result['build_seconds']}s")
+    print(f"  batch of {result['queries']:,}   {result['batch_seconds']:>8} s")
+    print(f"  scoring only      {result['scoring_seconds']:>8} s   (queries already encoded)")
+    print(f"  one at a time     {result['one_at_a_time_seconds']:>8} s   (extrapolated)")
+
+
+if __name__ == "__main__":
+    main()
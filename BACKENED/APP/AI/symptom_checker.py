@@ -0,0 +1,253 @@
+# symptom_checker.py
+
+"""
+Symptom-to-condition ranking over a compiled knowledge table.
+
+The knowledge table is two CSV files (SYMPTOM_KNOWLEDGE_DIR, default this
+directory):
+
+    conditions.csv          condition, prior, min_age, max_age, gender, recommended_action
+    condition_symptoms.csv  condition, symptom, weight (0-1)
+
+Symptoms get integer ids and the weights are held per symptom as a
+sparse column (condition ids + weights, CSC layout). Scoring a batch of
+queries gathers the columns of every query symptom and sums them per
+(query, condition) pair, so only conditions sharing a symptom with the
+query are ever scored. The score is a weighted overlap, normalised by
+the size of both symptom sets and multiplied by the condition prior,
+adjusted for the patient's age and gender.
+"""
+
+import csv
+import re
+from itertools import chain
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from .reference_ranges import gender_code, GENDERS
+
+
+DEFAULT_KNOWLEDGE_DIR = Path(__file__).parent
+
+# Prior multiplier for a patient outside the condition's usual age range
+AGE_MISMATCH_FACTOR = 0.1
+# Priors span orders of magnitude; damp them so symptoms still dominate
+PRIOR_EXPONENT = 0.25
+
+UNKNOWN_CONDITION = "Unknown"
+DEFAULT_ACTION = "Consult a doctor for proper diagnosis."
+
+SYMPTOM_ALIASES: Dict[str, str] = {
+    "temperature": "fever",
+    "high_temperature": "fever",
+    "tiredness": "fatigue",
+    "tired": "fatigue",
+    "body_aches": "muscle_aches",
+    "body_pain": "muscle_aches",
+    "myalgia": "muscle_aches",
+    "stuffy_nose": "congestion",
+    "nasal_congestion": "congestion",
+    "blocked_nose": "congestion",
+    "breathlessness": "shortness_of_breath",
+    "difficulty_breathing": "shortness_of_breath",
+    "short_of_breath": "shortness_of_breath",
+    "stomach_ache": "abdominal_pain",
+    "stomach_pain": "abdominal_pain",
+    "belly_pain": "abdominal_pain",
+    "throwing_up": "vomiting",
+    "dysuria": "painful_urination",
+    "burning_urination": "painful_urination",
+    "photophobia": "light_sensitivity",
+    "headaches": "headache",
+}
+
+
+def normalize_symptom(name: str) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_")
+    return SYMPTOM_ALIASES.get(key, key)
+
+
+@dataclass
+class Condition:
+    name: str
+    prior: float
+    min_age: float
+    max_age: float
+    gender: str
+    recommended_action: str
+
+
+class SymptomKnowledgeBase:
+    """The knowledge table compiled into integer ids and flat arrays."""
+
+    def __init__(self, conditions: List[Condition], links: Sequence[Tuple[str, str, float]]):
+        self.conditions = conditions
+        condition_index = {condition.name: i for i, condition in enumerate(conditions)}
+
+        self.symptoms = sorted({normalize_symptom(symptom) for _, symptom, _ in links})
+        self.symptom_index = {symptom: i for i, symptom in enumerate(self.symptoms)}
+
+        condition_ids = np.array([condition_index[name] for name, _, _ in links], dtype=np.int64)
+        symptom_ids = np.array([self.symptom_index[normalize_symptom(s)] for _, s, _ in links], dtype=np.int64)
+        weights = np.array([weight for _, _, weight in links], dtype=np.float64)
+
+        # Columns per symptom: postings[offsets[s]:offsets[s + 1]]
+        order = np.argsort(symptom_ids, kind="stable")
+        self.offsets = np.zeros(len(self.symptoms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(symptom_ids, minlength=len(self.symptoms)), out=self.offsets[1:])
+        self.posting_conditions = condition_ids[order]
+        self.posting_weights = weights[order]
+
+        self.condition_weight = np.bincount(condition_ids, weights=weights, minlength=len(conditions))
+        self.condition_symptoms = [set() for _ in conditions]
+        for condition_id, symptom_id in zip(condition_ids.tolist(), symptom_ids.tolist()):
+            self.condition_symptoms[condition_id].add(symptom_id)
+
+        self.prior = np.array([c.prior for c in conditions], dtype=np.float64)
+        self.min_age = np.array([c.min_age for c in conditions], dtype=np.float64)
+        self.max_age = np.array([c.max_age for c in conditions], dtype=np.float64)
+        self.gender = np.array([GENDERS.index(c.gender) for c in conditions], dtype=np.int64)
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None) -> "SymptomKnowledgeBase":
+        directory = Path(directory or DEFAULT_KNOWLEDGE_DIR)
+
+        with open(directory / "conditions.csv", newline="", encoding="utf-8") as table:
+            conditions = [
+                Condition(
+                    name=row["condition"],
+                    prior=float(row["prior"]),
+                    min_age=float(row.get("min_age") or 0),
+                    max_age=float(row.get("max_age") or 200),
+                    gender=(row.get("gender") or "any").lower(),
+                    recommended_action=row.get("recommended_action") or DEFAULT_ACTION,
+                )
+                for row in csv.DictReader(table)
+            ]
+
+        with open(directory / "condition_symptoms.csv", newline="", encoding="utf-8") as table:
+            links = [(row["condition"], row["symptom"], float(row["weight"])) for row in csv.DictReader(table)]
+
+        return cls(conditions, links)
+
+
+class SymptomChecker:
+
+    def __init__(self, knowledge: Optional[SymptomKnowledgeBase] = None):
+        self.knowledge = knowledge or SymptomKnowledgeBase.load(settings.SYMPTOM_KNOWLEDGE_DIR)
+        self._prior = self.knowledge.prior ** PRIOR_EXPONENT
+
+    def encode(self, symptoms: Sequence[str]) -> Tuple[List[int], List[str]]:
+        """Symptom ids (deduplicated) and the symptoms not in the table."""
+        ids, unknown = [], []
+
+        for symptom in symptoms:
+            symptom_id = self.knowledge.symptom_index.get(normalize_symptom(symptom))
+            if symptom_id is None:
+                unknown.append(symptom)
+            elif symptom_id not in ids:
+                ids.append(symptom_id)
+
+        return ids, unknown
+
+    def _score(self, encoded: List[List[int]], ages: np.ndarray, genders: np.ndarray):
+        """Non-zero ranking scores as parallel (query row, condition id, score) arrays."""
+        kb = self.knowledge
+        conditions = len(kb.conditions)
+
+        # Every (query, condition, weight) posting reached by a query symptom
+        sizes = np.array([len(ids) for ids in encoded], dtype=np.int64)
+        flat = np.fromiter(chain.from_iterable(encoded), dtype=np.int64, count=int(sizes.sum()))
+        starts, ends = kb.offsets[flat], kb.offsets[flat + 1]
+        lengths = ends - starts
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        rows = np.repeat(np.repeat(np.arange(len(encoded)), sizes), lengths)
+
+        # Sum weights per (query, condition) pair; only pairs that overlap exist
+        pairs, inverse = np.unique(rows * conditions + kb.posting_conditions[positions], return_inverse=True)
+        matched = np.bincount(inverse, weights=kb.posting_weights[positions])
+        rows, condition_ids = np.divmod(pairs, conditions)
+
+        overlap = matched / np.sqrt(np.maximum(sizes[rows], 1) * np.maximum(kb.condition_weight[condition_ids], 1e-12))
+
+        # Priors: damped, cut for an unusual age, zero for the wrong gender
+        age, gender, condition_gender = ages[rows], genders[rows], kb.gender[condition_ids]
+        with np.errstate(invalid="ignore"):
+            age_ok = np.isnan(age) | ((age >= kb.min_age[condition_ids]) & (age < kb.max_age[condition_ids]))
+        gender_ok = (condition_gender == 0) | (gender == 0) | (condition_gender == gender)
+
+        scores = overlap * self._prior[condition_ids] * np.where(age_ok, 1.0, AGE_MISMATCH_FACTOR) * gender_ok
+
+        return rows, condition_ids, scores
+
+    def predict_batch(self, queries: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank conditions for many queries ({"symptoms", "age", "gender"}).
+        Probabilities are each condition's share of the query's total score.
+        """
+        kb = self.knowledge
+        if not queries:
+            return []
+
+        encoded, unknown = zip(*[self.encode(query.get("symptoms") or []) for query in queries])
+        ages = np.array(
+            [np.nan if query.get("age") is None else float(query["age"]) for query in queries],
+            dtype=np.float64,
+        )
+        genders = np.array([gender_code(query.get("gender")) for query in queries], dtype=np.int64)
+
+        rows, condition_ids, scores = self._score(list(encoded), ages, genders)
+        positive = scores > 0
+        rows, condition_ids, scores = rows[positive], condition_ids[positive], scores[positive]
+        totals = np.bincount(rows, weights=scores, minlength=len(queries)).tolist()
+
+        # Best first within each query, then keep the first top_k of each
+        order = np.lexsort((-scores, rows))
+        rows, condition_ids, scores = rows[order], condition_ids[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        keep = rank < top_k
+
+        predictions: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        query_ids = [set(ids) for ids in encoded]
+
+        for row, condition_id, score in zip(rows[keep].tolist(), condition_ids[keep].tolist(), scores[keep].tolist()):
+            condition = kb.conditions[condition_id]
+            matched = sorted(kb.symptoms[s] for s in kb.condition_symptoms[condition_id] & query_ids[row])
+
+            predictions[row].append({
+                "condition": condition.name,
+                "probability": round(score / totals[row], 4),
+                "score": round(score, 6),
+                "matched_symptoms": matched,
+                "recommended_action": condition.recommended_action,
+            })
+
+        return [
+            {"predictions": predictions[row], "unrecognized_symptoms": list(unknown[row])}
+            for row in range(len(queries))
+        ]
+
+    def predict(
+        self,
+        symptoms: Sequence[str],
+        age: Optional[float] = None,
+        gender: Optional[str] = None,
+        top_k: int = 5,
+    ) -> Dict[str, Any]:
+        return self.predict_batch([{"symptoms": symptoms, "age": age, "gender": gender}], top_k)[0]
+
+
+_checker: Optional[SymptomChecker] = None
+
+
+def get_symptom_checker() -> SymptomChecker:
+    global _checker
+
+    if _checker is None:
+        _checker = SymptomChecker()
+
+    return _checker
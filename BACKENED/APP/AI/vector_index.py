@@ -0,0 +1,342 @@
+# vector_index.py
+
+"""
+On-disk vector index for RAG retrieval.
+
+Every ingest writes a new build next to the live one and then repoints
+CURRENT at it, so readers never see a half-written index. Readers map
+their build's files once; on POSIX an old build stays readable after it
+is deleted, elsewhere a build still mapped is left behind and removed by
+a later ingest.
+
+    CURRENT            name of the live build directory
+    <build_id>/
+
+Build layout:
+
+    manifest.json      build id, embedder name, dimension, row and list counts
+    vectors.npy        float32 (rows x dim), grouped by IVF list, memory-mapped
+    row_ids.npy        chunk id of every row in vectors.npy
+    ivf_centroids.npy  float32 (lists x dim), only when partitioned
+    ivf_offsets.npy    start row of every list, plus the end (lists + 1)
+    chunks.jsonl       one chunk per line: document_name, page_number, text
+    chunk_offsets.npy  byte offset of each line in chunks.jsonl
+
+Vectors are unit length, so scores are cosine similarities.
+"""
+
+import json
+import math
+import mmap
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.logger import get_logger
+from .document_loader import DocumentChunk
+
+
+logger = get_logger(__name__)
+
+SCAN_BATCH_ROWS = 65536
+
+CURRENT_FILE = "CURRENT"
+
+
+def resolve_build(directory: str) -> Optional[Path]:
+    """The live build under `directory`, or None when nothing is indexed yet."""
+    directory = Path(directory)
+
+    try:
+        name = (directory / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        # Flat layout written before builds were versioned
+        return directory if (directory / "manifest.json").is_file() else None
+
+    return directory / name
+
+
+# =========================
+# Top-k helpers
+# =========================
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if len(scores) <= k:
+        return np.argsort(-scores)
+
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+# =========================
+# IVF training
+# =========================
+
+def train_ivf(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 10,
+    sample_per_list: int = 32,
+    seed: int = 0,
+) -> np.ndarray:
+    """Spherical k-means on a sample of rows; returns unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=nlist)
+
+        # Re-seed empty lists from random sample rows
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+
+    return centroids.astype(np.float32)
+
+
+def assign_ivf(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int32)
+
+    for start in range(0, len(vectors), SCAN_BATCH_ROWS):
+        block = np.asarray(vectors[start:start + SCAN_BATCH_ROWS])
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+    return assignment
+
+
+def default_nlist(rows: int) -> int:
+    """No partitioning for small corpora; about sqrt(rows) lists otherwise."""
+    if rows < settings.RAG_IVF_MIN_ROWS:
+        return 0
+    return max(1, int(math.sqrt(rows)))
+
+
+# =========================
+# Writer
+# =========================
+
+class VectorIndexWriter:
+    """
+    Builds an index in `<directory>/<build_id>.building` and on `finish()`
+    renames it to `<build_id>` and points CURRENT at it.
+    """
+
+    def __init__(self, directory: str, embedder_name: str, dim: int):
+        self.directory = Path(directory)
+        self.build_id = f"{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.staging = self.directory / f"{self.build_id}.building"
+        self.embedder_name = embedder_name
+        self.dim = dim
+        self.rows = 0
+
+        self.staging.mkdir(parents=True)
+
+        self._vectors = open(self.staging / "vectors.f32", "wb")
+        self._chunks = open(self.staging / "chunks.jsonl", "wb")
+        self._chunk_offsets: List[int] = []
+
+    def add(self, vectors: np.ndarray, chunks: List[DocumentChunk]):
+        if vectors.shape != (len(chunks), self.dim):
+            raise ValueError(f"Expected {len(chunks)} x {self.dim} vectors, got {vectors.shape}")
+
+        self._vectors.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+        for chunk in chunks:
+            self._chunk_offsets.append(self._chunks.tell())
+            line = json.dumps({
+                "document_name": chunk.document_name,
+                "page_number": chunk.page_number,
+                "text": chunk.text,
+            }, ensure_ascii=False)
+            self._chunks.write(line.encode() + b"\n")
+
+        self.rows += len(chunks)
+
+    def finish(self, nlist: Optional[int] = None) -> Path:
+        self._vectors.close()
+        self._chunks.close()
+
+        staging = self.staging
+        np.save(staging / "chunk_offsets.npy", np.asarray(self._chunk_offsets, dtype=np.int64))
+
+        raw = np.memmap(staging / "vectors.f32", dtype=np.float32, mode="r", shape=(self.rows, self.dim)) \
+            if self.rows else np.zeros((0, self.dim), dtype=np.float32)
+
+        nlist = default_nlist(self.rows) if nlist is None else min(nlist, self.rows)
+
+        if nlist:
+            centroids = train_ivf(raw, nlist)
+            assignment = assign_ivf(raw, centroids)
+            order = np.argsort(assignment, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+
+            np.save(staging / "ivf_centroids.npy", centroids)
+            np.save(staging / "ivf_offsets.npy", offsets)
+        else:
+            order = np.arange(self.rows)
+
+        # Rows are stored grouped by list so each probe reads one contiguous slice
+        vectors = np.lib.format.open_memmap(
+            staging / "vectors.npy", mode="w+", dtype=np.float32, shape=(self.rows, self.dim)
+        )
+        for start in range(0, self.rows, SCAN_BATCH_ROWS):
+            rows = order[start:start + SCAN_BATCH_ROWS]
+            vectors[start:start + len(rows)] = raw[rows]
+        vectors.flush()
+        del vectors, raw
+
+        np.save(staging / "row_ids.npy", order.astype(np.int64))
+        os.remove(staging / "vectors.f32")
+
+        with open(staging / "manifest.json", "w") as manifest:
+            json.dump({
+                "build_id": self.build_id,
+                "embedder": self.embedder_name,
+                "dim": self.dim,
+                "rows": self.rows,
+                "nlist": nlist,
+            }, manifest, indent=2)
+
+        # Nothing has this build open yet, so the rename works on every platform
+        build = self.directory / self.build_id
+        staging.rename(build)
+
+        pointer = self.directory / f"{CURRENT_FILE}.tmp"
+        pointer.write_text(self.build_id)
+        os.replace(pointer, self.directory / CURRENT_FILE)
+
+        self._remove_old_builds(build)
+
+        logger.info(f"Vector index written to {build}: {self.rows} chunks, {nlist} lists")
+
+        return build
+
+    def _remove_old_builds(self, keep: Path):
+        for entry in self.directory.iterdir():
+            if entry == keep or entry.name == CURRENT_FILE:
+                continue
+
+            try:
+                if entry.is_dir():
+                    shutil.rmtree(entry)
+                else:
+                    entry.unlink()
+            except OSError as e:
+                # Windows will not delete files a running server still maps
+                logger.warning(f"Could not remove old index build {entry}: {e}")
+
+
+# =========================
+# Reader
+# =========================
+
+class VectorIndex:
+
+    def __init__(self, directory: str):
+        self.directory = resolve_build(directory) or Path(directory)
+
+        with open(self.directory / "manifest.json") as manifest:
+            self.manifest = json.load(manifest)
+
+        self.build_id = self.manifest.get("build_id")
+        self.dim = self.manifest["dim"]
+        self.rows = self.manifest["rows"]
+        self.nlist = self.manifest.get("nlist", 0)
+
+        # Memory-mapped: pages are read on demand and shared between workers
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        self.row_ids = np.load(self.directory / "row_ids.npy", mmap_mode="r")
+        self.chunk_offsets = np.load(self.directory / "chunk_offsets.npy", mmap_mode="r")
+
+        # Mapped once rather than reopened per lookup, so the chunks match
+        # these offsets even after a newer build replaces the directory
+        self._chunks = None
+        if self.rows:
+            with open(self.directory / "chunks.jsonl", "rb") as chunks:
+                self._chunks = mmap.mmap(chunks.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.nlist:
+            self.centroids = np.load(self.directory / "ivf_centroids.npy")
+            self.list_offsets = np.load(self.directory / "ivf_offsets.npy")
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        build = resolve_build(directory)
+        return build is not None and (build / "manifest.json").is_file()
+
+    def _search_rows(self, query: np.ndarray, k: int, spans: Iterable[Tuple[int, int]]):
+        # Keep each block's local top-k and rank the candidates once at the end
+        candidate_rows, candidate_scores = [], []
+
+        for span_start, span_end in spans:
+            for start in range(span_start, span_end, SCAN_BATCH_ROWS):
+                end = min(start + SCAN_BATCH_ROWS, span_end)
+                scores = self.vectors[start:end] @ query
+                top = _top_k(scores, k) if len(scores) > k else np.arange(len(scores))
+                candidate_rows.append(top + start)
+                candidate_scores.append(scores[top])
+
+        if not candidate_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+        keep = _top_k(scores, k)
+
+        return rows[keep], scores[keep]
+
+    def search_brute_force(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        rows, scores = self._search_rows(query, k, [(0, self.rows)])
+        return [(int(self.row_ids[row]), float(score)) for row, score in zip(rows, scores)]
+
+    def search_ivf(self, query: np.ndarray, k: int, nprobe: int = settings.RAG_IVF_NPROBE) -> List[Tuple[int, float]]:
+        if not self.nlist:
+            return self.search_brute_force(query, k)
+
+        probes = _top_k(self.centroids @ query, min(nprobe, self.nlist))
+        spans = [(int(self.list_offsets[p]), int(self.list_offsets[p + 1])) for p in np.sort(probes)]
+
+        rows, scores = self._search_rows(query, k, spans)
+        return [(int(self.row_ids[row]), float(score)) for row, score in zip(rows, scores)]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = settings.RAG_TOP_K,
+        mode: str = settings.RAG_SEARCH_MODE,
+        nprobe: int = settings.RAG_IVF_NPROBE,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k (chunk_id, score) pairs.
+        `mode` is "brute", "ivf" or "auto" (IVF whenever the index is partitioned).
+        """
+        query = np.asarray(query, dtype=np.float32)
+
+        if mode == "brute" or (mode == "auto" and not self.nlist):
+            return self.search_brute_force(query, k)
+        if mode in ("ivf", "auto"):
+            return self.search_ivf(query, k, nprobe)
+
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    def get_chunk(self, chunk_id: int) -> DocumentChunk:
+        start = int(self.chunk_offsets[chunk_id])
+        end = self._chunks.find(b"\n", start)
+        return DocumentChunk(**json.loads(self._chunks[start:end if end >= 0 else None]))
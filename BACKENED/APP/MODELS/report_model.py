@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 from bson import ObjectId
 from app.database import report_collection  # Make sure your database.py exports this collection
 
@@ -16,6 +16,7 @@ class Report(BaseModel):
     findings: Optional[str] = None
     recommendations: Optional[str] = None
     date: Optional[str] = None  # YYYY-MM-DD
+    lab_values: Optional[Dict[str, float]] = None  # e.g. {"hemoglobin": 13.2}, feeds lab drift detection
     file_url: Optional[str] = None  # URL if report is uploaded as file
 
 
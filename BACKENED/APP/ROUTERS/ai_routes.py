@@ -1,26 +1,53 @@
+import asyncio
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
-from datetime import datetime
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
 
 from app.schemas.ai_schema import (
     AIChatRequest,
     AIChatResponse,
+    AIStreamChunk,
     ReportSummaryRequest,
     ReportSummaryResponse,
     PrescriptionExplanationRequest,
     PrescriptionExplanationResponse,
     AnomalyDetectionRequest,
     AnomalyDetectionResponse,
+    BatchAnomalyRequest,
+    BatchAnomalyResponse,
+    PatientLabTrendResponse,
+    SymptomPredictionRequest,
+    SymptomPredictionResponse,
+    BatchSymptomPredictionRequest,
+    BatchSymptomPredictionResponse,
     AnalyticsAIRequest,
     AnalyticsAIResponse,
-    AIResponseType,
+    RAGQueryRequest,
+    RAGQueryResponse,
 )
 
 from app.AI.anomaly_detector import AnomalyDetectionService
+from app.AI.lab_trends import LabTrendTracker
 from app.AI.memory import AIMemoryStore
+from app.AI.medical_assitant import MedicalAssistantService
+from app.AI.report_summarizer import ReportSummarizerService
+from app.AI.prescription import PrescriptionService
+from app.AI.rag_engine import RAGEngine
+from app.AI.symptom_checker import DEFAULT_ACTION, UNKNOWN_CONDITION, get_symptom_checker
+from app.AI.llm_provider import LLMError, get_llm_client
+from app.services.patient_service import get_patient_demographics_async
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
+# One instance per process: they all share the same LLM client
+assistant_service = MedicalAssistantService()
+summarizer_service = ReportSummarizerService()
+prescription_ai_service = PrescriptionService()
+rag_engine = RAGEngine()
+anomaly_service = AnomalyDetectionService()
+lab_trend_tracker = LabTrendTracker()
+
 
 # ===============================
 # 🤖 AI CHAT
@@ -28,21 +55,10 @@ router = APIRouter(prefix="/ai", tags=["AI"])
 @router.post("/chat", response_model=AIChatResponse)
 async def chat_with_ai(payload: AIChatRequest):
     try:
-        # Placeholder for AI processing
-        result = {
-            "response": f"Response to: {payload.message}",
-            "sources": [],
-            "confidence_score": 0.85
-        }
-
-        return AIChatResponse(
-            response=result["response"],
-            response_type=AIResponseType.chat,
-            sources=result.get("sources"),
-            confidence_score=result.get("confidence_score"),
-            timestamp=datetime.utcnow().isoformat(),
-        )
+        return await assistant_service.chat(payload)
 
+    except LLMError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -50,24 +66,59 @@ async def chat_with_ai(payload: AIChatRequest):
         )
 
 
+# ===============================
+# 📡 AI CHAT (STREAMING)
+# ===============================
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+async def _sse_frames(payload: AIChatRequest):
+    """Encode each AIStreamChunk as one server-sent event."""
+    try:
+        async for chunk in assistant_service.chat_stream(payload):
+            yield f"data: {chunk.json()}\n\n"
+
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band and close
+        error = AIStreamChunk(chunk="", done=True)
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        yield f"data: {error.json()}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_with_ai_stream(payload: AIChatRequest):
+    return StreamingResponse(
+        _sse_frames(payload),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ===============================
+# 📈 AI METRICS
+# ===============================
+@router.get("/metrics", response_model=Dict[str, Any])
+async def ai_metrics():
+    llm = get_llm_client()
+
+    return {
+        "llm": llm.stats,
+        "response_cache": {**llm.cache.stats, "entries": len(llm.cache)},
+        "chat_context": assistant_service.context_builder.stats,
+        "safety": {**assistant_service.safety.stats, "terms": assistant_service.safety.term_count},
+    }
+
+
 # ===============================
 # 📄 REPORT SUMMARY
 # ===============================
 @router.post("/summarize-report", response_model=ReportSummaryResponse)
 async def summarize_lab_report(payload: ReportSummaryRequest):
     try:
-        result = {
-            "summary": f"Summary of report",
-            "key_findings": [],
-            "risk_level": "normal"
-        }
-
-        return ReportSummaryResponse(
-            summary=result["summary"],
-            key_findings=result.get("key_findings"),
-            risk_level=result.get("risk_level"),
-        )
+        return await summarizer_service.summarize(payload)
 
+    except LLMError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -78,18 +129,25 @@ async def summarize_lab_report(payload: ReportSummaryRequest):
 @router.post("/explain-prescription", response_model=PrescriptionExplanationResponse)
 async def explain_rx(payload: PrescriptionExplanationRequest):
     try:
-        result = {
-            "explanation": f"Explanation of prescription",
-            "warnings": [],
-            "side_effects": []
-        }
+        return await prescription_ai_service.explain(payload)
 
-        return PrescriptionExplanationResponse(
-            explanation=result["explanation"],
-            warnings=result.get("warnings"),
-            side_effects=result.get("side_effects"),
-        )
+    except LLMError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ===============================
+# 📚 GUIDELINE SEARCH (RAG)
+# ===============================
+@router.post("/rag/query", response_model=RAGQueryResponse)
+async def rag_query(payload: RAGQueryRequest):
+    try:
+        answer, sources = await rag_engine.query(payload.question, payload.top_k)
+        return RAGQueryResponse(answer=answer, sources=sources)
 
+    except LLMError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -100,13 +158,38 @@ async def explain_rx(payload: PrescriptionExplanationRequest):
 @router.post("/detect-anomaly", response_model=AnomalyDetectionResponse)
 async def anomaly_detection(payload: AnomalyDetectionRequest):
     try:
-        service = AnomalyDetectionService()
-        result = service.detect_anomaly(payload.data)
+        return anomaly_service.detect(payload)
 
-        return AnomalyDetectionResponse(
-            anomaly_detected=result.get("anomaly_detected", False),
-            confidence_score=result.get("confidence_score", 0.0),
-            details=result.get("details", ""),
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/detect-anomaly/batch", response_model=BatchAnomalyResponse)
+async def batch_anomaly_detection(payload: BatchAnomalyRequest):
+    """
+    Evaluate many lab panels against age/gender-specific reference ranges.
+    Missing age or gender is filled in from the patient record.
+    """
+    try:
+        panels = [panel.dict() for panel in payload.panels]
+
+        lookup = [p["patient_id"] for p in panels if p["patient_id"] and (p["age"] is None or p["gender"] is None)]
+        demographics = await get_patient_demographics_async(lookup) if lookup else {}
+
+        for panel in panels:
+            known = demographics.get(panel["patient_id"], {})
+            if panel["age"] is None:
+                panel["age"] = known.get("age")
+            if panel["gender"] is None:
+                panel["gender"] = known.get("gender")
+
+        # One vectorised pass; CPU-bound, so keep it off the event loop
+        results = await asyncio.to_thread(anomaly_service.evaluate_batch, panels)
+
+        return BatchAnomalyResponse(
+            evaluated=len(results),
+            flagged=sum(result["anomaly_detected"] for result in results),
+            results=results,
         )
 
     except Exception as e:
@@ -139,32 +222,37 @@ async def analytics_ai(payload: AnalyticsAIRequest):
 # ===============================
 # 🏥 PREDICT DISEASE
 # ===============================
-@router.post("/predict", response_model=Dict[str, Any])
-async def predict_disease(data: Dict[str, Any]):
+def _prediction_response(result: Dict[str, Any]) -> SymptomPredictionResponse:
+    # The top condition doubles as the legacy single-answer fields
+    top = result["predictions"][0] if result["predictions"] else None
+
+    return SymptomPredictionResponse(
+        probable_disease=top["condition"] if top else UNKNOWN_CONDITION,
+        confidence=top["probability"] if top else 0.0,
+        recommended_action=top["recommended_action"] if top else DEFAULT_ACTION,
+        **result,
+    )
+
+
+@router.post("/predict", response_model=SymptomPredictionResponse)
+async def predict_disease(payload: SymptomPredictionRequest):
     try:
-        symptoms = data.get("symptoms", [])
-        age = data.get("age")
-        gender = data.get("gender")
-        
-        # Simple disease prediction based on symptoms
-        if "fever" in symptoms and "cough" in symptoms:
-            probable_disease = "Flu"
-            confidence = 0.85
-            recommended_action = "Take rest, drink fluids, and consult a doctor if severe."
-        elif "headache" in symptoms:
-            probable_disease = "Migraine"
-            confidence = 0.75
-            recommended_action = "Avoid bright lights, rest, and take prescribed medication."
-        else:
-            probable_disease = "Unknown"
-            confidence = 0.50
-            recommended_action = "Consult a doctor for proper diagnosis."
-        
-        return {
-            "probable_disease": probable_disease,
-            "confidence": confidence,
-            "recommended_action": recommended_action
-        }
+        result = get_symptom_checker().predict(payload.symptoms, payload.age, payload.gender, payload.top_k)
+        return _prediction_response(result)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict/batch", response_model=BatchSymptomPredictionResponse)
+async def predict_disease_batch(payload: BatchSymptomPredictionRequest):
+    """Rank conditions for a whole triage queue in one vectorised pass."""
+    try:
+        queries = [query.dict() for query in payload.queries]
+        results = await asyncio.to_thread(get_symptom_checker().predict_batch, queries, payload.top_k)
+
+        return BatchSymptomPredictionResponse(results=[_prediction_response(r) for r in results])
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -214,19 +302,27 @@ async def analyze_report(data: Dict[str, Any]):
 # ===============================
 # 🧬 DETECT ANOMALIES (Patient endpoint)
 # ===============================
-@router.get("/anomaly/{patient_id}", response_model=Dict[str, Any])
+@router.get("/anomaly/{patient_id}", response_model=PatientLabTrendResponse)
 async def detect_patient_anomalies(patient_id: str):
+    """
+    Flag results on the patient's latest report that drift from their own
+    baseline. Only reports newer than the stored checkpoint are replayed.
+    """
     try:
-        service = AnomalyDetectionService()
-        result = service.detect_anomaly({"patient_id": patient_id})
-        
-        return {
-            "patient_id": patient_id,
-            "anomaly_detected": result.get("anomaly_detected", False),
-            "confidence_score": result.get("confidence_score", 0.0),
-            "details": result.get("details", ""),
-            "flagged_parameters": []
-        }
+        return await lab_trend_tracker.analyze_patient_async(patient_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/anomaly/{patient_id}/baseline", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_patient_baseline(patient_id: str):
+    """
+    Drop the patient's stored baselines, e.g. after a report's lab values
+    were corrected. The next analysis replays their full history.
+    """
+    try:
+        await lab_trend_tracker.reset_patient_async(patient_id)
+        return None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
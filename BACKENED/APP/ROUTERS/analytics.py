@@ -3,17 +3,18 @@ Analytics Router
 Handles all analytics and reporting endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
 from typing import Dict, Any, List, Optional
+from datetime import datetime
 
 from app.services.analytics_service import (
-    get_dashboard_overview,
-    get_monthly_appointments,
-    get_monthly_revenue,
-    get_doctor_performance,
-    get_patient_growth,
-    get_outstanding_bills,
-    generate_analytics_summary,
+    get_dashboard_overview_async,
+    get_monthly_appointments_async,
+    get_monthly_revenue_async,
+    get_doctor_performance_async,
+    get_patient_growth_async,
+    get_outstanding_bills_async,
+    generate_analytics_summary_async,
 )
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
@@ -25,7 +26,7 @@ router = APIRouter(prefix="/analytics", tags=["Analytics"])
 @router.get("/dashboard", response_model=Dict[str, Any])
 async def dashboard_overview():
     """Get dashboard overview with key metrics"""
-    data = get_dashboard_overview()
+    data = await get_dashboard_overview_async()
     if not data:
         raise HTTPException(status_code=500, detail="Failed to fetch dashboard data")
     return data
@@ -35,9 +36,12 @@ async def dashboard_overview():
 # 📈 MONTHLY APPOINTMENTS
 # ==================================
 @router.get("/appointments/monthly", response_model=Dict[str, Any])
-async def monthly_appointments():
+async def monthly_appointments(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
     """Get monthly appointment statistics"""
-    data = get_monthly_appointments()
+    data = await get_monthly_appointments_async(start_date=start_date, end_date=end_date)
     if not data:
         raise HTTPException(status_code=500, detail="Failed to fetch appointment data")
     return data
@@ -47,9 +51,12 @@ async def monthly_appointments():
 # 💰 MONTHLY REVENUE
 # ==================================
 @router.get("/revenue/monthly", response_model=Dict[str, Any])
-async def monthly_revenue():
+async def monthly_revenue(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
     """Get monthly revenue statistics"""
-    data = get_monthly_revenue()
+    data = await get_monthly_revenue_async(start_date=start_date, end_date=end_date)
     if not data:
         raise HTTPException(status_code=500, detail="Failed to fetch revenue data")
     return data
@@ -59,9 +66,15 @@ async def monthly_revenue():
 # 👨‍⚕️ DOCTOR PERFORMANCE
 # ==================================
 @router.get("/doctors/performance", response_model=List[Dict[str, Any]])
-async def doctor_performance():
-    """Get doctor performance metrics"""
-    data = get_doctor_performance()
+async def doctor_performance(
+    sort_by: str = "total_appointments",
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """Get doctor performance metrics, optionally only the top N"""
+    try:
+        data = await get_doctor_performance_async(sort_by=sort_by, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not isinstance(data, list):
         raise HTTPException(status_code=500, detail="Failed to fetch doctor performance data")
     return data
@@ -71,9 +84,12 @@ async def doctor_performance():
 # 📊 PATIENT GROWTH
 # ==================================
 @router.get("/patients/growth", response_model=Dict[str, Any])
-async def patient_growth():
+async def patient_growth(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
     """Get patient growth trends"""
-    data = get_patient_growth()
+    data = await get_patient_growth_async(start_date=start_date, end_date=end_date)
     if not data:
         raise HTTPException(status_code=500, detail="Failed to fetch patient growth data")
     return data
@@ -85,7 +101,7 @@ async def patient_growth():
 @router.get("/bills/outstanding", response_model=Dict[str, Any])
 async def outstanding_bills():
     """Get outstanding bills summary"""
-    data = get_outstanding_bills()
+    data = await get_outstanding_bills_async()
     if not data:
         raise HTTPException(status_code=500, detail="Failed to fetch outstanding bills")
     return data
@@ -97,7 +113,7 @@ async def outstanding_bills():
 @router.get("/summary", response_model=Dict[str, Any])
 async def analytics_summary():
     """Generate comprehensive analytics summary"""
-    data = generate_analytics_summary()
+    data = await generate_analytics_summary_async()
     if not data:
         raise HTTPException(status_code=500, detail="Failed to generate analytics summary")
     return data
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 from app.schemas.appointment_schema import (
     AppointmentCreate,
@@ -8,19 +10,26 @@ from app.schemas.appointment_schema import (
     AppointmentResponse,
     AppointmentDetail,
     AppointmentFilter,
-    AppointmentPatientView,
+    AppointmentPage,
+    AppointmentPatientPage,
+    AppointmentSeriesCreate,
+    AppointmentSeriesResult,
 )
 
 from app.services.appointment_service import (
-    create_appointment,
-    get_appointment_by_id,
-    get_all_appointments,
-    update_appointment,
-    delete_appointment,
-    cancel_appointment,
-    get_patient_appointments,
-    get_doctor_appointments,
+    create_appointment_async,
+    create_appointment_series_async,
+    get_appointment_by_id_async,
+    get_all_appointments_async,
+    update_appointment_async,
+    delete_appointment_async,
+    cancel_appointment_async,
+    get_patient_appointments_async,
+    get_doctor_appointments_async,
+    export_appointments,
 )
+from app.services.booking_service import AppointmentChangedError, SlotConflictError
+from app.utils.ndjson import ndjson_stream, export_headers, NDJSON_MEDIA_TYPE
 
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
 
@@ -31,21 +40,46 @@ router = APIRouter(prefix="/appointments", tags=["Appointments"])
 @router.post("/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 async def create(payload: AppointmentCreate):
     try:
-        return create_appointment(payload)
+        return await create_appointment_async(payload)
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ==================================
+# 🔁 CREATE RECURRING SERIES
+# ==================================
+@router.post("/series", response_model=AppointmentSeriesResult, status_code=status.HTTP_201_CREATED)
+async def create_series(payload: AppointmentSeriesCreate):
+    try:
+        result = await create_appointment_series_async(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Nothing booked: report which occurrences clashed
+    if not result["created"]:
+        raise HTTPException(status_code=409, detail=jsonable_encoder({
+            "message": "Doctor already booked for some occurrences; nothing was created",
+            **result,
+        }))
+    return result
+
+
 # ==================================
 # 📌 GET ALL APPOINTMENTS (WITH FILTER)
 # ==================================
-@router.get("/", response_model=List[AppointmentResponse])
+@router.get("/", response_model=AppointmentPage)
 async def get_all(
     doctor_id: Optional[str] = None,
     patient_id: Optional[str] = None,
     status: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
 ):
     try:
         filters = AppointmentFilter(
@@ -55,17 +89,44 @@ async def get_all(
             start_date=start_date,
             end_date=end_date,
         )
-        return get_all_appointments(filters)
+        return await get_all_appointments_async(filters, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================================
+# 📤 EXPORT APPOINTMENTS (NDJSON STREAM)
+# ==================================
+@router.get("/export", response_class=StreamingResponse)
+async def export(
+    doctor_id: Optional[str] = None,
+    patient_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    filters = AppointmentFilter(
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+        status=status,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return StreamingResponse(
+        ndjson_stream(export_appointments(filters)),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=export_headers("appointments.ndjson"),
+    )
+
+
 # ==================================
 # 📌 GET APPOINTMENT BY ID
 # ==================================
 @router.get("/{appointment_id}", response_model=AppointmentDetail)
 async def get_by_id(appointment_id: str):
-    appointment = get_appointment_by_id(appointment_id)
+    appointment = await get_appointment_by_id_async(appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
@@ -76,7 +137,10 @@ async def get_by_id(appointment_id: str):
 # ==================================
 @router.put("/{appointment_id}", response_model=AppointmentResponse)
 async def update(appointment_id: str, payload: AppointmentUpdate):
-    updated = update_appointment(appointment_id, payload)
+    try:
+        updated = await update_appointment_async(appointment_id, payload)
+    except (SlotConflictError, AppointmentChangedError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return updated
@@ -87,7 +151,7 @@ async def update(appointment_id: str, payload: AppointmentUpdate):
 # ==================================
 @router.patch("/{appointment_id}/cancel", response_model=AppointmentResponse)
 async def cancel(appointment_id: str):
-    cancelled = cancel_appointment(appointment_id)
+    cancelled = await cancel_appointment_async(appointment_id)
     if not cancelled:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return cancelled
@@ -98,7 +162,7 @@ async def cancel(appointment_id: str):
 # ==================================
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(appointment_id: str):
-    deleted = delete_appointment(appointment_id)
+    deleted = await delete_appointment_async(appointment_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return None
@@ -107,14 +171,28 @@ async def delete(appointment_id: str):
 # ==================================
 # 👤 PATIENT VIEW
 # ==================================
-@router.get("/patient/{patient_id}", response_model=List[AppointmentPatientView])
-async def patient_view(patient_id: str):
-    return get_patient_appointments(patient_id)
+@router.get("/patient/{patient_id}", response_model=AppointmentPatientPage)
+async def patient_view(
+    patient_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await get_patient_appointments_async(patient_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================================
 # 👨‍⚕️ DOCTOR VIEW
 # ==================================
-@router.get("/doctor/{doctor_id}", response_model=List[AppointmentResponse])
-async def doctor_view(doctor_id: str):
-    return get_doctor_appointments(doctor_id)
\ No newline at end of file
+@router.get("/doctor/{doctor_id}", response_model=AppointmentPage)
+async def doctor_view(
+    doctor_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await get_doctor_appointments_async(doctor_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -15,10 +15,10 @@ from app.schemas.auth_schema import (
 )
 
 from app.services.auth_service import (
-    register_user,
-    login_user,
-    refresh_access,
-    get_user_by_id,
+    register_user_async,
+    login_user_async,
+    refresh_access_async,
+    get_user_by_id_async,
 )
 
 from app.utils.jwt_handler import verify_token
@@ -34,7 +34,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
 async def register(payload: UserRegister):
     try:
-        return register_user(payload)
+        return await register_user_async(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -45,7 +45,7 @@ async def register(payload: UserRegister):
 @router.post("/login", response_model=AuthResponse)
 async def login(payload: UserLogin):
     try:
-        user = login_user(payload)
+        user = await login_user_async(payload)
         return user
     except Exception as e:
         raise HTTPException(
@@ -60,7 +60,7 @@ async def login(payload: UserLogin):
 @router.post("/refresh", response_model=Token)
 async def refresh_token(payload: RefreshTokenRequest):
     try:
-        return refresh_access(payload.refresh_token)
+        return await refresh_access_async(payload.refresh_token)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -74,7 +74,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = get_user_by_id(payload["user_id"])
+    user = await get_user_by_id_async(payload["user_id"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -1,25 +1,29 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
 from datetime import datetime
+from fastapi.responses import StreamingResponse
 
 from app.schemas.billing_schema import (
     BillingCreate,
     BillingUpdate,
     BillingResponse,
+    BillingPage,
     BillingStatsResponse
 )
 
 from app.services.billing_service import (
-    create_bill,
-    get_bill_by_id,
-    get_all_bills,
-    update_bill,
-    delete_bill,
-    mark_bill_paid,
-    refund_bill,
-    get_patient_bills,
-    get_billing_statistics,
+    create_bill_async,
+    get_bill_by_id_async,
+    get_all_bills_async,
+    update_bill_async,
+    delete_bill_async,
+    mark_bill_paid_async,
+    refund_bill_async,
+    get_patient_bills_async,
+    get_billing_statistics_async,
+    export_bills,
 )
+from app.utils.ndjson import ndjson_stream, export_headers, NDJSON_MEDIA_TYPE
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
@@ -30,17 +34,41 @@ router = APIRouter(prefix="/billing", tags=["Billing"])
 @router.post("/", response_model=BillingResponse, status_code=status.HTTP_201_CREATED)
 async def create(payload: BillingCreate):
     try:
-        return create_bill(payload)
+        return await create_bill_async(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ==================================
+# 📤 EXPORT BILLS (NDJSON STREAM)
+# ==================================
+@router.get("/export", response_class=StreamingResponse)
+async def export(
+    patient_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    bills = export_bills(
+        patient_id=patient_id,
+        status=status,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+    return StreamingResponse(
+        ndjson_stream(bills),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=export_headers("billing.ndjson"),
+    )
+
+
 # ==================================
 # 📄 GET BILL BY ID
 # ==================================
 @router.get("/{bill_id}", response_model=BillingResponse)
 async def get_by_id(bill_id: str):
-    bill = get_bill_by_id(bill_id)
+    bill = await get_bill_by_id_async(bill_id)
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
     return bill
@@ -49,20 +77,26 @@ async def get_by_id(bill_id: str):
 # ==================================
 # 📋 GET ALL BILLS (WITH FILTER)
 # ==================================
-@router.get("/", response_model=List[BillingResponse])
+@router.get("/", response_model=BillingPage)
 async def get_all(
     patient_id: Optional[str] = None,
     status: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
 ):
     try:
-        return get_all_bills(
+        return await get_all_bills_async(
             patient_id=patient_id,
             status=status,
             start_date=start_date,
             end_date=end_date,
+            limit=limit,
+            after=after,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -70,9 +104,16 @@ async def get_all(
 # ==================================
 # 👤 GET PATIENT BILLS
 # ==================================
-@router.get("/patient/{patient_id}", response_model=List[BillingResponse])
-async def patient_bills(patient_id: str):
-    return get_patient_bills(patient_id)
+@router.get("/patient/{patient_id}", response_model=BillingPage)
+async def patient_bills(
+    patient_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await get_patient_bills_async(patient_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================================
@@ -80,7 +121,7 @@ async def patient_bills(patient_id: str):
 # ==================================
 @router.put("/{bill_id}", response_model=BillingResponse)
 async def update(bill_id: str, payload: BillingUpdate):
-    updated = update_bill(bill_id, payload)
+    updated = await update_bill_async(bill_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Bill not found")
     return updated
@@ -91,7 +132,7 @@ async def update(bill_id: str, payload: BillingUpdate):
 # ==================================
 @router.patch("/{bill_id}/pay", response_model=BillingResponse)
 async def pay_bill(bill_id: str):
-    paid = mark_bill_paid(bill_id)
+    paid = await mark_bill_paid_async(bill_id)
     if not paid:
         raise HTTPException(status_code=404, detail="Bill not found")
     return paid
@@ -102,7 +143,7 @@ async def pay_bill(bill_id: str):
 # ==================================
 @router.patch("/{bill_id}/refund", response_model=BillingResponse)
 async def refund(bill_id: str):
-    refunded = refund_bill(bill_id)
+    refunded = await refund_bill_async(bill_id)
     if not refunded:
         raise HTTPException(status_code=404, detail="Bill not found")
     return refunded
@@ -113,7 +154,7 @@ async def refund(bill_id: str):
 # ==================================
 @router.delete("/{bill_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(bill_id: str):
-    deleted = delete_bill(bill_id)
+    deleted = await delete_bill_async(bill_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Bill not found")
     return None
@@ -124,4 +165,4 @@ async def delete(bill_id: str):
 # ==================================
 @router.get("/stats/overview", response_model=BillingStatsResponse)
 async def billing_stats():
-    return get_billing_statistics()
\ No newline at end of file
+    return await get_billing_statistics_async()
\ No newline at end of file
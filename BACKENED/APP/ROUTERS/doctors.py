@@ -1,28 +1,34 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
 from typing import List, Optional
+from datetime import datetime, time
 
 from app.schemas.doctor_schema import (
     DoctorCreate,
     DoctorUpdate,
     DoctorResponse,
-    DoctorPublicView,
     DoctorFilter,
+    DoctorPage,
     DoctorAvailability,
     DoctorStats,
     DoctorStatus,
+    DoctorFreeSlots,
+    NextAvailableResponse,
+    OnDutyDoctors,
 )
 
 from app.services.doctor_service import (
-    create_doctor,
-    get_doctor_by_id,
-    get_all_doctors,
-    update_doctor,
-    delete_doctor,
-    update_doctor_status,
-    add_doctor_availability,
-    get_doctor_availability,
-    get_doctor_statistics,
+    create_doctor_async,
+    get_doctor_by_id_async,
+    get_all_doctors_async,
+    update_doctor_async,
+    delete_doctor_async,
+    update_doctor_status_async,
+    add_doctor_availability_async,
+    get_doctor_availability_async,
+    get_doctor_statistics_async,
 )
+from app.services.availability_service import find_on_duty_doctors_async
+from app.services.schedule_service import get_free_slots_async, find_next_available_async
 
 router = APIRouter(prefix="/doctors", tags=["Doctors"])
 
@@ -33,7 +39,7 @@ router = APIRouter(prefix="/doctors", tags=["Doctors"])
 @router.post("/", response_model=DoctorResponse, status_code=status.HTTP_201_CREATED)
 async def create(payload: DoctorCreate):
     try:
-        return create_doctor(payload)
+        return await create_doctor_async(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -41,7 +47,7 @@ async def create(payload: DoctorCreate):
 # ==================================
 # 📋 GET ALL DOCTORS (WITH FILTER)
 # ==================================
-@router.get("/", response_model=List[DoctorPublicView])
+@router.get("/", response_model=DoctorPage)
 async def get_all(
     specialization: Optional[str] = None,
     department: Optional[str] = None,
@@ -49,6 +55,8 @@ async def get_all(
     status: Optional[str] = None,
     min_experience: Optional[int] = None,
     max_fee: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
 ):
     try:
         filters = DoctorFilter(
@@ -59,17 +67,65 @@ async def get_all(
             min_experience=min_experience,
             max_fee=max_fee,
         )
-        return get_all_doctors(filters)
+        return await get_all_doctors_async(filters, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================================
+# ⏭ NEXT AVAILABLE (ANY MATCHING DOCTOR)
+# ==================================
+@router.get("/next-available", response_model=NextAvailableResponse)
+async def next_available(
+    specialization: Optional[str] = None,
+    department: Optional[str] = None,
+    consultation_mode: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    days: int = Query(14, ge=1, le=62),
+    duration: int = Query(30, ge=5, le=480, description="Minutes"),
+    limit: int = Query(10, ge=1, le=100),
+    per_doctor: int = Query(1, ge=1, le=20),
+):
+    try:
+        return await find_next_available_async(
+            specialization=specialization,
+            department=department,
+            consultation_mode=consultation_mode,
+            start=start,
+            days=days,
+            duration_minutes=duration,
+            limit=limit,
+            per_doctor=per_doctor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==================================
+# 🩺 ON DUTY (WEEKLY AVAILABILITY)
+# ==================================
+@router.get("/on-duty", response_model=OnDutyDoctors)
+async def on_duty(
+    day: str = Query(..., description="Day of week, e.g. tuesday or tue"),
+    start: time = Query(...),
+    end: time = Query(...),
+    specialization: Optional[str] = None,
+    department: Optional[str] = None,
+):
+    try:
+        return await find_on_duty_doctors_async(day, start, end, specialization, department)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ==================================
 # 📄 GET DOCTOR BY ID
 # ==================================
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 async def get_by_id(doctor_id: str):
-    doctor = get_doctor_by_id(doctor_id)
+    doctor = await get_doctor_by_id_async(doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return doctor
@@ -80,7 +136,7 @@ async def get_by_id(doctor_id: str):
 # ==================================
 @router.put("/{doctor_id}", response_model=DoctorResponse)
 async def update(doctor_id: str, payload: DoctorUpdate):
-    updated = update_doctor(doctor_id, payload)
+    updated = await update_doctor_async(doctor_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return updated
@@ -91,7 +147,7 @@ async def update(doctor_id: str, payload: DoctorUpdate):
 # ==================================
 @router.patch("/{doctor_id}/status", response_model=DoctorResponse)
 async def update_status(doctor_id: str, status_value: DoctorStatus):
-    updated = update_doctor_status(doctor_id, status_value)
+    updated = await update_doctor_status_async(doctor_id, status_value)
     if not updated:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return updated
@@ -102,7 +158,7 @@ async def update_status(doctor_id: str, status_value: DoctorStatus):
 # ==================================
 @router.delete("/{doctor_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(doctor_id: str):
-    deleted = delete_doctor(doctor_id)
+    deleted = await delete_doctor_async(doctor_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return None
@@ -111,9 +167,16 @@ async def delete(doctor_id: str):
 # ==================================
 # 🕒 ADD DOCTOR AVAILABILITY
 # ==================================
-@router.post("/{doctor_id}/availability", status_code=status.HTTP_201_CREATED)
+@router.post("/{doctor_id}/availability", response_model=DoctorResponse, status_code=status.HTTP_201_CREATED)
 async def add_availability(doctor_id: str, payload: DoctorAvailability):
-    return add_doctor_availability(doctor_id, payload)
+    try:
+        doctor = await add_doctor_availability_async(doctor_id, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return doctor
 
 
 # ==================================
@@ -121,7 +184,27 @@ async def add_availability(doctor_id: str, payload: DoctorAvailability):
 # ==================================
 @router.get("/{doctor_id}/availability", response_model=List[DoctorAvailability])
 async def get_availability(doctor_id: str):
-    return get_doctor_availability(doctor_id)
+    return await get_doctor_availability_async(doctor_id)
+
+
+# ==================================
+# 🟢 FREE SLOTS
+# ==================================
+@router.get("/{doctor_id}/free-slots", response_model=DoctorFreeSlots)
+async def free_slots(
+    doctor_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    duration: int = Query(30, ge=5, le=480, description="Minutes"),
+):
+    try:
+        result = await get_free_slots_async(doctor_id, start, end, duration)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return result
 
 
 # ==================================
@@ -129,4 +212,4 @@ async def get_availability(doctor_id: str):
 # ==================================
 @router.get("/{doctor_id}/stats", response_model=DoctorStats)
 async def doctor_stats(doctor_id: str):
-    return get_doctor_statistics(doctor_id)
\ No newline at end of file
+    return await get_doctor_statistics_async(doctor_id)
\ No newline at end of file
@@ -1,27 +1,30 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
+from fastapi.responses import StreamingResponse
 
 from app.schemas.patient_schema import (
     PatientCreate,
     PatientUpdate,
     PatientResponse,
-    PatientPublicView,
     PatientFilter,
+    PatientPage,
     PatientStats,
     MedicalHistory,
     PatientAIContext,
 )
 
 from app.services.patient_service import (
-    create_patient,
-    get_patient_by_id,
-    get_all_patients,
-    update_patient,
-    delete_patient,
-    get_patient_stats,
-    update_medical_history,
-    get_patient_ai_context,
+    create_patient_async,
+    get_patient_by_id_async,
+    get_all_patients_async,
+    update_patient_async,
+    delete_patient_async,
+    get_patient_stats_async,
+    update_medical_history_async,
+    get_patient_ai_context_async,
+    export_patients,
 )
+from app.utils.ndjson import ndjson_stream, export_headers, NDJSON_MEDIA_TYPE
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
 
@@ -32,7 +35,7 @@ router = APIRouter(prefix="/patients", tags=["Patients"])
 @router.post("/", response_model=PatientResponse, status_code=status.HTTP_201_CREATED)
 async def create(payload: PatientCreate):
     try:
-        return create_patient(payload)
+        return await create_patient_async(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -40,13 +43,15 @@ async def create(payload: PatientCreate):
 # ==================================
 # 📋 GET ALL PATIENTS (WITH FILTER)
 # ==================================
-@router.get("/", response_model=List[PatientPublicView])
+@router.get("/", response_model=PatientPage)
 async def get_all(
     gender: Optional[str] = None,
     blood_group: Optional[str] = None,
     min_age: Optional[int] = None,
     max_age: Optional[int] = None,
     chronic_disease: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
 ):
     try:
         filters = PatientFilter(
@@ -56,17 +61,44 @@ async def get_all(
             max_age=max_age,
             chronic_disease=chronic_disease,
         )
-        return get_all_patients(filters)
+        return await get_all_patients_async(filters, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================================
+# 📤 EXPORT PATIENTS (NDJSON STREAM)
+# ==================================
+@router.get("/export", response_class=StreamingResponse)
+async def export(
+    gender: Optional[str] = None,
+    blood_group: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    chronic_disease: Optional[str] = None,
+):
+    filters = PatientFilter(
+        gender=gender,
+        blood_group=blood_group,
+        min_age=min_age,
+        max_age=max_age,
+        chronic_disease=chronic_disease,
+    )
+    return StreamingResponse(
+        ndjson_stream(export_patients(filters)),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=export_headers("patients.ndjson"),
+    )
+
+
 # ==================================
 # 📄 GET PATIENT BY ID
 # ==================================
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_by_id(patient_id: str):
-    patient = get_patient_by_id(patient_id)
+    patient = await get_patient_by_id_async(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
@@ -77,7 +109,7 @@ async def get_by_id(patient_id: str):
 # ==================================
 @router.put("/{patient_id}", response_model=PatientResponse)
 async def update(patient_id: str, payload: PatientUpdate):
-    updated = update_patient(patient_id, payload)
+    updated = await update_patient_async(patient_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Patient not found")
     return updated
@@ -88,7 +120,7 @@ async def update(patient_id: str, payload: PatientUpdate):
 # ==================================
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(patient_id: str):
-    deleted = delete_patient(patient_id)
+    deleted = await delete_patient_async(patient_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Patient not found")
     return None
@@ -99,7 +131,7 @@ async def delete(patient_id: str):
 # ==================================
 @router.get("/{patient_id}/stats", response_model=PatientStats)
 async def stats(patient_id: str):
-    return get_patient_stats(patient_id)
+    return await get_patient_stats_async(patient_id)
 
 
 # ==================================
@@ -107,7 +139,7 @@ async def stats(patient_id: str):
 # ==================================
 @router.put("/{patient_id}/medical-history", response_model=PatientResponse)
 async def update_history(patient_id: str, payload: MedicalHistory):
-    updated = update_medical_history(patient_id, payload)
+    updated = await update_medical_history_async(patient_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Patient not found")
     return updated
@@ -118,7 +150,7 @@ async def update_history(patient_id: str, payload: MedicalHistory):
 # ==================================
 @router.get("/{patient_id}/ai-context", response_model=PatientAIContext)
 async def ai_context(patient_id: str):
-    context = get_patient_ai_context(patient_id)
+    context = await get_patient_ai_context_async(patient_id)
     if not context:
         raise HTTPException(status_code=404, detail="Patient not found")
     return context
\ No newline at end of file
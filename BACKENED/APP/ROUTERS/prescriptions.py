@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
+from datetime import date
+from fastapi.responses import StreamingResponse
 
 from app.schemas.prescription_schema import (
     PrescriptionCreate,
     PrescriptionUpdate,
     PrescriptionResponse,
     PrescriptionMedicine,
+    PrescriptionPage,
+    InteractionCheckRequest,
+    InteractionCheckResponse,
+    InteractionAuditResponse,
 )
 
 from app.schemas.ai_schema import (
@@ -14,15 +20,22 @@ from app.schemas.ai_schema import (
 )
 
 from app.services.prescription_service import (
-    create_prescription,
-    get_prescription_by_id,
-    get_patient_prescriptions,
-    get_doctor_prescriptions,
-    update_prescription,
-    delete_prescription,
-    add_medicine_to_prescription,
-   
+    create_prescription_async,
+    get_prescription_by_id_async,
+    get_patient_prescriptions_async,
+    get_doctor_prescriptions_async,
+    update_prescription_async,
+    delete_prescription_async,
+    add_medicine_to_prescription_async,
+    export_prescriptions,
+    search_prescriptions_async,
+    export_recall_list,
 )
+from app.services.drug_interaction_service import (
+    check_prescription_interactions_async,
+    audit_active_interactions_async,
+)
+from app.utils.ndjson import ndjson_stream, export_headers, NDJSON_MEDIA_TYPE
 
 
 
@@ -35,17 +48,107 @@ router = APIRouter(prefix="/prescriptions", tags=["Prescriptions"])
 @router.post("/", response_model=PrescriptionResponse, status_code=status.HTTP_201_CREATED)
 async def create(payload: PrescriptionCreate):
     try:
-        return create_prescription(payload)
+        return await create_prescription_async(payload)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==================================
+# 📤 EXPORT PRESCRIPTIONS (NDJSON STREAM)
+# ==================================
+@router.get("/export", response_class=StreamingResponse)
+async def export(
+    patient_id: Optional[str] = None,
+    doctor_id: Optional[str] = None,
+):
+    return StreamingResponse(
+        ndjson_stream(export_prescriptions(patient_id=patient_id, doctor_id=doctor_id)),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=export_headers("prescriptions.ndjson"),
+    )
+
+
+# ==================================
+# 🔎 SEARCH BY MEDICINE
+# ==================================
+@router.get("/search", response_model=PrescriptionPage)
+async def search(
+    medicine: str = Query(..., min_length=1, description="Medicine name or prefix"),
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    active_only: bool = False,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await search_prescriptions_async(
+            medicine,
+            issued_from=issued_from,
+            issued_to=issued_to,
+            active_only=active_only,
+            limit=limit,
+            after=after,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==================================
+# 📢 RECALL LIST (NDJSON STREAM)
+# ==================================
+@router.get("/recall", response_class=StreamingResponse)
+async def recall(
+    medicine: str = Query(..., min_length=1),
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    active_only: bool = True,
+):
+    try:
+        rows = export_recall_list(medicine, issued_from=issued_from, issued_to=issued_to, active_only=active_only)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        ndjson_stream(rows),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=export_headers("recall.ndjson"),
+    )
+
+
+# ==================================
+# ⚠ CHECK DRUG INTERACTIONS
+# ==================================
+@router.post("/interactions/check", response_model=InteractionCheckResponse)
+async def check_interactions(payload: InteractionCheckRequest):
+    try:
+        warnings = await check_prescription_interactions_async(
+            payload.patient_id,
+            payload.medications,
+            exclude_prescription_id=payload.exclude_prescription_id,
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return {"patient_id": payload.patient_id, "warnings": warnings}
+
+
+# ==================================
+# 🔍 AUDIT ACTIVE PRESCRIPTIONS
+# ==================================
+@router.get("/interactions/audit", response_model=InteractionAuditResponse)
+async def audit_interactions():
+    try:
+        return await audit_active_interactions_async()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 # ==================================
 # 📄 GET PRESCRIPTION BY ID
 # ==================================
 @router.get("/{prescription_id}", response_model=PrescriptionResponse)
 async def get_by_id(prescription_id: str):
-    prescription = get_prescription_by_id(prescription_id)
+    prescription = await get_prescription_by_id_async(prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return prescription
@@ -54,17 +157,31 @@ async def get_by_id(prescription_id: str):
 # ==================================
 # 👤 GET PATIENT PRESCRIPTIONS
 # ==================================
-@router.get("/patient/{patient_id}", response_model=List[PrescriptionResponse])
-async def patient_prescriptions(patient_id: str):
-    return get_patient_prescriptions(patient_id)
+@router.get("/patient/{patient_id}", response_model=PrescriptionPage)
+async def patient_prescriptions(
+    patient_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await get_patient_prescriptions_async(patient_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================================
 # 👨‍⚕️ GET DOCTOR PRESCRIPTIONS
 # ==================================
-@router.get("/doctor/{doctor_id}", response_model=List[PrescriptionResponse])
-async def doctor_prescriptions(doctor_id: str):
-    return get_doctor_prescriptions(doctor_id)
+@router.get("/doctor/{doctor_id}", response_model=PrescriptionPage)
+async def doctor_prescriptions(
+    doctor_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+):
+    try:
+        return await get_doctor_prescriptions_async(doctor_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================================
@@ -72,7 +189,7 @@ async def doctor_prescriptions(doctor_id: str):
 # ==================================
 @router.put("/{prescription_id}", response_model=PrescriptionResponse)
 async def update(prescription_id: str, payload: PrescriptionUpdate):
-    updated = update_prescription(prescription_id, payload)
+    updated = await update_prescription_async(prescription_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return updated
@@ -83,7 +200,7 @@ async def update(prescription_id: str, payload: PrescriptionUpdate):
 # ==================================
 @router.post("/{prescription_id}/add-medicine", response_model=PrescriptionResponse)
 async def add_medicine(prescription_id: str, payload: PrescriptionMedicine):
-    updated = add_medicine_to_prescription(prescription_id, payload)
+    updated = await add_medicine_to_prescription_async(prescription_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return updated
@@ -94,7 +211,7 @@ async def add_medicine(prescription_id: str, payload: PrescriptionMedicine):
 # ==================================
 @router.delete("/{prescription_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(prescription_id: str):
-    deleted = delete_prescription(prescription_id)
+    deleted = await delete_prescription_async(prescription_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Prescription not found")
     return None
@@ -105,7 +222,7 @@ async def delete(prescription_id: str):
 # ==================================
 @router.post("/{prescription_id}/explain", response_model=PrescriptionExplanationResponse)
 async def explain(prescription_id: str):
-    prescription = get_prescription_by_id(prescription_id)
+    prescription = await get_prescription_by_id_async(prescription_id)
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
 
@@ -28,6 +28,7 @@ class AIResponseType(str, Enum):
 class AISafetyMeta(BaseModel):
     restricted_content: bool
     reason: Optional[str] = None
+    categories: Optional[List[str]] = None
 
 
 # =========================
@@ -42,6 +43,15 @@ class AIChatRequest(BaseModel):
     context: Optional[Dict[str, Any]] = None
 
 
+class AITokenUsage(BaseModel):
+    prompt_tokens: int
+    summary_tokens: int = 0
+    history_tokens: int = 0
+    turns_verbatim: int = 0
+    turns_summarized: int = 0
+    token_budget: Optional[int] = None
+
+
 class AIChatResponse(BaseModel):
     response: str
     response_type: AIResponseType
@@ -49,11 +59,14 @@ class AIChatResponse(BaseModel):
     sources: Optional[List[str]] = None
     confidence_score: Optional[float] = None
     timestamp: Optional[str] = None
+    usage: Optional[AITokenUsage] = None
 
 
 class AIStreamChunk(BaseModel):
     chunk: str
     done: bool
+    usage: Optional[AITokenUsage] = None
+    safety: Optional[AISafetyMeta] = None
 
 
 # =========================
@@ -67,6 +80,16 @@ class RAGSource(BaseModel):
     score: float
 
 
+class RAGQueryRequest(BaseModel):
+    question: str = Field(..., min_length=2)
+    top_k: int = Field(5, ge=1, le=50)
+
+
+class RAGQueryResponse(BaseModel):
+    answer: str
+    sources: List[RAGSource]
+
+
 # =========================
 # REPORT SUMMARY
 # =========================
@@ -74,6 +97,8 @@ class RAGSource(BaseModel):
 class ReportSummaryRequest(BaseModel):
     report_text: str
     role: UserRole
+    # Skip the cached answer and ask the model again
+    bypass_cache: bool = False
 
 
 class ReportSummaryResponse(BaseModel):
@@ -89,6 +114,8 @@ class ReportSummaryResponse(BaseModel):
 class PrescriptionExplanationRequest(BaseModel):
     prescription_text: str
     role: UserRole
+    # Skip the cached answer and ask the model again
+    bypass_cache: bool = False
 
 
 class PrescriptionExplanationResponse(BaseModel):
@@ -113,6 +140,104 @@ class AnomalyDetectionResponse(BaseModel):
     explanation: Optional[str] = None
 
 
+class LabPanel(BaseModel):
+    patient_id: Optional[str] = None
+    age: Optional[float] = None
+    gender: Optional[str] = None
+    lab_values: Dict[str, float]
+
+
+class BatchAnomalyRequest(BaseModel):
+    panels: List[LabPanel]
+
+
+class LabFinding(BaseModel):
+    parameter: str
+    analyte: str
+    value: float
+    unit: str
+    reference_low: Optional[float] = None
+    reference_high: Optional[float] = None
+    direction: str
+    severity: str
+
+
+class LabPanelResult(BaseModel):
+    patient_id: Optional[str] = None
+    anomaly_detected: bool
+    severity_level: str
+    findings: List[LabFinding] = []
+    unrecognized_parameters: List[str] = []
+
+
+class BatchAnomalyResponse(BaseModel):
+    evaluated: int
+    flagged: int
+    results: List[LabPanelResult]
+
+
+class LabDriftFinding(BaseModel):
+    parameter: str
+    analyte: str
+    value: float
+    baseline_mean: float
+    baseline_std: float
+    z_score: float
+    direction: str
+    date: Optional[str] = None
+
+
+class PatientLabTrendResponse(BaseModel):
+    patient_id: str
+    anomaly_detected: bool
+    flagged_parameters: List[str] = []
+    findings: List[LabDriftFinding] = []
+    reports_processed: int
+    reports_total: int
+    last_report_date: Optional[str] = None
+    baselines: Dict[str, Dict[str, float]] = {}
+
+
+# =========================
+# SYMPTOM CHECKER
+# =========================
+
+class SymptomQuery(BaseModel):
+    symptoms: List[str]
+    age: Optional[float] = None
+    gender: Optional[str] = None
+
+
+class SymptomPredictionRequest(SymptomQuery):
+    top_k: int = Field(5, ge=1, le=50)
+
+
+class ConditionPrediction(BaseModel):
+    condition: str
+    probability: float
+    score: float
+    matched_symptoms: List[str] = []
+    recommended_action: Optional[str] = None
+
+
+class SymptomPredictionResponse(BaseModel):
+    probable_disease: str
+    confidence: float
+    recommended_action: str
+    predictions: List[ConditionPrediction] = []
+    unrecognized_symptoms: List[str] = []
+
+
+class BatchSymptomPredictionRequest(BaseModel):
+    # top_k is set once for the whole batch
+    queries: List[SymptomQuery]
+    top_k: int = Field(5, ge=1, le=50)
+
+
+class BatchSymptomPredictionResponse(BaseModel):
+    results: List[SymptomPredictionResponse]
+
+
 # =========================
 # ANALYTICS AI
 # =========================
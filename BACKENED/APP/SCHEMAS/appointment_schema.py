@@ -1,7 +1,16 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+
+
+# Length of an appointment when none is given (and for older records)
+DEFAULT_APPOINTMENT_MINUTES = 30
+
+# Most appointments one recurring series may create (two years of weekly visits)
+MAX_SERIES_OCCURRENCES = 104
+
+
 class AppointmentStatus(str, Enum):
     scheduled = "scheduled"
     confirmed = "confirmed"
@@ -24,10 +33,11 @@ class PaymentStatus(str, Enum):
     refunded = "refunded"
 
 class AppointmentBase(BaseModel):
-    patient_id: int
-    doctor_id: int
+    patient_id: str
+    doctor_id: str
     appointment_date: datetime
     appointment_type: AppointmentType
+    duration_minutes: int = Field(DEFAULT_APPOINTMENT_MINUTES, ge=5, le=480)
     reason: Optional[str] = Field(None, max_length=500)
     notes: Optional[str] = None
 
@@ -39,13 +49,40 @@ class AppointmentCreate(AppointmentBase):
 class AppointmentUpdate(BaseModel):
     appointment_date: Optional[datetime]
     appointment_type: Optional[AppointmentType]
+    duration_minutes: Optional[int] = Field(None, ge=5, le=480)
     status: Optional[AppointmentStatus]
     reason: Optional[str]
     notes: Optional[str]
 
 
+class RecurrenceFrequency(str, Enum):
+    daily = "daily"
+    weekly = "weekly"
+
+
+class RecurrenceRule(BaseModel):
+    """RRULE-style recurrence: FREQ, INTERVAL, COUNT or UNTIL, BYDAY."""
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1, le=52)
+    count: Optional[int] = Field(None, ge=1, le=MAX_SERIES_OCCURRENCES)
+    until: Optional[datetime] = None
+    by_weekday: Optional[List[str]] = None  # weekly only, e.g. ["mon", "thu"]
+
+    @validator("until", always=True)
+    def validate_end(cls, v, values):
+        if v is None and values.get("count") is None:
+            raise ValueError("Give count or until")
+        return v
+
+
+class AppointmentSeriesCreate(AppointmentBase):
+    recurrence: RecurrenceRule
+    all_or_nothing: bool = True
+
+
 class AppointmentResponse(AppointmentBase):
-    id: int
+    id: str
+    series_id: Optional[str] = None
     status: AppointmentStatus
     payment_status: PaymentStatus
     created_at: datetime
@@ -55,8 +92,20 @@ class AppointmentResponse(AppointmentBase):
         orm_mode = True
 
 
+class SeriesConflict(BaseModel):
+    appointment_date: datetime
+    slot_start: datetime
+
+
+class AppointmentSeriesResult(BaseModel):
+    series_id: str
+    requested: int
+    created: List[AppointmentResponse]
+    conflicts: List[SeriesConflict]
+
+
 class AppointmentDetail(BaseModel):
-    id: int
+    id: str
     appointment_date: datetime
     appointment_type: AppointmentType
     status: AppointmentStatus
@@ -71,28 +120,38 @@ class AppointmentDetail(BaseModel):
         orm_mode = True
 
 
+class AppointmentPage(BaseModel):
+    items: List[AppointmentResponse]
+    next_cursor: Optional[str] = None
+
+
 class AppointmentFilter(BaseModel):
-    doctor_id: Optional[int]
-    patient_id: Optional[int]
+    doctor_id: Optional[str]
+    patient_id: Optional[str]
     status: Optional[AppointmentStatus]
     start_date: Optional[datetime]
     end_date: Optional[datetime]
 
 
 class AppointmentAIContext(BaseModel):
-    appointment_id: int
-    patient_id: int
-    doctor_id: int
+    appointment_id: str
+    patient_id: str
+    doctor_id: str
     symptoms: Optional[str]
     previous_history: Optional[str]
 
 
 class AppointmentPatientView(BaseModel):
-    id: int
+    id: str
     appointment_date: datetime
     appointment_type: AppointmentType
     status: AppointmentStatus
     doctor_name: str
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class AppointmentPatientPage(BaseModel):
+    items: List[AppointmentPatientView]
+    next_cursor: Optional[str] = None
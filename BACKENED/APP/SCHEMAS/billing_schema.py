@@ -74,6 +74,11 @@ class BillingResponse(BillingBase):
         orm_mode = True
 
 
+class BillingPage(BaseModel):
+    items: List[BillingResponse]
+    next_cursor: Optional[str] = None
+
+
 # ==========================================
 # 📊 BILL FILTER
 # ==========================================
@@ -52,7 +52,7 @@ class DoctorAvailability(BaseModel):
 
 
 class DoctorResponse(DoctorBase):
-    id: int
+    id: str
     license_number: str
     status: DoctorStatus
     created_at: datetime
@@ -65,7 +65,7 @@ class DoctorResponse(DoctorBase):
 
 
 class DoctorPublicView(BaseModel):
-    id: int
+    id: str
     full_name: str
     specialization: str
     department: Optional[str]
@@ -78,6 +78,11 @@ class DoctorPublicView(BaseModel):
 
 
 
+class DoctorPage(BaseModel):
+    items: List[DoctorPublicView]
+    next_cursor: Optional[str] = None
+
+
 class DoctorFilter(BaseModel):
     specialization: Optional[str]
     department: Optional[str]
@@ -86,6 +91,50 @@ class DoctorFilter(BaseModel):
     min_experience: Optional[int]
     max_fee: Optional[float]
 
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class DoctorFreeSlots(BaseModel):
+    doctor_id: str
+    duration_minutes: int
+    slots: List[FreeSlot]
+
+
+class AvailableSlot(BaseModel):
+    doctor_id: str
+    full_name: Optional[str]
+    specialization: Optional[str]
+    department: Optional[str]
+    consultation_fee: Optional[float]
+    consultation_mode: Optional[ConsultationMode]
+    start: datetime
+    end: datetime
+
+
+class NextAvailableResponse(BaseModel):
+    doctors_considered: int
+    duration_minutes: int
+    slots: List[AvailableSlot]
+
+
+class OnDutyDoctor(BaseModel):
+    doctor_id: str
+    full_name: Optional[str]
+    specialization: Optional[str]
+    department: Optional[str]
+    consultation_fee: Optional[float]
+    consultation_mode: Optional[ConsultationMode]
+
+
+class OnDutyDoctors(BaseModel):
+    day_of_week: str
+    start_time: time
+    end_time: time
+    doctors: List[OnDutyDoctor]
+
+
 class DoctorStats(BaseModel):
     doctor_id: int
     total_appointments: int
@@ -90,6 +90,11 @@ class PatientPublicView(BaseModel):
         orm_mode = True
 
 
+class PatientPage(BaseModel):
+    items: List[PatientPublicView]
+    next_cursor: Optional[str] = None
+
+
 class PatientFilter(BaseModel):
     gender: Optional[Gender]
     blood_group: Optional[BloodGroup]
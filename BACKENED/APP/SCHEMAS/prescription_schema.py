@@ -84,6 +84,45 @@ class PrescriptionUpdate(BaseModel):
     notes: Optional[str]
 
 
+# ==========================================
+# ⚠ DRUG INTERACTIONS
+# ==========================================
+
+class InteractionWarning(BaseModel):
+    medicine: str
+    interacts_with: str
+    prescription_id: Optional[str] = None  # None: both are in this prescription
+    severity: str
+    description: str
+
+
+class InteractionCheckRequest(BaseModel):
+    patient_id: str
+    medications: List[str] = Field(..., min_length=1)
+    exclude_prescription_id: Optional[str] = None
+
+
+class InteractionCheckResponse(BaseModel):
+    patient_id: str
+    warnings: List[InteractionWarning]
+
+
+class InteractionAuditFinding(BaseModel):
+    patient_id: str
+    medicine: str
+    prescription_ids: List[str]
+    interacts_with: str
+    interacts_with_prescription_ids: List[str]
+    severity: str
+    description: str
+
+
+class InteractionAuditResponse(BaseModel):
+    scanned_prescriptions: int
+    patients_affected: int
+    interactions: List[InteractionAuditFinding]
+
+
 # ==========================================
 # 📤 PRESCRIPTION RESPONSE
 # ==========================================
@@ -94,11 +133,21 @@ class PrescriptionResponse(PrescriptionBase):
     valid_until: Optional[date]
     created_at: datetime
     updated_at: Optional[datetime]
+    interaction_warnings: List[InteractionWarning] = []
 
     class Config:
         orm_mode = True
 
 
+# ==========================================
+# 📑 PRESCRIPTION PAGE
+# ==========================================
+
+class PrescriptionPage(BaseModel):
+    items: List[PrescriptionResponse]
+    next_cursor: Optional[str] = None
+
+
 # ==========================================
 # 🔍 FILTER PRESCRIPTION
 # ==========================================
@@ -1,83 +1,128 @@
 from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Dict, Any, List
+from itertools import islice
+from typing import Dict, Any, List, Optional
 
-from app.database import db
+from bson import ObjectId
+
+from app.database import db, run_in_db_executor
+from app.services.rollup_service import get_rollup_totals, get_monthly_rollup
 
 
 # ==========================================
 # 📊 OVERALL DASHBOARD SUMMARY
 # ==========================================
 def get_dashboard_overview() -> Dict[str, Any]:
-    total_patients = db.patients.count_documents({})
-    total_doctors = db.doctors.count_documents({})
-    total_appointments = db.appointments.count_documents({})
-    total_revenue = sum(
-        bill.get("total_amount", 0)
-        for bill in db.billing.find({"payment_status": "paid"})
-    )
+    overview = get_rollup_totals({
+        "total_patients": "patients.new",
+        "total_appointments": "appointments.total",
+        "total_revenue": "bills.amount.paid",
+    })
 
     return {
-        "total_patients": total_patients,
-        "total_doctors": total_doctors,
-        "total_appointments": total_appointments,
-        "total_revenue": total_revenue,
+        "total_patients": overview["total_patients"],
+        "total_doctors": db.doctors.count_documents({}),
+        "total_appointments": overview["total_appointments"],
+        "total_revenue": overview["total_revenue"],
     }
 
 
 # ==========================================
 # 📅 MONTHLY APPOINTMENT TREND
 # ==========================================
-def get_monthly_appointments() -> Dict[str, int]:
-    monthly_data = defaultdict(int)
-
-    for appt in db.appointments.find({}):
-        month = appt["appointment_date"].strftime("%Y-%m")
-        monthly_data[month] += 1
-
-    return dict(monthly_data)
+def get_monthly_appointments(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, int]:
+    return get_monthly_rollup("appointments.total", start_date=start_date, end_date=end_date)
 
 
 # ==========================================
 # 💰 MONTHLY REVENUE TREND
 # ==========================================
-def get_monthly_revenue() -> Dict[str, float]:
-    revenue_data = defaultdict(float)
-
-    for bill in db.billing.find({"payment_status": "paid"}):
-        month = bill["created_at"].strftime("%Y-%m")
-        revenue_data[month] += bill.get("total_amount", 0)
-
-    return dict(revenue_data)
+def get_monthly_revenue(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, float]:
+    return get_monthly_rollup("bills.amount.paid", start_date=start_date, end_date=end_date)
 
 
 # ==========================================
 # 👨‍⚕️ DOCTOR PERFORMANCE
 # ==========================================
-def get_doctor_performance() -> List[Dict[str, Any]]:
-    performance = []
-
-    doctors = db.doctors.find({})
-    for doctor in doctors:
-        doctor_id = str(doctor.get("_id", ""))
-
-        total = db.appointments.count_documents({"doctor_id": doctor_id})
-        completed = db.appointments.count_documents(
-            {"doctor_id": doctor_id, "status": "completed"}
-        )
-        cancelled = db.appointments.count_documents(
-            {"doctor_id": doctor_id, "status": "cancelled"}
-        )
-
-        performance.append(
-            {
-                "doctor_id": doctor_id,
-                "doctor_name": doctor.get("full_name", "Unknown"),
-                "total_appointments": total,
-                "completed_appointments": completed,
-                "cancelled_appointments": cancelled,
-            }
-        )
+PERFORMANCE_SORT_FIELDS = (
+    "total_appointments",
+    "completed_appointments",
+    "cancelled_appointments",
+)
+
+
+def _performance_row(doctor_id: str, doctor_name: str, counts: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "doctor_id": doctor_id,
+        "doctor_name": doctor_name,
+        "total_appointments": counts.get("total_appointments", 0),
+        "completed_appointments": counts.get("completed_appointments", 0),
+        "cancelled_appointments": counts.get("cancelled_appointments", 0),
+    }
+
+
+def get_doctor_performance(
+    sort_by: str = "total_appointments",
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Per-doctor appointment counts from a single $group pass over appointments.
+    Rows are sorted by `sort_by` (descending); `limit` returns only the top N.
+    """
+    if sort_by not in PERFORMANCE_SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {', '.join(PERFORMANCE_SORT_FIELDS)}")
+
+    names = {
+        str(doctor["_id"]): doctor.get("full_name", "Unknown")
+        for doctor in db.doctors.find({}, {"full_name": 1})
+    }
+
+    # Appointments pointing at deleted doctors are dropped before $limit,
+    # so they cannot take places in the top N
+    known_ids = list(names) + [ObjectId(d) for d in names if ObjectId.is_valid(d)]
+
+    pipeline = [
+        {"$match": {"doctor_id": {"$in": known_ids}}},
+        {"$group": {
+            "_id": "$doctor_id",
+            "total_appointments": {"$sum": 1},
+            "completed_appointments": {
+                "$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}
+            },
+            "cancelled_appointments": {
+                "$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}
+            },
+        }},
+        {"$sort": {sort_by: -1, "_id": 1}},
+    ]
+
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    counts_by_doctor = {
+        str(row["_id"]): row for row in db.appointments.aggregate(pipeline)
+    }
+
+    performance = [
+        _performance_row(doctor_id, names[doctor_id], counts)
+        for doctor_id, counts in counts_by_doctor.items()
+    ]
+
+    # Doctors with no appointments rank last (all counts are zero)
+    idle_doctors = (
+        _performance_row(doctor_id, name, {})
+        for doctor_id, name in names.items()
+        if doctor_id not in counts_by_doctor
+    )
+    if limit is None:
+        performance.extend(idle_doctors)
+    elif len(performance) < limit:
+        performance.extend(islice(idle_doctors, limit - len(performance)))
 
     return performance
 
@@ -85,14 +130,11 @@ def get_doctor_performance() -> List[Dict[str, Any]]:
 # ==========================================
 # 👥 PATIENT GROWTH ANALYTICS
 # ==========================================
-def get_patient_growth() -> Dict[str, int]:
-    growth_data = defaultdict(int)
-
-    for patient in db.patients.find({}):
-        month = patient["created_at"].strftime("%Y-%m")
-        growth_data[month] += 1
-
-    return dict(growth_data)
+def get_patient_growth(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, int]:
+    return get_monthly_rollup("patients.new", start_date=start_date, end_date=end_date)
 
 
 # ==========================================
@@ -128,4 +170,16 @@ def generate_analytics_summary() -> Dict[str, Any]:
             "Revenue increasing steadily" if len(monthly_revenue) > 3 else "Revenue stable",
             "Appointments growing" if len(monthly_appointments) > 3 else "Appointments stable",
         ],
-    }
\ No newline at end of file
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+get_dashboard_overview_async = run_in_db_executor(get_dashboard_overview)
+get_monthly_appointments_async = run_in_db_executor(get_monthly_appointments)
+get_monthly_revenue_async = run_in_db_executor(get_monthly_revenue)
+get_doctor_performance_async = run_in_db_executor(get_doctor_performance)
+get_patient_growth_async = run_in_db_executor(get_patient_growth)
+get_outstanding_bills_async = run_in_db_executor(get_outstanding_bills)
+generate_analytics_summary_async = run_in_db_executor(generate_analytics_summary)
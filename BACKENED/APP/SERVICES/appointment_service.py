@@ -1,11 +1,31 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
-
-from app.database import db
+from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument
+
+from app.config import settings
+from app.database import db, run_in_db_executor
+from app.services.booking_service import (
+    SLOT_FIELDS,
+    appointment_slots,
+    claim_batch,
+    claim_slots,
+    move_slots,
+    release_batch,
+    release_slots,
+    utc_naive,
+)
+from app.services.rollup_service import record_appointment_change, record_appointments_created
+from app.services.schedule_service import schedule_index, weekday_index
+from app.utils.pagination import paginate
 from app.schemas.appointment_schema import (
     AppointmentCreate,
     AppointmentUpdate,
     AppointmentFilter,
+    AppointmentSeriesCreate,
+    RecurrenceFrequency,
+    RecurrenceRule,
+    MAX_SERIES_OCCURRENCES,
 )
 
 
@@ -14,30 +34,131 @@ from app.schemas.appointment_schema import (
 # ==========================================
 def create_appointment(payload: AppointmentCreate):
 
-    # Check doctor availability (basic example)
-    conflict = db.appointments.find_one({
-        "doctor_id": payload.doctor_id,
-        "appointment_date": payload.appointment_date,
-        "status": {"$in": ["scheduled", "confirmed"]}
-    })
-
-    if conflict:
-        raise Exception("Doctor already booked for this time")
+    appointment_id = ObjectId()
 
     appointment_data = payload.dict()
     appointment_data.update({
+        "_id": appointment_id,
+        "id": str(appointment_id),
         "status": "scheduled",
         "payment_status": "pending",
         "created_at": datetime.utcnow(),
         "updated_at": None
     })
 
-    result = db.appointments.insert_one(appointment_data)
-    appointment_data["id"] = str(result.inserted_id)
+    # Reserve the doctor's slots first; raises SlotConflictError if any is taken
+    claim_slots(payload.doctor_id, appointment_id, appointment_slots(appointment_data))
+
+    try:
+        db.appointments.insert_one(appointment_data)
+    except Exception:
+        release_slots(appointment_id)
+        raise
+
+    record_appointment_change(None, appointment_data)
+    schedule_index.apply_appointment_change(None, appointment_data)
 
     return appointment_data
 
 
+# ==========================================
+# 🔁 RECURRING SERIES
+# ==========================================
+def expand_recurrence(first: datetime, rule: RecurrenceRule) -> List[datetime]:
+    """Occurrence times of `rule` from `first` onwards, first included if it matches."""
+    if rule.frequency == RecurrenceFrequency.weekly:
+        days = sorted({weekday_index(day) for day in rule.by_weekday}) if rule.by_weekday else [first.weekday()]
+        period = first - timedelta(days=first.weekday())
+        step = timedelta(weeks=rule.interval)
+    else:
+        if rule.by_weekday:
+            raise ValueError("by_weekday needs a weekly frequency")
+        days = [0]
+        period = first
+        step = timedelta(days=rule.interval)
+
+    until = utc_naive(rule.until) if rule.until else None
+    limit = rule.count or MAX_SERIES_OCCURRENCES + 1
+    occurrences = []
+
+    while True:
+        for day in days:
+            occurrence = period + timedelta(days=day)
+            if occurrence < first:
+                continue
+            if until and utc_naive(occurrence) > until:
+                return occurrences
+            occurrences.append(occurrence)
+            if len(occurrences) >= limit:
+                if len(occurrences) > MAX_SERIES_OCCURRENCES:
+                    raise ValueError(f"A series may create at most {MAX_SERIES_OCCURRENCES} appointments")
+                return occurrences
+        period += step
+
+
+def create_appointment_series(payload: AppointmentSeriesCreate):
+    """
+    Book every occurrence of a recurring appointment. All slots are checked
+    and claimed as one batch, and the appointments are written with one
+    bulk_write. With all_or_nothing a single conflict books nothing;
+    otherwise the free occurrences are booked and the rest reported.
+    """
+    series_id = str(ObjectId())
+    now = datetime.utcnow()
+
+    base = payload.dict(exclude={"recurrence", "all_or_nothing"})
+    appointments = []
+    for occurrence in expand_recurrence(payload.appointment_date, payload.recurrence):
+        appointment_id = ObjectId()
+        appointments.append({
+            **base,
+            "_id": appointment_id,
+            "id": str(appointment_id),
+            "appointment_date": occurrence,
+            "series_id": series_id,
+            "status": "scheduled",
+            "payment_status": "pending",
+            "created_at": now,
+            "updated_at": None
+        })
+
+    if not appointments:
+        raise ValueError("Recurrence produces no appointments")
+
+    conflicts = claim_batch(
+        payload.doctor_id,
+        {appointment["_id"]: appointment_slots(appointment) for appointment in appointments},
+        all_or_nothing=payload.all_or_nothing,
+    )
+
+    booked = [] if conflicts and payload.all_or_nothing else [
+        appointment for appointment in appointments if appointment["_id"] not in conflicts
+    ]
+
+    if booked:
+        try:
+            db.appointments.bulk_write([InsertOne(appointment) for appointment in booked], ordered=True)
+        except Exception:
+            booked_ids = [appointment["_id"] for appointment in booked]
+            db.appointments.delete_many({"_id": {"$in": booked_ids}})
+            release_batch(payload.doctor_id, booked_ids)
+            raise
+
+        record_appointments_created(booked)
+        for appointment in booked:
+            schedule_index.apply_appointment_change(None, appointment)
+
+    return {
+        "series_id": series_id,
+        "requested": len(appointments),
+        "created": booked,
+        "conflicts": [
+            {"appointment_date": appointment["appointment_date"], "slot_start": conflicts[appointment["_id"]]}
+            for appointment in appointments if appointment["_id"] in conflicts
+        ],
+    }
+
+
 # ==========================================
 # 📌 GET APPOINTMENT BY ID
 # ==========================================
@@ -46,9 +167,9 @@ def get_appointment_by_id(appointment_id: int):
 
 
 # ==========================================
-# 📌 GET ALL APPOINTMENTS WITH FILTER
+# 🔍 APPOINTMENT QUERY BUILDER
 # ==========================================
-def get_all_appointments(filters: AppointmentFilter):
+def _build_appointment_query(filters: AppointmentFilter):
 
     query = {}
 
@@ -67,7 +188,36 @@ def get_all_appointments(filters: AppointmentFilter):
             "$lte": filters.end_date
         }
 
-    return list(db.appointments.find(query))
+    return query
+
+
+# ==========================================
+# 📌 GET ALL APPOINTMENTS WITH FILTER
+# ==========================================
+def get_all_appointments(
+    filters: AppointmentFilter,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
+
+    appointments, next_cursor = paginate(
+        db.appointments, _build_appointment_query(filters),
+        limit=limit, after=after, sort_key="appointment_date"
+    )
+
+    return {"items": appointments, "next_cursor": next_cursor}
+
+
+# ==========================================
+# 📤 EXPORT APPOINTMENTS (STREAMING)
+# ==========================================
+def export_appointments(filters: AppointmentFilter):
+    """Lazy cursor over every matching appointment, fetched in batches"""
+    return (
+        db.appointments.find(_build_appointment_query(filters))
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
 
 
 # ==========================================
@@ -78,15 +228,27 @@ def update_appointment(appointment_id: int, payload: AppointmentUpdate):
     update_data = {k: v for k, v in payload.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
 
-    result = db.appointments.update_one(
-        {"id": appointment_id},
-        {"$set": update_data}
-    )
+    previous = db.appointments.find_one({"id": appointment_id})
 
-    if result.modified_count == 0:
+    if not previous:
         return None
 
-    return db.appointments.find_one({"id": appointment_id})
+    updated = {**previous, **update_data}
+
+    # Only write over the state that was read: a concurrent reschedule that
+    # got there first makes this one fail instead of stranding its slots
+    unchanged = {"_id": previous["_id"], **{field: previous.get(field) for field in SLOT_FIELDS}}
+
+    def write() -> bool:
+        return db.appointments.update_one(unchanged, {"$set": update_data}).matched_count > 0
+
+    # A new time, length or status moves the reserved slots around the write
+    move_slots(previous, updated, write)
+
+    record_appointment_change(previous, updated)
+    schedule_index.apply_appointment_change(previous, updated)
+
+    return updated
 
 
 # ==========================================
@@ -94,18 +256,27 @@ def update_appointment(appointment_id: int, payload: AppointmentUpdate):
 # ==========================================
 def cancel_appointment(appointment_id: int):
 
-    result = db.appointments.update_one(
+    update_data = {
+        "status": "cancelled",
+        "updated_at": datetime.utcnow()
+    }
+
+    previous = db.appointments.find_one_and_update(
         {"id": appointment_id},
-        {"$set": {
-            "status": "cancelled",
-            "updated_at": datetime.utcnow()
-        }}
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
 
-    if result.modified_count == 0:
+    if not previous:
         return None
 
-    return db.appointments.find_one({"id": appointment_id})
+    release_slots(previous["_id"])
+
+    cancelled = {**previous, **update_data}
+    record_appointment_change(previous, cancelled)
+    schedule_index.apply_appointment_change(previous, cancelled)
+
+    return cancelled
 
 
 # ==========================================
@@ -113,21 +284,60 @@ def cancel_appointment(appointment_id: int):
 # ==========================================
 def delete_appointment(appointment_id: int):
 
-    result = db.appointments.delete_one({"id": appointment_id})
-    return result.deleted_count > 0
+    deleted = db.appointments.find_one_and_delete({"id": appointment_id})
+
+    if not deleted:
+        return False
+
+    release_slots(deleted["_id"])
+    record_appointment_change(deleted, None)
+    schedule_index.apply_appointment_change(deleted, None)
+    return True
 
 
 # ==========================================
 # 👤 GET PATIENT APPOINTMENTS
 # ==========================================
-def get_patient_appointments(patient_id: int):
+def get_patient_appointments(
+    patient_id: int,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
+
+    appointments, next_cursor = paginate(
+        db.appointments, {"patient_id": patient_id},
+        limit=limit, after=after, sort_key="appointment_date"
+    )
 
-    return list(db.appointments.find({"patient_id": patient_id}))
+    return {"items": appointments, "next_cursor": next_cursor}
 
 
 # ==========================================
 # 👨‍⚕️ GET DOCTOR APPOINTMENTS
 # ==========================================
-def get_doctor_appointments(doctor_id: int):
+def get_doctor_appointments(
+    doctor_id: int,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
+
+    appointments, next_cursor = paginate(
+        db.appointments, {"doctor_id": doctor_id},
+        limit=limit, after=after, sort_key="appointment_date"
+    )
+
+    return {"items": appointments, "next_cursor": next_cursor}
+
 
-    return list(db.appointments.find({"doctor_id": doctor_id}))
\ No newline at end of file
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+create_appointment_async = run_in_db_executor(create_appointment)
+create_appointment_series_async = run_in_db_executor(create_appointment_series)
+get_appointment_by_id_async = run_in_db_executor(get_appointment_by_id)
+get_all_appointments_async = run_in_db_executor(get_all_appointments)
+update_appointment_async = run_in_db_executor(update_appointment)
+cancel_appointment_async = run_in_db_executor(cancel_appointment)
+delete_appointment_async = run_in_db_executor(delete_appointment)
+get_patient_appointments_async = run_in_db_executor(get_patient_appointments)
+get_doctor_appointments_async = run_in_db_executor(get_doctor_appointments)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from bson import ObjectId
 
-from app.database import db
+from app.database import db, run_in_db_executor
 from app.schemas.auth_schema import (
     UserRegister,
     UserLogin,
@@ -136,4 +136,13 @@ def get_user_by_id(user_id: str):
         "email": user["email"],
         "full_name": user["full_name"],
         "role": user["role"],
-    }
\ No newline at end of file
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+register_user_async = run_in_db_executor(register_user)
+login_user_async = run_in_db_executor(login_user)
+refresh_access_async = run_in_db_executor(refresh_access)
+get_user_by_id_async = run_in_db_executor(get_user_by_id)
@@ -0,0 +1,224 @@
+import argparse
+import json
+import threading
+import time as clock
+from datetime import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database import connect_or_exit, db, run_in_db_executor
+from app.services.schedule_service import WEEKDAYS, weekday_index, weekly_template
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+# Doctor fields kept next to the bitmaps so a query needs no second lookup
+SUMMARY_FIELDS = ("full_name", "specialization", "department", "consultation_fee", "consultation_mode")
+
+
+# ==========================================
+# 🧮 COMPILING THE WEEKLY TEMPLATE
+# ==========================================
+def _quantum(quantum_minutes: Optional[int] = None) -> int:
+    quantum = quantum_minutes or settings.AVAILABILITY_QUANTUM_MINUTES
+    if MINUTES_PER_DAY % quantum:
+        raise ValueError(f"Availability quantum must divide a day, got {quantum} minutes")
+    return quantum
+
+
+def quanta_per_week(quantum_minutes: Optional[int] = None) -> int:
+    return len(WEEKDAYS) * MINUTES_PER_DAY // _quantum(quantum_minutes)
+
+
+def compile_availability(availability: List[Dict[str, Any]], quantum_minutes: Optional[int] = None) -> bytes:
+    """
+    The weekly template as a bitmap: bit i (little-endian) is set when the
+    doctor is on duty for the whole of quantum i, counted from Monday 00:00.
+    Partly covered quanta stay clear, so a set bit never overstates cover.
+    """
+    quantum = _quantum(quantum_minutes)
+    bits = np.zeros(quanta_per_week(quantum), dtype=bool)
+
+    for weekday, open_minute, close_minute in weekly_template(availability):
+        day = weekday * MINUTES_PER_DAY
+        bits[(day + open_minute + quantum - 1) // quantum:(day + close_minute) // quantum] = True
+
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def week_quanta(day_of_week: str, start_time: time, end_time: time, quantum_minutes: Optional[int] = None) -> Tuple[int, int]:
+    """[first, last) quanta touched by start_time-end_time on day_of_week."""
+    quantum = _quantum(quantum_minutes)
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute + (1 if end_time.second or end_time.microsecond else 0)
+
+    if end <= start:
+        raise ValueError("End time must be after start time")
+
+    day = weekday_index(day_of_week) * MINUTES_PER_DAY
+    return (day + start) // quantum, (day + end + quantum - 1) // quantum
+
+
+def bitmap_fields(availability: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The fields stored on the doctor document alongside `availability`."""
+    quantum = _quantum()
+    return {
+        "availability_bitmap": compile_availability(availability, quantum),
+        "availability_quantum": quantum,
+    }
+
+
+# ==========================================
+# 📇 BIT-SLICED INDEX OF ALL DOCTORS
+# ==========================================
+class AvailabilityIndex:
+    """
+    Every active doctor's bitmap, transposed: row q is a packed bitset over
+    doctors with bit d set when doctor d is on duty in quantum q. "Who is
+    on duty Tuesday 10:00-10:30" is the AND of that span's rows.
+
+    Rebuilt on the next query after a doctor write (invalidate) or after
+    FREE_SLOTS_REFRESH_SECONDS, to pick up other workers' writes.
+    """
+
+    def __init__(self, refresh_seconds: float = settings.FREE_SLOTS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[Tuple[float, int, List[Dict[str, Any]], np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _build(self) -> Tuple[float, int, List[Dict[str, Any]], np.ndarray]:
+        quantum = _quantum()
+        width = (quanta_per_week(quantum) + 7) // 8
+
+        projection = {field: 1 for field in SUMMARY_FIELDS}
+        projection.update({"availability": 1, "availability_bitmap": 1, "availability_quantum": 1})
+
+        doctors, bitmaps = [], []
+        for doctor in db.doctors.find({"status": "active"}, projection).batch_size(settings.EXPORT_BATCH_SIZE):
+            bitmap = doctor.get("availability_bitmap")
+            # Written before bitmaps existed, or under another quantum
+            if bitmap is None or doctor.get("availability_quantum") != quantum:
+                bitmap = compile_availability(doctor.get("availability"), quantum)
+
+            doctors.append({"doctor_id": str(doctor["_id"]), **{field: doctor.get(field) for field in SUMMARY_FIELDS}})
+            bitmaps.append(bytes(bitmap))
+
+        matrix = np.frombuffer(b"".join(bitmaps), dtype=np.uint8).reshape(len(bitmaps), width)
+        on_duty = np.unpackbits(matrix, axis=1, bitorder="little")[:, :quanta_per_week(quantum)]
+        rows = np.packbits(on_duty.T, axis=1, bitorder="little")
+
+        return clock.monotonic(), quantum, doctors, rows
+
+    def snapshot(self) -> Tuple[int, List[Dict[str, Any]], np.ndarray]:
+        snapshot = self._snapshot
+        if snapshot is None or clock.monotonic() - snapshot[0] >= self.refresh_seconds:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or clock.monotonic() - snapshot[0] >= self.refresh_seconds:
+                    snapshot = self._snapshot = self._build()
+        return snapshot[1:]
+
+    def on_duty(self, day_of_week: str, start_time: time, end_time: time) -> List[Dict[str, Any]]:
+        """Summaries of every active doctor on duty for the whole span."""
+        quantum, doctors, rows = self.snapshot()
+        first, last = week_quanta(day_of_week, start_time, end_time, quantum)
+
+        if not doctors:
+            return []
+
+        covered = np.bitwise_and.reduce(rows[first:last], axis=0)
+        hits = np.flatnonzero(np.unpackbits(covered, count=len(doctors), bitorder="little"))
+        return [doctors[i] for i in hits]
+
+
+availability_index = AvailabilityIndex()
+
+
+# ==========================================
+# 🔎 WHO IS ON DUTY
+# ==========================================
+def find_on_duty_doctors(
+    day_of_week: str,
+    start_time: time,
+    end_time: time,
+    specialization: Optional[str] = None,
+    department: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Active doctors whose weekly availability covers start_time-end_time on day_of_week."""
+    doctors = [
+        doctor for doctor in availability_index.on_duty(day_of_week, start_time, end_time)
+        if (not specialization or doctor["specialization"] == specialization)
+        and (not department or doctor["department"] == department)
+    ]
+
+    return {
+        "day_of_week": WEEKDAYS[weekday_index(day_of_week)],
+        "start_time": start_time,
+        "end_time": end_time,
+        "doctors": doctors,
+    }
+
+
+# ==========================================
+# 🔁 BACKFILL
+# ==========================================
+def backfill_availability_bitmaps(recompile_all: bool = False) -> Dict[str, Any]:
+    """
+    Store `availability_bitmap` on doctors that lack one or were compiled
+    under another quantum (every doctor with recompile_all).
+    """
+    quantum = _quantum()
+    query = {} if recompile_all else {"availability_quantum": {"$ne": quantum}}
+    cursor = db.doctors.find(query, {"availability": 1}).batch_size(settings.EXPORT_BATCH_SIZE)
+
+    updated = 0
+    operations = []
+    for doctor in cursor:
+        operations.append(UpdateOne({"_id": doctor["_id"]}, {"$set": bitmap_fields(doctor.get("availability"))}))
+
+        if len(operations) >= settings.EXPORT_BATCH_SIZE:
+            updated += db.doctors.bulk_write(operations, ordered=False).modified_count
+            operations = []
+
+    if operations:
+        updated += db.doctors.bulk_write(operations, ordered=False).modified_count
+
+    availability_index.invalidate()
+    logger.info(f"Availability bitmaps compiled for {updated} doctors")
+
+    return {"doctors_updated": updated}
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+find_on_duty_doctors_async = run_in_db_executor(find_on_duty_doctors)
+
+
+# ==========================================
+# 🖥 COMMAND LINE
+# ==========================================
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description="Maintain doctor availability bitmaps")
+    parser.add_argument("command", choices=["backfill-bitmaps"])
+    parser.add_argument("--all", action="store_true", help="recompile every doctor, not just stale ones")
+    args = parser.parse_args()
+
+    # The module-level handle was bound before the connection existed
+    db = connect_or_exit()
+
+    print(json.dumps(backfill_availability_bitmaps(recompile_all=args.all), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
+from pymongo import ReturnDocument
 
-from app.database import db
+from app.config import settings
+from app.database import db, run_in_db_executor
+from app.services.rollup_service import record_bill_change, get_rollup_totals
+from app.utils.pagination import paginate
 from app.schemas.billing_schema import BillingCreate, BillingUpdate
 
 
@@ -26,6 +30,8 @@ def create_bill(payload: BillingCreate):
     result = db.billing.insert_one(bill_data)
     bill_data["id"] = str(result.inserted_id)
 
+    record_bill_change(None, bill_data)
+
     return bill_data
 
 
@@ -40,9 +46,9 @@ def get_bill_by_id(bill_id: str):
 
 
 # ==========================================
-# 📋 GET ALL BILLS (FILTERABLE)
+# 🔍 BILL QUERY BUILDER
 # ==========================================
-def get_all_bills(
+def _build_bill_query(
     patient_id: Optional[str] = None,
     status: Optional[str] = None,
     start_date: Optional[datetime] = None,
@@ -63,25 +69,91 @@ def get_all_bills(
             "$lte": end_date
         }
 
-    bills = list(db.billing.find(query))
+    return query
+
+
+# ==========================================
+# 📋 GET ALL BILLS (FILTERABLE)
+# ==========================================
+def get_all_bills(
+    patient_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
+
+    query = _build_bill_query(patient_id, status, start_date, end_date)
+
+    bills, next_cursor = paginate(
+        db.billing, query, limit=limit, after=after, sort_key="created_at"
+    )
 
     for bill in bills:
         bill["id"] = str(bill["_id"])
 
-    return bills
+    return {"items": bills, "next_cursor": next_cursor}
+
+
+# ==========================================
+# 📤 EXPORT BILLS (STREAMING)
+# ==========================================
+def export_bills(
+    patient_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Lazy cursor over every matching bill, fetched in batches"""
+    query = _build_bill_query(patient_id, status, start_date, end_date)
+
+    return (
+        db.billing.find(query)
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
 
 
 # ==========================================
 # 👤 GET PATIENT BILLS
 # ==========================================
-def get_patient_bills(patient_id: str):
+def get_patient_bills(
+    patient_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
 
-    bills = list(db.billing.find({"patient_id": patient_id}))
+    bills, next_cursor = paginate(
+        db.billing, {"patient_id": patient_id},
+        limit=limit, after=after, sort_key="created_at"
+    )
 
     for bill in bills:
         bill["id"] = str(bill["_id"])
 
-    return bills
+    return {"items": bills, "next_cursor": next_cursor}
+
+
+# ==========================================
+# 🔄 TRACKED UPDATE (KEEPS ROLLUPS IN SYNC)
+# ==========================================
+def _update_bill_tracked(bill_id: str, update_data: Dict[str, Any]):
+
+    previous = db.billing.find_one_and_update(
+        {"_id": ObjectId(bill_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if not previous:
+        return None
+
+    updated = {**previous, **update_data}
+    updated["id"] = str(updated["_id"])
+    record_bill_change(previous, updated)
+
+    return updated
 
 
 # ==========================================
@@ -99,15 +171,7 @@ def update_bill(bill_id: str, payload: BillingUpdate):
 
     update_data["updated_at"] = datetime.utcnow()
 
-    result = db.billing.update_one(
-        {"_id": ObjectId(bill_id)},
-        {"$set": update_data}
-    )
-
-    if result.modified_count == 0:
-        return None
-
-    return get_bill_by_id(bill_id)
+    return _update_bill_tracked(bill_id, update_data)
 
 
 # ==========================================
@@ -115,18 +179,10 @@ def update_bill(bill_id: str, payload: BillingUpdate):
 # ==========================================
 def mark_bill_paid(bill_id: str):
 
-    result = db.billing.update_one(
-        {"_id": ObjectId(bill_id)},
-        {"$set": {
-            "payment_status": "paid",
-            "paid_at": datetime.utcnow()
-        }}
-    )
-
-    if result.modified_count == 0:
-        return None
-
-    return get_bill_by_id(bill_id)
+    return _update_bill_tracked(bill_id, {
+        "payment_status": "paid",
+        "paid_at": datetime.utcnow()
+    })
 
 
 # ==========================================
@@ -134,18 +190,10 @@ def mark_bill_paid(bill_id: str):
 # ==========================================
 def refund_bill(bill_id: str):
 
-    result = db.billing.update_one(
-        {"_id": ObjectId(bill_id)},
-        {"$set": {
-            "payment_status": "refunded",
-            "refunded_at": datetime.utcnow()
-        }}
-    )
-
-    if result.modified_count == 0:
-        return None
-
-    return get_bill_by_id(bill_id)
+    return _update_bill_tracked(bill_id, {
+        "payment_status": "refunded",
+        "refunded_at": datetime.utcnow()
+    })
 
 
 # ==========================================
@@ -153,8 +201,13 @@ def refund_bill(bill_id: str):
 # ==========================================
 def delete_bill(bill_id: str):
 
-    result = db.billing.delete_one({"_id": ObjectId(bill_id)})
-    return result.deleted_count > 0
+    deleted = db.billing.find_one_and_delete({"_id": ObjectId(bill_id)})
+
+    if not deleted:
+        return False
+
+    record_bill_change(deleted, None)
+    return True
 
 
 # ==========================================
@@ -162,20 +215,24 @@ def delete_bill(bill_id: str):
 # ==========================================
 def get_billing_statistics() -> Dict[str, Any]:
 
-    total_bills = db.billing.count_documents({})
-    paid_bills = db.billing.count_documents({"payment_status": "paid"})
-    pending_bills = db.billing.count_documents({"payment_status": "pending"})
-    refunded_bills = db.billing.count_documents({"payment_status": "refunded"})
+    return get_rollup_totals({
+        "total_bills": "bills.total",
+        "paid_bills": "bills.status.paid",
+        "pending_bills": "bills.status.pending",
+        "refunded_bills": "bills.status.refunded",
+        "total_revenue": "bills.amount.paid",
+    })
 
-    total_revenue = sum(
-        bill.get("total_amount", 0)
-        for bill in db.billing.find({"payment_status": "paid"})
-    )
 
-    return {
-        "total_bills": total_bills,
-        "paid_bills": paid_bills,
-        "pending_bills": pending_bills,
-        "refunded_bills": refunded_bills,
-        "total_revenue": total_revenue,
-    }
\ No newline at end of file
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+create_bill_async = run_in_db_executor(create_bill)
+get_bill_by_id_async = run_in_db_executor(get_bill_by_id)
+get_all_bills_async = run_in_db_executor(get_all_bills)
+get_patient_bills_async = run_in_db_executor(get_patient_bills)
+update_bill_async = run_in_db_executor(update_bill)
+mark_bill_paid_async = run_in_db_executor(mark_bill_paid)
+refund_bill_async = run_in_db_executor(refund_bill)
+delete_bill_async = run_in_db_executor(delete_bill)
+get_billing_statistics_async = run_in_db_executor(get_billing_statistics)
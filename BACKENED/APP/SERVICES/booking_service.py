@@ -0,0 +1,309 @@
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.database import connect_or_exit, db
+from app.schemas.appointment_schema import DEFAULT_APPOINTMENT_MINUTES
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SLOT_COLLECTION = "appointment_slots"
+
+# Appointments in these states hold their slots
+ACTIVE_STATUSES = ("scheduled", "confirmed")
+
+# Appointment fields that decide which slots it holds
+SLOT_FIELDS = ("doctor_id", "appointment_date", "duration_minutes", "status")
+
+DUPLICATE_KEY = 11000
+
+
+class SlotConflictError(Exception):
+    """Raised when a booking needs a slot another appointment already holds."""
+
+    def __init__(self, doctor_id: Any, slot_start: datetime):
+        self.doctor_id = doctor_id
+        self.slot_start = slot_start
+        super().__init__(f"Doctor already booked for this time (slot {slot_start.isoformat()} is taken)")
+
+
+class AppointmentChangedError(Exception):
+    """Raised when an appointment was moved by someone else while this change was in flight."""
+
+    def __init__(self, appointment_id: Any):
+        self.appointment_id = appointment_id
+        super().__init__("Appointment was changed by another request, reload it and try again")
+
+
+# ==========================================
+# 🧮 SLOT ARITHMETIC
+# ==========================================
+def utc_naive(moment: datetime) -> datetime:
+    # MongoDB returns naive UTC datetimes, so slots are keyed the same way
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def slot_starts(start: datetime, duration_minutes: Optional[int] = None) -> List[datetime]:
+    """
+    Start of every slot that [start, start + duration) touches, ascending.
+    A 30-minute visit at 10:05 on a 15-minute grid holds 10:00, 10:15 and 10:30.
+    """
+    slot = settings.APPOINTMENT_SLOT_MINUTES
+    start = utc_naive(start)
+    end = start + timedelta(minutes=duration_minutes or DEFAULT_APPOINTMENT_MINUTES)
+
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    first = midnight + timedelta(minutes=(start - midnight) // timedelta(minutes=slot) * slot)
+
+    starts = []
+    current = first
+    while current < end:
+        starts.append(current)
+        current += timedelta(minutes=slot)
+
+    return starts
+
+
+def appointment_slots(appointment: Dict[str, Any]) -> List[datetime]:
+    return slot_starts(appointment["appointment_date"], appointment.get("duration_minutes"))
+
+
+def holds_slots(appointment: Optional[Dict[str, Any]]) -> bool:
+    return bool(appointment) and appointment.get("status", "scheduled") in ACTIVE_STATUSES
+
+
+# ==========================================
+# 🔒 RESERVE / RELEASE
+# ==========================================
+def claim_slots(doctor_id: Any, appointment_id: Any, starts: Iterable[datetime]) -> List[datetime]:
+    """
+    Insert one document per slot under the unique (doctor_id, slot_start)
+    index. The database rejects a slot someone else holds, so two concurrent
+    bookings can never both succeed. Inserts run in time order and stop at
+    the first taken slot; whatever this call inserted is then removed again
+    and SlotConflictError is raised.
+    """
+    starts = sorted(starts)
+    if not starts:
+        return []
+
+    now = datetime.utcnow()
+    documents = [
+        {"doctor_id": doctor_id, "slot_start": start, "appointment_id": appointment_id, "created_at": now}
+        for start in starts
+    ]
+
+    try:
+        db[SLOT_COLLECTION].insert_many(documents, ordered=True)
+    except BulkWriteError as e:
+        inserted = e.details.get("nInserted", 0)
+        if inserted:
+            release_slots(appointment_id, starts[:inserted], doctor_id=doctor_id)
+
+        errors = e.details.get("writeErrors", [])
+        if errors and errors[0].get("code") == DUPLICATE_KEY:
+            raise SlotConflictError(doctor_id, starts[errors[0]["index"]])
+        raise
+
+    return starts
+
+
+def claim_batch(doctor_id: Any, claims: Dict[Any, List[datetime]], all_or_nothing: bool = True) -> Dict[Any, datetime]:
+    """
+    Claim the slots of many appointments for one doctor at once, e.g. the
+    occurrences of a recurring series. `claims` maps appointment id to slot
+    starts. One query finds slots already held, then every remaining slot
+    goes in with a single unordered insert_many. The unique index still
+    rejects anything claimed in between.
+
+    Returns {appointment_id: first taken slot} for the appointments that
+    could not be booked; their slots are not held. In all_or_nothing mode
+    any conflict releases the whole batch.
+    """
+    all_starts = sorted({start for starts in claims.values() for start in starts})
+    if not all_starts:
+        return {}
+
+    taken = {
+        slot["slot_start"]
+        for slot in db[SLOT_COLLECTION].find(
+            {"doctor_id": doctor_id, "slot_start": {"$in": all_starts}},
+            {"slot_start": 1},
+        )
+    }
+
+    conflicts: Dict[Any, datetime] = {}
+    documents, owners = [], []
+    now = datetime.utcnow()
+
+    for appointment_id, starts in claims.items():
+        starts = sorted(starts)
+        clash = next((start for start in starts if start in taken), None)
+        if clash is not None:
+            conflicts[appointment_id] = clash
+            continue
+
+        # Later members of the batch may not overlap earlier ones either
+        taken.update(starts)
+        for start in starts:
+            documents.append({"doctor_id": doctor_id, "slot_start": start, "appointment_id": appointment_id, "created_at": now})
+            owners.append(appointment_id)
+
+    if conflicts and all_or_nothing:
+        return conflicts
+
+    if documents:
+        try:
+            db[SLOT_COLLECTION].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                release_batch(doctor_id, owners)
+                raise
+            for error in errors:
+                conflicts.setdefault(owners[error["index"]], documents[error["index"]]["slot_start"])
+
+    if conflicts:
+        release_batch(doctor_id, list(claims) if all_or_nothing else list(conflicts))
+
+    return conflicts
+
+
+def release_batch(doctor_id: Any, appointment_ids: List[Any]):
+    """Free every slot the given appointments hold with `doctor_id`."""
+    db[SLOT_COLLECTION].delete_many({"doctor_id": doctor_id, "appointment_id": {"$in": list(set(appointment_ids))}})
+
+
+def release_slots(appointment_id: Any, starts: Optional[Iterable[datetime]] = None, doctor_id: Any = None) -> int:
+    """Free the appointment's slots (all of them, or just `starts` with `doctor_id`)."""
+    query: Dict[str, Any] = {"appointment_id": appointment_id}
+
+    if starts is not None:
+        query["slot_start"] = {"$in": list(starts)}
+
+    if doctor_id is not None:
+        query["doctor_id"] = doctor_id
+
+    return db[SLOT_COLLECTION].delete_many(query).deleted_count
+
+
+def move_slots(before: Dict[str, Any], after: Dict[str, Any], write: Callable[[], bool]):
+    """
+    Bring the slots held by an appointment from its `before` state to its
+    `after` state (new time, length or doctor; cancelled or reinstated).
+
+    New slots are claimed first, then `write` stores the change. It must
+    only succeed while the stored appointment still matches `before`, and
+    returns False otherwise. Old slots are freed only after a successful
+    write; a failed or lost write releases the new slots again and leaves
+    the booking as it was.
+    """
+    old = set(appointment_slots(before)) if holds_slots(before) else set()
+    new = set(appointment_slots(after)) if holds_slots(after) else set()
+    keep = old & new if before.get("doctor_id") == after.get("doctor_id") else set()
+
+    claimed = claim_slots(after["doctor_id"], after["_id"], new - keep)
+
+    try:
+        written = write()
+    except Exception:
+        release_slots(after["_id"], claimed, doctor_id=after["doctor_id"])
+        raise
+
+    if not written:
+        release_slots(after["_id"], claimed, doctor_id=after["doctor_id"])
+        raise AppointmentChangedError(before["_id"])
+
+    if old - keep:
+        release_slots(before["_id"], old - keep, doctor_id=before["doctor_id"])
+
+
+# ==========================================
+# 🔁 BACKFILL
+# ==========================================
+def backfill_slots(since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Claim slots for active appointments booked before slot reservation
+    existed. Only appointments from `since` (default: start of today, UTC)
+    onwards are considered, doctor by doctor in booking (_id) order, so when
+    two legacy appointments overlap the one booked first keeps the slots.
+    The others are reported as conflicts and left without slots.
+    """
+    if since is None:
+        since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    query = {"status": {"$in": list(ACTIVE_STATUSES)}, "appointment_date": {"$gte": since}}
+    projection = {"doctor_id": 1, "appointment_date": 1, "duration_minutes": 1, "status": 1}
+    cursor = (
+        db.appointments.find(query, projection)
+        .sort([("doctor_id", 1), ("_id", 1)])
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+    report: Dict[str, Any] = {"appointments_checked": 0, "already_held": 0, "appointments_backfilled": 0, "conflicts": []}
+    doctor_id, batch = None, []
+
+    def flush():
+        if not batch:
+            return
+
+        ids = [appointment["_id"] for appointment in batch]
+        held = set(db[SLOT_COLLECTION].distinct("appointment_id", {"appointment_id": {"$in": ids}}))
+        claims = {
+            appointment["_id"]: appointment_slots(appointment)
+            for appointment in batch if appointment["_id"] not in held
+        }
+
+        conflicts = claim_batch(doctor_id, claims, all_or_nothing=False)
+
+        report["already_held"] += len(held)
+        report["appointments_backfilled"] += len(claims) - len(conflicts)
+        report["conflicts"].extend(
+            {"appointment_id": str(appointment_id), "doctor_id": str(doctor_id), "slot_start": slot_start.isoformat()}
+            for appointment_id, slot_start in conflicts.items()
+        )
+        batch.clear()
+
+    for appointment in cursor:
+        report["appointments_checked"] += 1
+        if appointment.get("doctor_id") != doctor_id or len(batch) >= settings.EXPORT_BATCH_SIZE:
+            flush()
+            doctor_id = appointment.get("doctor_id")
+        batch.append(appointment)
+
+    flush()
+
+    logger.info(
+        f"Slots backfilled for {report['appointments_backfilled']} appointments, "
+        f"{len(report['conflicts'])} conflicts"
+    )
+
+    return report
+
+
+# ==========================================
+# 🖥 COMMAND LINE
+# ==========================================
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description="Maintain appointment slot reservations")
+    parser.add_argument("command", choices=["backfill-slots"])
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="earliest appointment date (default: today)")
+    args = parser.parse_args()
+
+    # The module-level handle was bound before the connection existed
+    db = connect_or_exit()
+
+    print(json.dumps(backfill_slots(since=args.since), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Concurrency stress test for the slot booking engine.
+
+Fires booking requests for a handful of doctors over a short window at a
+fixed rate from many threads, so most requests fight over the same slots,
+and cancels some of the winners to recycle their slots. Afterwards it
+checks that no doctor holds two overlapping active appointments and that
+the reserved slots match the active appointments exactly. Any request
+that fails for another reason than a slot conflict fails the run too.
+
+Runs against a real MongoDB on MONGO_URI, in a throwaway database
+(dropped afterwards); the rate it sustains is only meaningful there:
+
+    python -m app.services.booking_stress --requests 10000 --rate 1000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.schemas.appointment_schema import AppointmentCreate
+from app.services import appointment_service, booking_service, rollup_service
+from app.services.booking_service import SLOT_COLLECTION, SlotConflictError, appointment_slots, holds_slots
+
+
+DURATIONS = (15, 30, 45, 60)
+
+
+def _bind(database):
+    # Services bind their handle at import; point them all at the stress database
+    for module in (appointment_service, booking_service, rollup_service):
+        module.db = database
+
+
+def _requests(count: int, doctors: int, window_hours: int, seed: int) -> List[AppointmentCreate]:
+    rng = random.Random(seed)
+    day = datetime(2030, 1, 7, 9, 0)
+
+    return [
+        AppointmentCreate(
+            patient_id=f"stress-patient-{rng.randrange(100_000)}",
+            doctor_id=f"stress-doctor-{rng.randrange(doctors)}",
+            appointment_date=day + timedelta(minutes=5 * rng.randrange(window_hours * 12)),
+            appointment_type="consultation",
+            duration_minutes=rng.choice(DURATIONS),
+        )
+        for _ in range(count)
+    ]
+
+
+def verify(database) -> Dict[str, Any]:
+    """Overlapping active appointments and slot mismatches in `database`."""
+    by_doctor = defaultdict(list)
+    expected_slots = Counter()
+
+    for appointment in database.appointments.find({}):
+        if not holds_slots(appointment):
+            continue
+        start = appointment["appointment_date"]
+        end = start + timedelta(minutes=appointment["duration_minutes"])
+        by_doctor[appointment["doctor_id"]].append((start, end, appointment["_id"]))
+        for slot in appointment_slots(appointment):
+            expected_slots[(appointment["doctor_id"], slot, appointment["_id"])] += 1
+
+    overlaps = []
+    for doctor_id, intervals in by_doctor.items():
+        intervals.sort()
+        for (_, previous_end, previous_id), (start, _, current_id) in zip(intervals, intervals[1:]):
+            if start < previous_end:
+                overlaps.append({"doctor_id": doctor_id, "appointments": [str(previous_id), str(current_id)]})
+
+    held_slots = Counter(
+        (slot["doctor_id"], slot["slot_start"], slot["appointment_id"])
+        for slot in database[SLOT_COLLECTION].find({})
+    )
+
+    return {
+        "active_appointments": sum(len(intervals) for intervals in by_doctor.values()),
+        "overlapping_pairs": overlaps,
+        "leaked_slots": sum((held_slots - expected_slots).values()),
+        "missing_slots": sum((expected_slots - held_slots).values()),
+    }
+
+
+def run_stress(
+    database,
+    requests: int,
+    rate: float,
+    doctors: int,
+    window_hours: int,
+    workers: int,
+    cancel_fraction: float,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    _bind(database)
+    payloads = _requests(requests, doctors, window_hours, seed)
+    rng = random.Random(seed + 1)
+
+    outcomes = Counter()
+    errors: List[str] = []
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def book(payload: AppointmentCreate):
+        started = time.perf_counter()
+        try:
+            appointment = appointment_service.create_appointment(payload)
+            outcome = "booked"
+            if rng.random() < cancel_fraction:
+                appointment_service.cancel_appointment(appointment["id"])
+                outcome = "booked_then_cancelled"
+        except SlotConflictError:
+            outcome = "conflict"
+        except Exception as e:
+            outcome = "error"
+            with lock:
+                if len(errors) < 5:
+                    errors.append(repr(e))
+
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append(time.perf_counter() - started)
+
+    # Submit on a fixed schedule so the offered load is `rate` per second
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, payload in enumerate(payloads):
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(book, payload)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = verify(database)
+
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "achieved_rate": round(requests / elapsed, 1),
+        "outcomes": dict(outcomes),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "latency_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        **result,
+        "double_booking_free": not result["overlapping_pairs"] and not result["leaked_slots"] and not result["missing_slots"],
+        "error_samples": errors,
+        "passed": not outcomes["error"] and not result["overlapping_pairs"] and not result["leaked_slots"] and not result["missing_slots"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the appointment slot booking engine")
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--rate", type=float, default=1_000, help="booking requests per second")
+    parser.add_argument("--doctors", type=int, default=5)
+    parser.add_argument("--window-hours", type=int, default=8, help="bookable hours per doctor")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--cancel-fraction", type=float, default=0.1)
+    parser.add_argument("--db-name", default="hospital_booking_stress")
+    parser.add_argument("--keep", action="store_true", help="keep the stress database afterwards")
+    args = parser.parse_args()
+
+    from app import database
+
+    database.connect_to_database()
+    if database.client is None:
+        raise SystemExit("MongoDB is not available")
+
+    stress_db = database.client[args.db_name]
+    stress_db.drop_collection("appointments")
+    stress_db.drop_collection(SLOT_COLLECTION)
+    stress_db[SLOT_COLLECTION].create_index([("doctor_id", 1), ("slot_start", 1)], unique=True)
+    stress_db[SLOT_COLLECTION].create_index("appointment_id")
+    stress_db.appointments.create_index("id")
+
+    try:
+        result = run_stress(
+            stress_db, args.requests, args.rate, args.doctors,
+            args.window_hours, args.workers, args.cancel_fraction,
+        )
+    finally:
+        if not args.keep:
+            database.client.drop_database(args.db_name)
+
+    print(json.dumps(result, indent=2))
+
+    if not result["passed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
 
-from app.database import db
+from app.database import db, run_in_db_executor
+from app.services.availability_service import availability_index, bitmap_fields
+from app.services.schedule_service import schedule_index, weekday_index
+from app.utils.pagination import paginate
 from app.schemas.doctor_schema import (
     DoctorCreate,
     DoctorUpdate,
@@ -23,11 +26,13 @@ def create_doctor(payload: DoctorCreate):
         "status": DoctorStatus.active,
         "created_at": datetime.utcnow(),
         "updated_at": None,
-        "availability": []
+        "availability": [],
+        **bitmap_fields([]),
     })
 
     result = db.doctors.insert_one(doctor_data)
     doctor_data["id"] = str(result.inserted_id)
+    availability_index.invalidate()
 
     return doctor_data
 
@@ -48,7 +53,11 @@ def get_doctor_by_id(doctor_id: str):
 # ==========================================
 # 📋 GET ALL DOCTORS (FILTERABLE)
 # ==========================================
-def get_all_doctors(filters: DoctorFilter):
+def get_all_doctors(
+    filters: DoctorFilter,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
     """Get all doctors with optional filters"""
     query = {}
 
@@ -70,12 +79,12 @@ def get_all_doctors(filters: DoctorFilter):
     if filters.max_fee:
         query["consultation_fee"] = {"$lte": filters.max_fee}
 
-    doctors = list(db.doctors.find(query))
+    doctors, next_cursor = paginate(db.doctors, query, limit=limit, after=after)
 
     for doctor in doctors:
         doctor["id"] = str(doctor["_id"])
 
-    return doctors
+    return {"items": doctors, "next_cursor": next_cursor}
 
 
 # ==========================================
@@ -94,6 +103,8 @@ def update_doctor(doctor_id: str, payload: DoctorUpdate):
     if result.modified_count == 0:
         return None
 
+    availability_index.invalidate()
+
     return get_doctor_by_id(doctor_id)
 
 
@@ -103,6 +114,8 @@ def update_doctor(doctor_id: str, payload: DoctorUpdate):
 def delete_doctor(doctor_id: str):
     """Delete doctor"""
     result = db.doctors.delete_one({"_id": ObjectId(doctor_id)})
+    schedule_index.forget(doctor_id)
+    availability_index.invalidate()
     return result.deleted_count > 0
 
 
@@ -122,6 +135,8 @@ def update_doctor_status(doctor_id: str, status: DoctorStatus):
     if result.modified_count == 0:
         return None
 
+    availability_index.invalidate()
+
     return get_doctor_by_id(doctor_id)
 
 
@@ -130,19 +145,47 @@ def update_doctor_status(doctor_id: str, status: DoctorStatus):
 # ==========================================
 def add_doctor_availability(doctor_id: str, availability: DoctorAvailability):
     """Add availability slot for doctor"""
+    # BSON has no time type; store "HH:MM:SS" strings
+    weekday_index(availability.day_of_week)
+
+    entry = availability.dict()
+    entry["start_time"] = availability.start_time.isoformat()
+    entry["end_time"] = availability.end_time.isoformat()
+
     result = db.doctors.update_one(
         {"_id": ObjectId(doctor_id)},
         {"$push": {
-            "availability": availability.dict()
+            "availability": entry
         }}
     )
 
     if result.modified_count == 0:
         return None
 
+    _recompile_bitmap(doctor_id)
+    schedule_index.forget(doctor_id)
+    availability_index.invalidate()
+
     return get_doctor_by_id(doctor_id)
 
 
+def _recompile_bitmap(doctor_id: str):
+    # Only store a bitmap over the exact array it was compiled from; retry
+    # if a concurrent push changed the array in between
+    while True:
+        doctor = db.doctors.find_one({"_id": ObjectId(doctor_id)}, {"availability": 1})
+        if doctor is None:
+            return
+
+        availability = doctor.get("availability", [])
+        result = db.doctors.update_one(
+            {"_id": doctor["_id"], "availability": availability},
+            {"$set": bitmap_fields(availability)}
+        )
+        if result.matched_count:
+            return
+
+
 # ==========================================
 # 📅 GET DOCTOR AVAILABILITY
 # ==========================================
@@ -182,3 +225,17 @@ def get_doctor_statistics(doctor_id: str):
         "cancelled_appointments": cancelled_appointments,
         "average_rating": 4.5  # Placeholder - would need ratings collection
     }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+create_doctor_async = run_in_db_executor(create_doctor)
+get_doctor_by_id_async = run_in_db_executor(get_doctor_by_id)
+get_all_doctors_async = run_in_db_executor(get_all_doctors)
+update_doctor_async = run_in_db_executor(update_doctor)
+delete_doctor_async = run_in_db_executor(delete_doctor)
+update_doctor_status_async = run_in_db_executor(update_doctor_status)
+add_doctor_availability_async = run_in_db_executor(add_doctor_availability)
+get_doctor_availability_async = run_in_db_executor(get_doctor_availability)
+get_doctor_statistics_async = run_in_db_executor(get_doctor_statistics)
@@ -0,0 +1,300 @@
+import csv
+import re
+from functools import lru_cache
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from app.config import settings
+from app.database import db, run_in_db_executor
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_INTERACTIONS_PATH = Path(__file__).with_name("drug_interactions.csv")
+DEFAULT_SYNONYMS_PATH = Path(__file__).with_name("drug_synonyms.csv")
+
+SEVERITIES = ("minor", "moderate", "major", "contraindicated")
+
+# Dropped from medicine names before lookup ("Amoxicillin 500mg tablet")
+FORM_WORDS = {
+    "tablet", "tablets", "tab", "tabs", "capsule", "capsules", "cap", "caps",
+    "syrup", "suspension", "injection", "inj", "drops", "ointment", "cream",
+    "inhaler", "oral", "solution", "mg", "mcg", "ml", "g", "iu", "er", "sr", "xr",
+}
+
+
+@lru_cache(maxsize=8192)
+def normalize_drug_name(name: str) -> str:
+    tokens = re.findall(r"[a-z0-9]+", str(name).lower())
+    return " ".join(t for t in tokens if t not in FORM_WORDS and not any(c.isdigit() for c in t))
+
+
+# ==========================================
+# 🧬 INTERACTION INDEX
+# ==========================================
+class InteractionIndex:
+    """
+    Interaction graph over integer drug ids.
+
+    Edges are stored in both directions as CSR adjacency: the neighbours
+    of drug d are neighbors[offsets[d]:offsets[d + 1]], sorted. Because
+    rows are sorted too, pair_keys (a * drugs + b) is one sorted array,
+    and a batch of pairs is matched with a single searchsorted.
+    """
+
+    def __init__(self, interactions: Sequence[Tuple[str, str, str, str]], synonyms: Dict[str, str]):
+        self.synonyms = {normalize_drug_name(k): normalize_drug_name(v) for k, v in synonyms.items()}
+
+        pairs = [
+            (self._canonical(a), self._canonical(b), severity.strip().lower(), description)
+            for a, b, severity, description in interactions
+        ]
+        self.drugs = sorted({a for a, _, _, _ in pairs} | {b for _, b, _, _ in pairs})
+        self.drug_index = {name: i for i, name in enumerate(self.drugs)}
+        self.descriptions = [description for _, _, _, description in pairs]
+
+        a = np.array([self.drug_index[p[0]] for p in pairs], dtype=np.int64)
+        b = np.array([self.drug_index[p[1]] for p in pairs], dtype=np.int64)
+        severity = np.array([SEVERITIES.index(p[2]) for p in pairs], dtype=np.int8)
+        description = np.arange(len(pairs), dtype=np.int64)
+
+        # Both directions; a pair listed twice keeps its most severe row
+        source, target = np.concatenate([a, b]), np.concatenate([b, a])
+        severity, description = np.concatenate([severity, severity]), np.concatenate([description, description])
+        keys = source * len(self.drugs) + target
+
+        order = np.lexsort((-severity, keys))
+        keys, first = np.unique(keys[order], return_index=True)
+        order = order[first]
+
+        self.pair_keys = keys
+        # Single writes look pairs up here; numpy overhead dominates at that size
+        self.edge_of = dict(zip(keys.tolist(), range(len(keys))))
+        self.neighbors = target[order]
+        self.severity = severity[order]
+        self.description_id = description[order]
+        self.offsets = np.zeros(len(self.drugs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source[order], minlength=len(self.drugs)), out=self.offsets[1:])
+
+    @classmethod
+    def load(cls, interactions_path: Optional[str] = None, synonyms_path: Optional[str] = None) -> "InteractionIndex":
+        with open(interactions_path or DEFAULT_INTERACTIONS_PATH, newline="", encoding="utf-8") as table:
+            interactions = [
+                (row["drug_a"], row["drug_b"], row["severity"], row.get("description") or "")
+                for row in csv.DictReader(table)
+            ]
+
+        synonyms: Dict[str, str] = {}
+        path = Path(synonyms_path or DEFAULT_SYNONYMS_PATH)
+        if path.is_file():
+            with open(path, newline="", encoding="utf-8") as table:
+                synonyms = {row["name"]: row["generic"] for row in csv.DictReader(table)}
+
+        return cls(interactions, synonyms)
+
+    def _canonical(self, name: str) -> str:
+        normalized = normalize_drug_name(name)
+        return self.synonyms.get(normalized, normalized)
+
+    def drug_id(self, name: str) -> int:
+        """Integer id for a medicine name, or -1 if it has no known interactions."""
+        return self.drug_index.get(self._canonical(name), -1)
+
+    def _warning(self, edge: int, medicine: str, other: str, source: Any) -> Dict[str, Any]:
+        return {
+            "medicine": medicine,
+            "interacts_with": other,
+            "prescription_id": source,
+            "severity": SEVERITIES[self.severity[edge]],
+            "description": self.descriptions[self.description_id[edge]],
+        }
+
+    def check(self, new: Sequence[str], existing: Sequence[Tuple[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """
+        Interactions among `new` medicines and between them and `existing`
+        (name, prescription id) pairs, most severe first. prescription_id
+        is None for a clash inside the medicines being written.
+        """
+        drugs = len(self.drugs)
+        new_ids = [self.drug_id(name) for name in new]
+        others = [(new[j], None, new_ids[j]) for j in range(len(new))]
+        others += [(name, source, self.drug_id(name)) for name, source in existing]
+
+        warnings = []
+        for i, a in enumerate(new_ids):
+            if a < 0:
+                continue
+            # Later entries of `new`, then everything in `existing`
+            for other, source, b in others[i + 1:]:
+                edge = self.edge_of.get(a * drugs + b) if b >= 0 else None
+                if edge is not None:
+                    warnings.append(self._warning(edge, new[i], other, source))
+
+        return sorted(warnings, key=lambda w: -SEVERITIES.index(w["severity"]))
+
+    def audit(self, rows: Iterable[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """
+        Every interacting pair of medicines held by the same patient.
+        rows are (patient_id, prescription_id, medicine_name); all pairs are
+        found at once by expanding each row's adjacency and matching it
+        against the set of (patient, drug) keys.
+        """
+        patients: Dict[str, int] = {}
+        patient_codes, drug_ids, sources = [], [], []
+
+        for patient_id, prescription_id, medicine in rows:
+            drug = self.drug_id(medicine)
+            if drug < 0:
+                continue
+            patient_codes.append(patients.setdefault(patient_id, len(patients)))
+            drug_ids.append(drug)
+            sources.append(prescription_id)
+
+        if not drug_ids:
+            return []
+
+        drugs = len(self.drugs)
+        patient_codes, drug_ids = np.array(patient_codes, dtype=np.int64), np.array(drug_ids, dtype=np.int64)
+        held = patient_codes * drugs + drug_ids
+        held_order = np.argsort(held, kind="stable")
+        held_sorted = held[held_order]
+
+        # Expand each row to its drug's neighbours (edge positions in CSR order)
+        starts, ends = self.offsets[drug_ids], self.offsets[drug_ids + 1]
+        lengths = ends - starts
+        edges = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        row_of = np.repeat(np.arange(len(drug_ids)), lengths)
+
+        # Count each unordered pair once, from its lower drug id
+        wanted = self.neighbors[edges] > drug_ids[row_of]
+        edges, row_of = edges[wanted], row_of[wanted]
+        other_keys = patient_codes[row_of] * drugs + self.neighbors[edges]
+
+        positions = np.minimum(np.searchsorted(held_sorted, other_keys), len(held_sorted) - 1)
+        hits = held_sorted[positions] == other_keys
+        edges, row_of, other_keys = edges[hits], row_of[hits], other_keys[hits]
+
+        # Collapse duplicates (same drug on several prescriptions) to one finding
+        findings = np.unique(np.stack([held[row_of], other_keys, edges], axis=1), axis=0)
+        patient_names = list(patients)
+
+        def prescriptions_for(key: int) -> List[Any]:
+            lo, hi = np.searchsorted(held_sorted, [key, key + 1])
+            return sorted({sources[i] for i in held_order[lo:hi].tolist()}, key=str)
+
+        results = []
+        for key, other_key, edge in findings.tolist():
+            patient, drug = divmod(key, drugs)
+            results.append({
+                "patient_id": patient_names[patient],
+                "medicine": self.drugs[drug],
+                "prescription_ids": prescriptions_for(key),
+                "interacts_with": self.drugs[other_key % drugs],
+                "interacts_with_prescription_ids": prescriptions_for(other_key),
+                "severity": SEVERITIES[self.severity[edge]],
+                "description": self.descriptions[self.description_id[edge]],
+            })
+
+        return sorted(results, key=lambda r: -SEVERITIES.index(r["severity"]))
+
+
+_index: Optional[InteractionIndex] = None
+
+
+def load_interaction_index() -> InteractionIndex:
+    """Build the index from the configured tables (called at startup)."""
+    global _index
+
+    _index = InteractionIndex.load(settings.DRUG_INTERACTIONS_PATH, settings.DRUG_SYNONYMS_PATH)
+    logger.info(f"Drug interaction index loaded: {len(_index.drugs)} drugs, {len(_index.pair_keys) // 2} pairs")
+
+    return _index
+
+
+def get_interaction_index() -> InteractionIndex:
+    return _index or load_interaction_index()
+
+
+def canonical_drug_name(name: str) -> str:
+    """Normalised generic name ("Coumadin 5mg tablet" -> "warfarin")."""
+    return get_interaction_index()._canonical(name)
+
+
+# ==========================================
+# 💊 CHECK AGAINST ACTIVE PRESCRIPTIONS
+# ==========================================
+def _today() -> datetime:
+    return datetime.combine(date.today(), time.min)
+
+
+def _active_medications(patient_id: str, exclude_prescription_id: Optional[str] = None) -> List[Tuple[str, str]]:
+    query: Dict[str, Any] = {"patient_id": patient_id, "valid_until": {"$gte": _today()}}
+
+    if exclude_prescription_id:
+        query["_id"] = {"$ne": ObjectId(exclude_prescription_id)}
+
+    return [
+        (medication["medicine_name"], str(prescription["_id"]))
+        for prescription in db.prescriptions.find(query, {"medications.medicine_name": 1})
+        for medication in prescription.get("medications", [])
+        if medication.get("medicine_name")
+    ]
+
+
+def check_prescription_interactions(
+    patient_id: str,
+    medications: List[str],
+    exclude_prescription_id: Optional[str] = None,
+    current: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Warnings for `medications` against each other, against `current` (the
+    rest of the prescription being edited) and against the patient's other
+    prescriptions still valid today.
+    """
+    existing: List[Tuple[str, Optional[str]]] = [(name, None) for name in current]
+    existing += _active_medications(patient_id, exclude_prescription_id)
+
+    return get_interaction_index().check(medications, existing)
+
+
+# ==========================================
+# 🔍 AUDIT ALL ACTIVE PRESCRIPTIONS
+# ==========================================
+def audit_active_interactions() -> Dict[str, Any]:
+    """Scan every prescription valid today for interacting medicines per patient."""
+    cursor = (
+        db.prescriptions.find(
+            {"valid_until": {"$gte": _today()}},
+            {"patient_id": 1, "medications.medicine_name": 1},
+        )
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+    scanned = 0
+    rows = []
+    for prescription in cursor:
+        scanned += 1
+        for medication in prescription.get("medications", []):
+            if medication.get("medicine_name"):
+                rows.append((prescription["patient_id"], str(prescription["_id"]), medication["medicine_name"]))
+
+    interactions = get_interaction_index().audit(rows)
+
+    return {
+        "scanned_prescriptions": scanned,
+        "patients_affected": len({finding["patient_id"] for finding in interactions}),
+        "interactions": interactions,
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+check_prescription_interactions_async = run_in_db_executor(check_prescription_interactions)
+audit_active_interactions_async = run_in_db_executor(audit_active_interactions)
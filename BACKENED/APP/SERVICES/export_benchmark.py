@@ -0,0 +1,135 @@
+"""
+Peak memory benchmark for the NDJSON export endpoints.
+
+Streams N appointment-shaped documents through ndjson_stream (the export
+path) and reports how far peak RSS rose. Afterwards it builds the same
+rows as one list and one JSON array, the way the list endpoints used to,
+for comparison. That runs second because peak RSS never goes back down.
+
+Documents come from a lazy generator by default, or with --mongo from a
+cursor over a throwaway database on MONGO_URI that is seeded first and
+dropped afterwards.
+
+Usage:
+    python -m app.services.export_benchmark --documents 1000000
+    python -m app.services.export_benchmark --documents 1000000 --mongo
+"""
+
+import argparse
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from bson import ObjectId, json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+
+from app.config import settings
+from app.utils.ndjson import ndjson_stream
+
+
+SEED_BATCH = 10_000
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _appointments(count: int) -> Iterator[Dict[str, Any]]:
+    start = datetime(2030, 1, 7, 9, 0)
+    for i in range(count):
+        yield {
+            "_id": ObjectId(),
+            "patient_id": f"patient-{i % 50_000}",
+            "doctor_id": f"doctor-{i % 500}",
+            "appointment_date": start + timedelta(minutes=15 * i),
+            "appointment_type": "consultation",
+            "duration_minutes": 30,
+            "status": "scheduled",
+            "payment_status": "pending",
+            "reason": "Follow-up visit for blood pressure review",
+            "created_at": start,
+        }
+
+
+def _measure(label: str, run: Callable[[], int]) -> Dict[str, Any]:
+    before = _peak_rss_mb()
+    started = time.perf_counter()
+    size = run()
+    return {
+        "mode": label,
+        "seconds": round(time.perf_counter() - started, 2),
+        "megabytes_out": round(size / (1024 * 1024), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_growth_mb": round(_peak_rss_mb() - before, 1),
+    }
+
+
+def run_benchmark(documents: Callable[[], Iterable[Dict[str, Any]]], compare_list: bool = True) -> Dict[str, Any]:
+    def stream() -> int:
+        return sum(len(chunk) for chunk in ndjson_stream(documents()))
+
+    def build_list() -> int:
+        rows = list(documents())
+        return len(json_util.dumps(rows, json_options=RELAXED_JSON_OPTIONS).encode())
+
+    results = [_measure("ndjson_stream", stream)]
+    if compare_list:
+        results.append(_measure("list + json array", build_list))
+
+    return {"runs": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of NDJSON exports")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--mongo", action="store_true", help="stream a real cursor from MONGO_URI")
+    parser.add_argument("--db-name", default="hospital_export_benchmark")
+    parser.add_argument("--no-list", action="store_true", help="skip the list + JSON array comparison")
+    args = parser.parse_args()
+
+    baseline = _peak_rss_mb()
+
+    if args.mongo:
+        from app import database
+
+        database.connect_to_database()
+        if database.client is None:
+            raise SystemExit("MongoDB is not available")
+
+        bench_db = database.client[args.db_name]
+        bench_db.drop_collection("appointments")
+        batch = []
+        for document in _appointments(args.documents):
+            batch.append(document)
+            if len(batch) >= SEED_BATCH:
+                bench_db.appointments.insert_many(batch)
+                batch = []
+        if batch:
+            bench_db.appointments.insert_many(batch)
+
+        def documents():
+            return bench_db.appointments.find({}).sort("_id", 1).batch_size(settings.EXPORT_BATCH_SIZE)
+    else:
+        def documents():
+            return _appointments(args.documents)
+
+    try:
+        result = run_benchmark(documents, compare_list=not args.no_list)
+    finally:
+        if args.mongo:
+            database.client.drop_database(args.db_name)
+
+    print(f"\n{args.documents:,} documents, peak RSS before {round(baseline, 1)} MB")
+    for run in result["runs"]:
+        print(
+            f"  {run['mode']:<18} {run['seconds']:>7} s  {run['megabytes_out']:>8} MB out  "
+            f"peak RSS {run['peak_rss_mb']:>8} MB  (+{run['peak_rss_growth_mb']} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Latency benchmark for the cross-doctor next-available search.
+
+Builds synthetic in-memory schedules (weekday clinic hours with a random
+share of slots already booked) for every doctor of one specialization,
+then times the k-way merge behind GET /doctors/next-available over the
+next 14 days, query after query, and reports p50 / p99.
+
+Usage:
+    python -m app.services.next_available_benchmark --doctors 2000 --target-ms 50
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.config import settings
+from app.services.schedule_service import DoctorSchedule, earliest_slots
+
+
+def _synthetic_schedules(doctors: int, days: int, booked_fraction: float, start: datetime, seed: int) -> List[DoctorSchedule]:
+    rng = random.Random(seed)
+    slot = settings.APPOINTMENT_SLOT_MINUTES
+    schedules = []
+
+    for i in range(doctors):
+        open_minute = rng.choice((8, 9, 10)) * 60
+        close_minute = open_minute + rng.choice((4, 6, 8)) * 60
+        weekly = [(day, open_minute, close_minute) for day in range(5) if rng.random() < 0.8]
+        schedule = DoctorSchedule(f"doctor-{i}", weekly)
+
+        # Book a share of the template's slots, 1-4 slots at a time
+        for window_start, window_end in schedule.windows(start, start + timedelta(days=days)):
+            cursor = window_start
+            while cursor < window_end:
+                length = timedelta(minutes=slot * rng.randint(1, 4))
+                if rng.random() < booked_fraction:
+                    schedule.add(f"appointment-{i}-{cursor:%Y%m%d%H%M}", cursor, min(cursor + length, window_end))
+                cursor += length
+
+        schedules.append(schedule)
+
+    return schedules
+
+
+def run_benchmark(
+    doctors: int,
+    days: int,
+    booked_fraction: float,
+    queries: int,
+    limit: int,
+    duration_minutes: int,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    start = datetime(2030, 1, 7, 0, 0)
+
+    started = time.perf_counter()
+    schedules = _synthetic_schedules(doctors, days, booked_fraction, start, seed)
+    build_seconds = time.perf_counter() - started
+
+    # Each query starts at a different time of day, like front-desk traffic
+    rng = random.Random(seed + 1)
+    latencies = []
+    for _ in range(queries):
+        query_start = start + timedelta(minutes=rng.randrange(7 * 24 * 60))
+        started = time.perf_counter()
+        earliest_slots(schedules, query_start, query_start + timedelta(days=days), duration_minutes, limit)
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+
+    return {
+        "doctors": doctors,
+        "bookings": sum(len(schedule.starts) for schedule in schedules),
+        "queries": queries,
+        "build_seconds": round(build_seconds, 3),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the next-available search across doctors")
+    parser.add_argument("--doctors", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--booked-fraction", type=float, default=0.7)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--duration", type=int, default=30, help="minutes")
+    parser.add_argument("--target-ms", type=float, default=None, help="fail if p99 is above this")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.doctors, args.days, args.booked_fraction,
+        args.queries, args.limit, args.duration,
+    )
+
+    print(f"\n{result['doctors']:,} doctors, {result['bookings']:,} bookings, built in {result['build_seconds']}s")
+    print(f"  p50   {result['p50_ms']:>8} ms")
+    print(f"  p99   {result['p99_ms']:>8} ms")
+    print(f"  max   {result['max_ms']:>8} ms   ({result['queries']:,} queries)")
+
+    if args.target_ms is not None and result["p99_ms"] > args.target_ms:
+        raise SystemExit(f"p99 {result['p99_ms']} ms is above the {args.target_ms} ms target")
+
+
+if __name__ == "__main__":
+    main()
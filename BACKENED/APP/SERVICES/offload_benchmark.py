@@ -0,0 +1,109 @@
+"""
+Throughput benchmark for running pymongo calls off the event loop.
+
+Serves the same lookup from two `async def` handlers, one calling the
+blocking function directly (how the routers used to work) and one awaiting
+its run_in_db_executor variant, then fires concurrent requests at each
+through the ASGI app and reports requests per second.
+
+The lookup is a real `patients.find_one` against MONGO_URI with --mongo,
+otherwise a simulated round trip of --latency-ms (time.sleep, which like a
+socket wait releases the GIL).
+
+Usage:
+    python -m app.services.offload_benchmark --requests 2000 --concurrency 100
+    python -m app.services.offload_benchmark --mongo
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+import httpx
+from fastapi import FastAPI
+
+from app.config import settings
+from app.database import run_in_db_executor
+
+
+def _build_app(lookup: Callable[[], Any]) -> FastAPI:
+    app = FastAPI()
+    lookup_async = run_in_db_executor(lookup)
+
+    @app.get("/blocking")
+    async def blocking():
+        lookup()
+        return {"ok": True}
+
+    @app.get("/offloaded")
+    async def offloaded():
+        await lookup_async()
+        return {"ok": True}
+
+    return app
+
+
+async def _fire(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    """Seconds taken to serve `requests` GETs with `concurrency` in flight."""
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def one():
+            async with gate:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - started
+
+
+def run_benchmark(lookup: Callable[[], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    app = _build_app(lookup)
+
+    blocking_seconds = asyncio.run(_fire(app, "/blocking", requests, concurrency))
+    offloaded_seconds = asyncio.run(_fire(app, "/offloaded", requests, concurrency))
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "db_threads": settings.DB_THREAD_POOL_SIZE,
+        "blocking_rps": round(requests / blocking_seconds, 1),
+        "offloaded_rps": round(requests / offloaded_seconds, 1),
+        "speedup": round(blocking_seconds / offloaded_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thread offload of blocking database calls")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated round trip without --mongo")
+    parser.add_argument("--mongo", action="store_true", help="time a real find_one against MONGO_URI")
+    args = parser.parse_args()
+
+    if args.mongo:
+        from app import database
+
+        database.connect_to_database()
+        if database.db is None:
+            raise SystemExit("MongoDB is not available")
+
+        def lookup():
+            return database.db.patients.find_one({})
+    else:
+        def lookup():
+            time.sleep(args.latency_ms / 1000)
+
+    result = run_benchmark(lookup, args.requests, args.concurrency)
+
+    print(f"\n{result['requests']:,} requests, {result['concurrency']} in flight, {result['db_threads']} db threads")
+    print(f"  blocking handler    {result['blocking_rps']:>10} req/s")
+    print(f"  offloaded handler   {result['offloaded_rps']:>10} req/s")
+    print(f"  speedup             {result['speedup']:>10}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ from datetime import datetime, date
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
 
-from app.database import db
+from app.config import settings
+from app.database import db, run_in_db_executor
+from app.services.rollup_service import record_patient_change
+from app.utils.pagination import paginate
 from app.schemas.patient_schema import (
     PatientCreate,
     PatientUpdate,
@@ -27,6 +30,8 @@ def create_patient(payload: PatientCreate):
     result = db.patients.insert_one(patient_data)
     patient_data["id"] = str(result.inserted_id)
 
+    record_patient_change(None, patient_data)
+
     return patient_data
 
 
@@ -44,9 +49,9 @@ def get_patient_by_id(patient_id: str):
 
 
 # ==========================================
-# 📋 GET ALL PATIENTS (FILTERABLE)
+# 🔍 PATIENT QUERY BUILDER
 # ==========================================
-def get_all_patients(filters: PatientFilter):
+def _build_patient_query(filters: PatientFilter):
 
     query = {}
 
@@ -71,12 +76,38 @@ def get_all_patients(filters: PatientFilter):
     if filters.chronic_disease:
         query["medical_history.chronic_diseases"] = filters.chronic_disease
 
-    patients = list(db.patients.find(query))
+    return query
+
+
+# ==========================================
+# 📋 GET ALL PATIENTS (FILTERABLE)
+# ==========================================
+def get_all_patients(
+    filters: PatientFilter,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+):
+
+    patients, next_cursor = paginate(
+        db.patients, _build_patient_query(filters), limit=limit, after=after
+    )
 
     for patient in patients:
         patient["id"] = str(patient["_id"])
 
-    return patients
+    return {"items": patients, "next_cursor": next_cursor}
+
+
+# ==========================================
+# 📤 EXPORT PATIENTS (STREAMING)
+# ==========================================
+def export_patients(filters: PatientFilter):
+    """Lazy cursor over every matching patient, fetched in batches"""
+    return (
+        db.patients.find(_build_patient_query(filters))
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
 
 
 # ==========================================
@@ -103,8 +134,13 @@ def update_patient(patient_id: str, payload: PatientUpdate):
 # ==========================================
 def delete_patient(patient_id: str):
 
-    result = db.patients.delete_one({"_id": ObjectId(patient_id)})
-    return result.deleted_count > 0
+    deleted = db.patients.find_one_and_delete({"_id": ObjectId(patient_id)})
+
+    if not deleted:
+        return False
+
+    record_patient_change(deleted, None)
+    return True
 
 
 # ==========================================
@@ -186,4 +222,56 @@ def get_patient_ai_context(patient_id: str):
         "chronic_conditions": patient.get("medical_history", {}).get("chronic_diseases"),
         "allergies": patient.get("medical_history", {}).get("allergies"),
         "recent_reports_summary": "No recent reports available"
-    }
\ No newline at end of file
+    }
+
+
+
+# ==========================================
+# 🧬 DEMOGRAPHICS FOR LAB EVALUATION
+# ==========================================
+def _age_on(date_of_birth, today: date) -> Optional[int]:
+    if not date_of_birth:
+        return None
+
+    if isinstance(date_of_birth, datetime):
+        date_of_birth = date_of_birth.date()
+
+    before_birthday = (today.month, today.day) < (date_of_birth.month, date_of_birth.day)
+    return today.year - date_of_birth.year - before_birthday
+
+
+def get_patient_demographics(patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Age and gender for many patients in one query, keyed by patient id."""
+
+    object_ids = [ObjectId(pid) for pid in set(patient_ids) if ObjectId.is_valid(pid)]
+
+    if not object_ids:
+        return {}
+
+    today = date.today()
+    cursor = db.patients.find(
+        {"_id": {"$in": object_ids}},
+        {"date_of_birth": 1, "gender": 1},
+    )
+
+    return {
+        str(patient["_id"]): {
+            "age": _age_on(patient.get("date_of_birth"), today),
+            "gender": patient.get("gender"),
+        }
+        for patient in cursor
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+create_patient_async = run_in_db_executor(create_patient)
+get_patient_by_id_async = run_in_db_executor(get_patient_by_id)
+get_all_patients_async = run_in_db_executor(get_all_patients)
+update_patient_async = run_in_db_executor(update_patient)
+delete_patient_async = run_in_db_executor(delete_patient)
+update_medical_history_async = run_in_db_executor(update_medical_history)
+get_patient_stats_async = run_in_db_executor(get_patient_stats)
+get_patient_ai_context_async = run_in_db_executor(get_patient_ai_context)
+get_patient_demographics_async = run_in_db_executor(get_patient_demographics)
@@ -1,5 +1,10 @@
-from datetime import date, timedelta, datetime as dt
-from typing import List, Optional
+import argparse
+import json
+import re
+from datetime import date, time, timedelta, datetime as dt
+from typing import Any, Dict, Iterator, List, Optional
+
+from pymongo import UpdateOne
 
 from app.schemas.prescription_schema import (
     PrescriptionCreate,
@@ -7,27 +12,46 @@ from app.schemas.prescription_schema import (
     PrescriptionResponse,
     PrescriptionMedicine
 )
-from app.database import db
+from app.config import settings
+from app.database import connect_or_exit, db, run_in_db_executor
+from app.services.drug_interaction_service import canonical_drug_name, check_prescription_interactions
+from app.utils.logger import get_logger
+from app.utils.pagination import paginate
 from bson import ObjectId
 
 
+logger = get_logger(__name__)
+
+
+def _with_medicine_key(medication: Dict[str, Any]) -> Dict[str, Any]:
+    """Store the normalised generic name next to the name as written"""
+    medication["medicine_key"] = canonical_drug_name(medication["medicine_name"])
+    return medication
+
+
 # ==========================================
 # 📝 CREATE PRESCRIPTION
 # ==========================================
 def create_prescription(payload: PrescriptionCreate):
-    """Create a new prescription"""
-    issued_date = date.today()
+    """Create a new prescription, recording any drug interactions found"""
+    # BSON has no date type; store midnight datetimes
+    issued_date = dt.combine(date.today(), time.min)
     valid_until = issued_date + timedelta(days=30)
 
+    warnings = check_prescription_interactions(
+        payload.patient_id, [m.medicine_name for m in payload.medications]
+    )
+
     data = {
         "patient_id": payload.patient_id,
         "doctor_id": payload.doctor_id,
         "appointment_id": payload.appointment_id,
         "diagnosis": payload.diagnosis,
-        "medications": [m.dict() for m in payload.medications],
+        "medications": [_with_medicine_key(m.dict()) for m in payload.medications],
         "notes": payload.notes,
         "issued_date": issued_date,
         "valid_until": valid_until,
+        "interaction_warnings": warnings,
         "created_at": dt.utcnow(),
         "updated_at": None,
     }
@@ -56,27 +80,186 @@ def get_prescription_by_id(prescription_id: str):
 # ==========================================
 # 👤 GET PATIENT PRESCRIPTIONS
 # ==========================================
-def get_patient_prescriptions(patient_id: str) -> List:
-    """Get all prescriptions for a patient"""
-    prescriptions = list(db.prescriptions.find({"patient_id": patient_id}))
+def get_patient_prescriptions(
+    patient_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+) -> dict:
+    """Get one page of prescriptions for a patient"""
+    prescriptions, next_cursor = paginate(
+        db.prescriptions, {"patient_id": patient_id}, limit=limit, after=after
+    )
 
     for prescription in prescriptions:
         prescription["id"] = str(prescription["_id"])
 
-    return prescriptions
+    return {"items": prescriptions, "next_cursor": next_cursor}
 
 
 # ==========================================
 # 👨‍⚕️ GET DOCTOR PRESCRIPTIONS
 # ==========================================
-def get_doctor_prescriptions(doctor_id: str) -> List:
-    """Get all prescriptions created by a doctor"""
-    prescriptions = list(db.prescriptions.find({"doctor_id": doctor_id}))
+def get_doctor_prescriptions(
+    doctor_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+) -> dict:
+    """Get one page of prescriptions created by a doctor"""
+    prescriptions, next_cursor = paginate(
+        db.prescriptions, {"doctor_id": doctor_id}, limit=limit, after=after
+    )
+
+    for prescription in prescriptions:
+        prescription["id"] = str(prescription["_id"])
+
+    return {"items": prescriptions, "next_cursor": next_cursor}
+
+
+# ==========================================
+# 📤 EXPORT PRESCRIPTIONS (STREAMING)
+# ==========================================
+def export_prescriptions(
+    patient_id: Optional[str] = None,
+    doctor_id: Optional[str] = None,
+):
+    """Lazy cursor over every matching prescription, fetched in batches"""
+    query = {}
+
+    if patient_id:
+        query["patient_id"] = patient_id
+
+    if doctor_id:
+        query["doctor_id"] = doctor_id
+
+    return (
+        db.prescriptions.find(query)
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+
+# ==========================================
+# 🔎 SEARCH BY MEDICINE
+# ==========================================
+def _medicine_query(
+    medicine: str,
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    active_only: bool = False,
+) -> Dict[str, Any]:
+    """Prefix match on the normalised medicine name, plus the date filters"""
+    prefix = canonical_drug_name(medicine)
+
+    if not prefix:
+        raise ValueError("Medicine name is empty once strength and form are removed")
+
+    # An anchored, case-sensitive regex is served from the multikey index
+    query: Dict[str, Any] = {"medications.medicine_key": {"$regex": f"^{re.escape(prefix)}"}}
+
+    issued: Dict[str, Any] = {}
+    if issued_from:
+        issued["$gte"] = dt.combine(issued_from, time.min)
+    if issued_to:
+        issued["$lt"] = dt.combine(issued_to + timedelta(days=1), time.min)
+    if issued:
+        query["issued_date"] = issued
+
+    if active_only:
+        query["valid_until"] = {"$gte": dt.combine(date.today(), time.min)}
+
+    return query
+
+
+def search_prescriptions(
+    medicine: str,
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    active_only: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+) -> dict:
+    """One page of prescriptions containing a medicine, oldest issued first"""
+    prescriptions, next_cursor = paginate(
+        db.prescriptions,
+        _medicine_query(medicine, issued_from, issued_to, active_only),
+        limit=limit,
+        after=after,
+        sort_key="issued_date",
+    )
 
     for prescription in prescriptions:
         prescription["id"] = str(prescription["_id"])
 
-    return prescriptions
+    return {"items": prescriptions, "next_cursor": next_cursor}
+
+
+def export_recall_list(
+    medicine: str,
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    active_only: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    One row per matching medication with the patient's contact details.
+    Raises ValueError up front for an empty medicine name; the rows are then
+    produced lazily, with patients looked up once per cursor batch.
+    """
+    query = _medicine_query(medicine, issued_from, issued_to, active_only)
+    prefix = canonical_drug_name(medicine)
+
+    cursor = (
+        db.prescriptions.find(
+            query,
+            {"patient_id": 1, "doctor_id": 1, "medications": 1, "issued_date": 1, "valid_until": 1},
+        )
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+    def rows():
+        batch: List[Dict[str, Any]] = []
+        try:
+            for prescription in cursor:
+                batch.append(prescription)
+                if len(batch) >= settings.EXPORT_BATCH_SIZE:
+                    yield from _recall_rows(batch, prefix)
+                    batch = []
+            yield from _recall_rows(batch, prefix)
+        finally:
+            cursor.close()
+
+    return rows()
+
+
+def _recall_rows(prescriptions: List[Dict[str, Any]], prefix: str) -> Iterator[Dict[str, Any]]:
+    patient_ids = {ObjectId(p["patient_id"]) for p in prescriptions if ObjectId.is_valid(p["patient_id"])}
+    patients = {
+        str(patient["_id"]): patient
+        for patient in db.patients.find(
+            {"_id": {"$in": list(patient_ids)}},
+            {"full_name": 1, "phone": 1, "email": 1},
+        )
+    } if patient_ids else {}
+
+    for prescription in prescriptions:
+        patient = patients.get(prescription["patient_id"], {})
+
+        for medication in prescription.get("medications", []):
+            if not medication.get("medicine_key", "").startswith(prefix):
+                continue
+
+            yield {
+                "prescription_id": str(prescription["_id"]),
+                "patient_id": prescription["patient_id"],
+                "patient_name": patient.get("full_name"),
+                "phone": patient.get("phone"),
+                "email": patient.get("email"),
+                "doctor_id": prescription.get("doctor_id"),
+                "medicine_name": medication.get("medicine_name"),
+                "dosage": medication.get("dosage"),
+                "issued_date": prescription.get("issued_date"),
+                "valid_until": prescription.get("valid_until"),
+            }
 
 
 # ==========================================
@@ -86,8 +269,19 @@ def update_prescription(prescription_id: str, payload: PrescriptionUpdate):
     """Update prescription"""
     update_data = {k: v for k, v in payload.dict().items() if v is not None}
 
+    # payload.dict() has already turned the medication items into dicts
     if "medications" in update_data:
-        update_data["medications"] = [m.dict() for m in update_data["medications"]]
+        update_data["medications"] = [_with_medicine_key(m) for m in update_data["medications"]]
+
+        existing = db.prescriptions.find_one({"_id": ObjectId(prescription_id)}, {"patient_id": 1})
+        if not existing:
+            return None
+
+        update_data["interaction_warnings"] = check_prescription_interactions(
+            existing["patient_id"],
+            [m["medicine_name"] for m in update_data["medications"]],
+            exclude_prescription_id=prescription_id,
+        )
 
     update_data["updated_at"] = dt.utcnow()
 
@@ -115,13 +309,95 @@ def delete_prescription(prescription_id: str):
 # ➕ ADD MEDICINE TO PRESCRIPTION
 # ==========================================
 def add_medicine_to_prescription(prescription_id: str, payload: PrescriptionMedicine):
-    """Add medicine to prescription"""
+    """Add medicine to prescription, recording any new drug interactions"""
+    existing = db.prescriptions.find_one(
+        {"_id": ObjectId(prescription_id)},
+        {"patient_id": 1, "medications.medicine_name": 1},
+    )
+
+    if not existing:
+        return None
+
+    warnings = check_prescription_interactions(
+        existing["patient_id"],
+        [payload.medicine_name],
+        exclude_prescription_id=prescription_id,
+        current=[m["medicine_name"] for m in existing.get("medications", [])],
+    )
+
     result = db.prescriptions.update_one(
         {"_id": ObjectId(prescription_id)},
-        {"$push": {"medications": payload.dict()}}
+        {"$push": {
+            "medications": _with_medicine_key(payload.dict()),
+            "interaction_warnings": {"$each": warnings},
+        }}
     )
 
     if result.modified_count == 0:
         return None
 
-    return get_prescription_by_id(prescription_id)
\ No newline at end of file
+    return get_prescription_by_id(prescription_id)
+
+
+# ==========================================
+# 🔁 BACKFILL MEDICINE KEYS
+# ==========================================
+def backfill_medicine_keys(rekey_all: bool = False) -> Dict[str, Any]:
+    """
+    Set `medicine_key` on medications written before it existed, or on every
+    medication with rekey_all (after the synonym table changes). Each
+    prescription's array is rewritten whole; run it during a quiet window.
+    """
+    query = {} if rekey_all else {"medications": {"$elemMatch": {"medicine_key": {"$exists": False}}}}
+    cursor = db.prescriptions.find(query, {"medications": 1}).batch_size(settings.EXPORT_BATCH_SIZE)
+
+    updated = 0
+    operations = []
+    for prescription in cursor:
+        medications = [_with_medicine_key(m) for m in prescription.get("medications", [])]
+        operations.append(UpdateOne({"_id": prescription["_id"]}, {"$set": {"medications": medications}}))
+
+        if len(operations) >= settings.EXPORT_BATCH_SIZE:
+            updated += db.prescriptions.bulk_write(operations, ordered=False).modified_count
+            operations = []
+
+    if operations:
+        updated += db.prescriptions.bulk_write(operations, ordered=False).modified_count
+
+    logger.info(f"Medicine keys backfilled on {updated} prescriptions")
+
+    return {"prescriptions_updated": updated}
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+create_prescription_async = run_in_db_executor(create_prescription)
+get_prescription_by_id_async = run_in_db_executor(get_prescription_by_id)
+get_patient_prescriptions_async = run_in_db_executor(get_patient_prescriptions)
+get_doctor_prescriptions_async = run_in_db_executor(get_doctor_prescriptions)
+update_prescription_async = run_in_db_executor(update_prescription)
+delete_prescription_async = run_in_db_executor(delete_prescription)
+add_medicine_to_prescription_async = run_in_db_executor(add_medicine_to_prescription)
+search_prescriptions_async = run_in_db_executor(search_prescriptions)
+
+
+# ==========================================
+# 🖥 COMMAND LINE
+# ==========================================
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description="Maintain prescription medicine keys")
+    parser.add_argument("command", choices=["backfill-keys"])
+    parser.add_argument("--all", action="store_true", help="recompute every key, not just missing ones")
+    args = parser.parse_args()
+
+    # The module-level handle was bound before the connection existed
+    db = connect_or_exit()
+
+    print(json.dumps(backfill_medicine_keys(rekey_all=args.all), indent=2))
+
+
+if __name__ == "__main__":
+    main()
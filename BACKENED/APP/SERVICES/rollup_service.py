@@ -0,0 +1,393 @@
+"""
+Analytics Rollups
+Keeps per-day counters in the `daily_stats` collection so dashboard reads
+scale with the number of days instead of the number of raw documents.
+
+Document layout (one per calendar day, `_id` = "YYYY-MM-DD"):
+
+    appointments.total
+    appointments.status.<status>
+    appointments.doctors.<doctor_id>.total
+    appointments.doctors.<doctor_id>.<status>
+    bills.total
+    bills.status.<payment_status>
+    bills.amount.<payment_status>
+    patients.new
+
+Usage:
+    python -m app.services.rollup_service backfill
+    python -m app.services.rollup_service check
+"""
+
+import argparse
+import json
+import math
+from collections import defaultdict
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional
+
+from pymongo import UpdateOne
+
+from app.database import connect_or_exit, db, run_in_db_executor
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+ROLLUP_COLLECTION = "daily_stats"
+
+
+# ==========================================
+# 🧮 HELPERS
+# ==========================================
+def _value(field: Any) -> str:
+    """Enum members are stored by value, so use the same for counter keys."""
+    return str(getattr(field, "value", field))
+
+
+def _day_key(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return None
+
+
+def _day_window(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    window = {}
+
+    if start_date:
+        window["$gte"] = _day_key(start_date)
+
+    if end_date:
+        window["$lte"] = _day_key(end_date)
+
+    return {"_id": window} if window else {}
+
+
+def _appointment_counters(appointment: Dict[str, Any], sign: int) -> Dict[str, Dict[str, float]]:
+    day = _day_key(appointment.get("appointment_date"))
+    if not day:
+        return {}
+
+    status = _value(appointment.get("status", "scheduled"))
+    doctor_id = _value(appointment.get("doctor_id"))
+
+    return {day: {
+        "appointments.total": sign,
+        f"appointments.status.{status}": sign,
+        f"appointments.doctors.{doctor_id}.total": sign,
+        f"appointments.doctors.{doctor_id}.{status}": sign,
+    }}
+
+
+def _bill_counters(bill: Dict[str, Any], sign: int) -> Dict[str, Dict[str, float]]:
+    day = _day_key(bill.get("created_at"))
+    if not day:
+        return {}
+
+    status = _value(bill.get("payment_status", "pending"))
+
+    return {day: {
+        "bills.total": sign,
+        f"bills.status.{status}": sign,
+        f"bills.amount.{status}": sign * bill.get("total_amount", 0),
+    }}
+
+
+def _patient_counters(patient: Dict[str, Any], sign: int) -> Dict[str, Dict[str, float]]:
+    day = _day_key(patient.get("created_at"))
+    if not day:
+        return {}
+
+    return {day: {"patients.new": sign}}
+
+
+def _apply_counters(*changes: Dict[str, Dict[str, float]]):
+    """Merge counter deltas per day and $inc each touched day document once."""
+    merged: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+
+    for change in changes:
+        for day, counters in change.items():
+            for field, delta in counters.items():
+                merged[day][field] += delta
+
+    operations = []
+    for day, counters in merged.items():
+        increments = {field: delta for field, delta in counters.items() if delta}
+        if not increments:
+            continue
+
+        operations.append(UpdateOne(
+            {"_id": day},
+            {
+                "$inc": increments,
+                "$setOnInsert": {"date": datetime.strptime(day, "%Y-%m-%d")},
+            },
+            upsert=True,
+        ))
+
+    # One round trip however many days a change touches
+    if operations:
+        db[ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+
+
+# ==========================================
+# ✍ WRITE HOOKS (CALLED BY SERVICES)
+# ==========================================
+def record_appointment_change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """Move an appointment's counters from its old state to its new state."""
+    _apply_counters(
+        _appointment_counters(before, -1) if before else {},
+        _appointment_counters(after, 1) if after else {},
+    )
+
+
+def record_appointments_created(appointments: List[Dict[str, Any]]):
+    """Count a batch of new appointments (e.g. a recurring series) in one write."""
+    _apply_counters(*(_appointment_counters(appointment, 1) for appointment in appointments))
+
+
+def record_bill_change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """Move a bill's counters and amounts from its old state to its new state."""
+    _apply_counters(
+        _bill_counters(before, -1) if before else {},
+        _bill_counters(after, 1) if after else {},
+    )
+
+
+def record_patient_change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """Track patient registrations (and removals) per day."""
+    _apply_counters(
+        _patient_counters(before, -1) if before else {},
+        _patient_counters(after, 1) if after else {},
+    )
+
+
+# ==========================================
+# 📖 READS
+# ==========================================
+def get_rollup_totals(
+    fields: Dict[str, str],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Sum rollup counters across days.
+    `fields` maps output names to counter paths, e.g. {"total": "bills.total"}.
+    """
+    pipeline = [
+        {"$match": _day_window(start_date, end_date)},
+        {"$group": {
+            "_id": None,
+            **{name: {"$sum": f"${path}"} for name, path in fields.items()},
+        }},
+    ]
+
+    rows = list(db[ROLLUP_COLLECTION].aggregate(pipeline))
+    totals = rows[0] if rows else {}
+
+    return {name: totals.get(name, 0) for name in fields}
+
+
+def get_monthly_rollup(
+    path: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Sum one rollup counter per "YYYY-MM", skipping months where it is zero."""
+    pipeline = [
+        {"$match": _day_window(start_date, end_date)},
+        {"$group": {
+            "_id": {"$substrCP": ["$_id", 0, 7]},
+            "value": {"$sum": f"${path}"},
+        }},
+        {"$match": {"value": {"$ne": 0}}},
+        {"$sort": {"_id": 1}},
+    ]
+
+    return {row["_id"]: row["value"] for row in db[ROLLUP_COLLECTION].aggregate(pipeline)}
+
+
+# ==========================================
+# 🔁 BACKFILL & CONSISTENCY CHECK
+# ==========================================
+def _per_day(date_field: str) -> Dict[str, Any]:
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}}
+
+
+def _compute_rollups_from_raw() -> Dict[str, Dict[str, Any]]:
+    """Rebuild every day document from appointments, billing and patients."""
+    days: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+
+    appointment_groups = db.appointments.aggregate([
+        {"$match": {"appointment_date": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "day": _per_day("appointment_date"),
+                "doctor_id": "$doctor_id",
+                "status": "$status",
+            },
+            "count": {"$sum": 1},
+        }},
+    ])
+
+    for row in appointment_groups:
+        key = row["_id"]
+        status = key.get("status") or "scheduled"
+        doctor_id = _value(key.get("doctor_id"))
+        counters = days[key["day"]]
+
+        counters["appointments.total"] += row["count"]
+        counters[f"appointments.status.{status}"] += row["count"]
+        counters[f"appointments.doctors.{doctor_id}.total"] += row["count"]
+        counters[f"appointments.doctors.{doctor_id}.{status}"] += row["count"]
+
+    bill_groups = db.billing.aggregate([
+        {"$match": {"created_at": {"$type": "date"}}},
+        {"$group": {
+            "_id": {"day": _per_day("created_at"), "status": "$payment_status"},
+            "count": {"$sum": 1},
+            "amount": {"$sum": "$total_amount"},
+        }},
+    ])
+
+    for row in bill_groups:
+        key = row["_id"]
+        status = key.get("status") or "pending"
+        counters = days[key["day"]]
+
+        counters["bills.total"] += row["count"]
+        counters[f"bills.status.{status}"] += row["count"]
+        counters[f"bills.amount.{status}"] += row["amount"]
+
+    patient_groups = db.patients.aggregate([
+        {"$match": {"created_at": {"$type": "date"}}},
+        {"$group": {"_id": _per_day("created_at"), "count": {"$sum": 1}}},
+    ])
+
+    for row in patient_groups:
+        days[row["_id"]]["patients.new"] += row["count"]
+
+    return {day: dict(counters) for day, counters in days.items()}
+
+
+def _nest(day: str, counters: Dict[str, float]) -> Dict[str, Any]:
+    document: Dict[str, Any] = {"_id": day, "date": datetime.strptime(day, "%Y-%m-%d")}
+
+    for path, value in counters.items():
+        node = document
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+
+    return document
+
+
+def _flatten(document: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+
+    for key, value in document.items():
+        if not prefix and key in ("_id", "date"):
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        else:
+            flat[path] = value
+
+    return flat
+
+
+def backfill_rollups() -> Dict[str, Any]:
+    """
+    Recompute `daily_stats` from the raw collections.
+    The new documents are built in a side collection and swapped in with a
+    rename, so readers never see a half-built rollup. Writes that land while
+    the backfill runs are not included; run it during a quiet window.
+    """
+    documents = [_nest(day, counters) for day, counters in sorted(_compute_rollups_from_raw().items())]
+
+    staging = db[f"{ROLLUP_COLLECTION}_rebuild"]
+    staging.drop()
+
+    if documents:
+        staging.insert_many(documents)
+        staging.rename(ROLLUP_COLLECTION, dropTarget=True)
+    else:
+        db[ROLLUP_COLLECTION].delete_many({})
+
+    logger.info(f"Rollups rebuilt for {len(documents)} days")
+
+    return {"days_rebuilt": len(documents)}
+
+
+def check_rollup_consistency() -> Dict[str, Any]:
+    """Compare stored rollups against a fresh computation from raw data."""
+    expected = _compute_rollups_from_raw()
+    actual = {
+        doc["_id"]: _flatten(doc)
+        for doc in db[ROLLUP_COLLECTION].find({})
+    }
+
+    mismatches: List[Dict[str, Any]] = []
+
+    for day in sorted(set(expected) | set(actual)):
+        expected_day = expected.get(day, {})
+        actual_day = actual.get(day, {})
+
+        for path in sorted(set(expected_day) | set(actual_day)):
+            want = expected_day.get(path, 0)
+            have = actual_day.get(path, 0)
+            if not math.isclose(want, have, abs_tol=1e-6):
+                mismatches.append({
+                    "day": day,
+                    "field": path,
+                    "expected": want,
+                    "actual": have,
+                })
+
+    return {
+        "consistent": not mismatches,
+        "days_checked": len(set(expected) | set(actual)),
+        "mismatches": mismatches,
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+get_rollup_totals_async = run_in_db_executor(get_rollup_totals)
+get_monthly_rollup_async = run_in_db_executor(get_monthly_rollup)
+backfill_rollups_async = run_in_db_executor(backfill_rollups)
+check_rollup_consistency_async = run_in_db_executor(check_rollup_consistency)
+
+
+# ==========================================
+# 🖥 COMMAND LINE
+# ==========================================
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description="Maintain the daily_stats analytics rollups")
+    parser.add_argument("command", choices=["backfill", "check"])
+    args = parser.parse_args()
+
+    # The module-level handle was bound before the connection existed
+    db = connect_or_exit()
+
+    if args.command == "backfill":
+        result = backfill_rollups()
+    else:
+        result = check_rollup_consistency()
+
+    print(json.dumps(result, indent=2, default=str))
+
+    if args.command == "check" and not result["consistent"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+import heapq
+import threading
+import time as clock
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import db, run_in_db_executor
+from app.schemas.appointment_schema import DEFAULT_APPOINTMENT_MINUTES
+from app.services.booking_service import ACTIVE_STATUSES, appointment_slots, holds_slots, utc_naive
+
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Longest range a single free-slot query may cover
+MAX_QUERY_DAYS = 62
+
+
+def weekday_index(name: str) -> int:
+    """0 for Monday; accepts "Monday", "mon", "MON"."""
+    key = str(name).strip().lower()[:3]
+    for index, day in enumerate(WEEKDAYS):
+        if day.startswith(key) and len(key) == 3:
+            return index
+    raise ValueError(f"Unknown day of week: {name!r}")
+
+
+def _minutes(value: Any) -> int:
+    """Minutes after midnight for a stored "HH:MM[:SS]" string or time."""
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def weekly_template(availability: List[Dict[str, Any]]) -> List[Tuple[int, int, int]]:
+    """Availability entries as merged (weekday, start_minute, end_minute) windows."""
+    windows = sorted(
+        (weekday_index(entry["day_of_week"]), _minutes(entry["start_time"]), _minutes(entry["end_time"]))
+        for entry in availability or []
+    )
+
+    merged: List[Tuple[int, int, int]] = []
+    for day, start, end in windows:
+        if merged and merged[-1][0] == day and start <= merged[-1][2]:
+            merged[-1] = (day, merged[-1][1], max(merged[-1][2], end))
+        elif end > start:
+            merged.append((day, start, end))
+
+    return merged
+
+
+def _grid_ceil(moment: datetime) -> datetime:
+    """`moment` rounded up onto the booking slot grid."""
+    slot = timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+    midnight = datetime.combine(moment.date(), time.min)
+    return midnight + -(-(moment - midnight) // slot) * slot
+
+
+def _busy_span(appointment: Dict[str, Any]) -> Tuple[datetime, datetime]:
+    # The slots the booking engine holds, not the bare visit time
+    slots = appointment_slots(appointment)
+    return slots[0], slots[-1] + timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+
+
+# ==========================================
+# 🗓 PER-DOCTOR SCHEDULE
+# ==========================================
+@dataclass
+class DoctorSchedule:
+    """
+    A doctor's weekly template and booked intervals sorted by start.
+
+    Every booked interval is at most `longest` long, so the intervals
+    overlapping [a, b) all start in [a - longest, b): one bisect finds
+    them, and adding or removing a booking is a single sorted insert or
+    delete.
+    """
+
+    doctor_id: str
+    weekly: List[Tuple[int, int, int]]
+    loaded_at: float = field(default_factory=clock.monotonic)
+    starts: List[Tuple[datetime, datetime, str]] = field(default_factory=list)
+    spans: Dict[str, Tuple[datetime, datetime]] = field(default_factory=dict)
+    longest: timedelta = timedelta(0)
+
+    def __post_init__(self):
+        self.by_weekday: List[List[Tuple[int, int]]] = [[] for _ in WEEKDAYS]
+        for weekday, open_minute, close_minute in self.weekly:
+            self.by_weekday[weekday].append((open_minute, close_minute))
+
+    def add(self, appointment_id: str, start: datetime, end: datetime):
+        self.remove(appointment_id)
+        insort(self.starts, (start, end, appointment_id))
+        self.spans[appointment_id] = (start, end)
+        self.longest = max(self.longest, end - start)
+
+    def remove(self, appointment_id: str):
+        span = self.spans.pop(appointment_id, None)
+        if span is None:
+            return
+        position = bisect_left(self.starts, (span[0], span[1], appointment_id))
+        if position < len(self.starts) and self.starts[position][2] == appointment_id:
+            del self.starts[position]
+
+    def busy(self, start: datetime, end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        """Booked intervals overlapping [start, end), merged, in time order. Lazy."""
+        position = bisect_left(self.starts, (start - self.longest,))
+        current: Optional[Tuple[datetime, datetime]] = None
+
+        for busy_start, busy_end, _ in islice(self.starts, position, None):
+            if busy_start >= end:
+                break
+            if busy_end <= start:
+                continue
+            if current and busy_start <= current[1]:
+                current = (current[0], max(current[1], busy_end))
+            else:
+                if current:
+                    yield current
+                current = (busy_start, busy_end)
+
+        if current:
+            yield current
+
+    def windows(self, start: datetime, end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        """The weekly template laid over [start, end), in time order."""
+        if not self.weekly:
+            return
+
+        day = datetime.combine(start.date(), time.min)
+
+        while day < end:
+            for open_minute, close_minute in self.by_weekday[day.weekday()]:
+                window_start = max(start, day + timedelta(minutes=open_minute))
+                window_end = min(end, day + timedelta(minutes=close_minute))
+                if window_start < window_end:
+                    yield window_start, window_end
+            day += timedelta(days=1)
+
+    def free_slots(self, start: datetime, end: datetime, duration_minutes: int) -> Iterator[Tuple[datetime, datetime]]:
+        """
+        Every bookable [slot_start, slot_start + duration) inside the
+        template and clear of bookings, with starts on the booking grid,
+        earliest first. Lazy, so callers can stop after the first few.
+        """
+        slot = timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+        duration = timedelta(minutes=duration_minutes)
+
+        for window_start, window_end in self.windows(start, end):
+            cursor = window_start
+            for busy_start, busy_end in chain(self.busy(window_start, window_end), [(window_end, window_end)]):
+                candidate = _grid_ceil(cursor)
+
+                while candidate + duration <= busy_start:
+                    yield candidate, candidate + duration
+                    candidate += slot
+
+                cursor = max(cursor, busy_end)
+
+
+# ==========================================
+# 📇 INDEX OF LOADED SCHEDULES
+# ==========================================
+class ScheduleIndex:
+    """
+    Schedules for recently queried doctors, kept in memory.
+
+    Bookings made through this process are applied as they happen
+    (apply_appointment_change). Schedules are reloaded from MongoDB after
+    FREE_SLOTS_REFRESH_SECONDS to pick up bookings made by other workers.
+    The slot reservations remain the authority; free slots are advisory.
+    """
+
+    def __init__(
+        self,
+        max_doctors: int = settings.FREE_SLOTS_MAX_DOCTORS,
+        refresh_seconds: float = settings.FREE_SLOTS_REFRESH_SECONDS,
+    ):
+        self.max_doctors = max_doctors
+        self.refresh_seconds = refresh_seconds
+        self._schedules: "OrderedDict[str, DoctorSchedule]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load_many(self, doctor_ids: List[str]) -> Dict[str, DoctorSchedule]:
+        """Fresh schedules for existing doctors: one doctors and one appointments query."""
+        object_ids = [ObjectId(doctor_id) for doctor_id in doctor_ids if ObjectId.is_valid(doctor_id)]
+        schedules = {
+            str(doctor["_id"]): DoctorSchedule(str(doctor["_id"]), weekly_template(doctor.get("availability")))
+            for doctor in db.doctors.find({"_id": {"$in": object_ids}}, {"availability": 1})
+        }
+
+        if not schedules:
+            return {}
+
+        # Anything that can still reach into today onwards
+        horizon = datetime.combine(datetime.utcnow().date(), time.min) - timedelta(days=1)
+        appointments = db.appointments.find(
+            {
+                "doctor_id": {"$in": list(schedules)},
+                "status": {"$in": list(ACTIVE_STATUSES)},
+                "appointment_date": {"$gte": horizon},
+            },
+            {"doctor_id": 1, "appointment_date": 1, "duration_minutes": 1},
+        )
+        for appointment in appointments:
+            schedules[appointment["doctor_id"]].add(str(appointment["_id"]), *_busy_span(appointment))
+
+        with self._lock:
+            for doctor_id, schedule in schedules.items():
+                self._schedules[doctor_id] = schedule
+                self._schedules.move_to_end(doctor_id)
+            while len(self._schedules) > self.max_doctors:
+                self._schedules.popitem(last=False)
+
+        return schedules
+
+    def schedules(self, doctor_ids: List[str]) -> Dict[str, DoctorSchedule]:
+        """Schedules by doctor id, loading missing or stale ones in one batch."""
+        now = clock.monotonic()
+        found: Dict[str, DoctorSchedule] = {}
+
+        with self._lock:
+            for doctor_id in doctor_ids:
+                schedule = self._schedules.get(doctor_id)
+                if schedule and now - schedule.loaded_at < self.refresh_seconds:
+                    self._schedules.move_to_end(doctor_id)
+                    found[doctor_id] = schedule
+
+        stale = [doctor_id for doctor_id in doctor_ids if doctor_id not in found]
+        if stale:
+            found.update(self._load_many(stale))
+
+        return found
+
+    def schedule(self, doctor_id: str) -> Optional[DoctorSchedule]:
+        """One doctor's schedule (None if there is no such doctor)."""
+        return self.schedules([doctor_id]).get(doctor_id)
+
+    def forget(self, doctor_id: str):
+        with self._lock:
+            self._schedules.pop(str(doctor_id), None)
+
+    def apply_appointment_change(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        """Move a booking between loaded schedules; unloaded doctors load fresh later."""
+        with self._lock:
+            if holds_slots(before):
+                schedule = self._schedules.get(str(before["doctor_id"]))
+                if schedule:
+                    schedule.remove(str(before["_id"]))
+
+            if holds_slots(after):
+                schedule = self._schedules.get(str(after["doctor_id"]))
+                if schedule:
+                    schedule.add(str(after["_id"]), *_busy_span(after))
+
+
+schedule_index = ScheduleIndex()
+
+
+def _query_range(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    start, end = max(utc_naive(start), datetime.utcnow()), utc_naive(end)
+
+    if end - start > timedelta(days=MAX_QUERY_DAYS):
+        raise ValueError(f"Range may cover at most {MAX_QUERY_DAYS} days")
+
+    return start, end
+
+
+# ==========================================
+# 🟢 FREE SLOTS
+# ==========================================
+def get_free_slots(
+    doctor_id: str,
+    start: datetime,
+    end: datetime,
+    duration_minutes: int = DEFAULT_APPOINTMENT_MINUTES,
+) -> Optional[Dict[str, Any]]:
+    """Bookable slots for one doctor between start and end (None if no such doctor)."""
+    start, end = _query_range(start, end)
+
+    schedule = schedule_index.schedule(doctor_id)
+    if schedule is None:
+        return None
+
+    return {
+        "doctor_id": doctor_id,
+        "duration_minutes": duration_minutes,
+        "slots": [
+            {"start": slot_start, "end": slot_end}
+            for slot_start, slot_end in schedule.free_slots(start, end, duration_minutes)
+        ],
+    }
+
+
+# ==========================================
+# ⏭ NEXT AVAILABLE ACROSS DOCTORS
+# ==========================================
+def earliest_slots(
+    schedules: List[DoctorSchedule],
+    start: datetime,
+    end: datetime,
+    duration_minutes: int,
+    limit: int,
+    per_doctor: int = 1,
+) -> List[Tuple[int, datetime, datetime]]:
+    """
+    The `limit` earliest (schedule index, start, end) slots across all
+    schedules, at most `per_doctor` from each. Each doctor's free slots
+    already come in time order, so this is a k-way merge over the streams.
+
+    The heap starts out with each doctor's next opening hour on the slot
+    grid, a cheap lower bound on their first free slot. A stream is only
+    expanded when its bound reaches the top (real slots win ties), so
+    doctors who cannot beat the slots already taken never have their
+    bookings looked at.
+    """
+    SLOT, BOUND = 0, 1
+    streams: List[Optional[Iterator[Tuple[datetime, datetime]]]] = [None] * len(schedules)
+    heap = []
+
+    for index, schedule in enumerate(schedules):
+        opening = next(schedule.windows(start, end), None)
+        if opening:
+            heap.append((_grid_ceil(opening[0]), BOUND, index, None))
+    heapq.heapify(heap)
+
+    taken = [0] * len(schedules)
+    results = []
+
+    while heap and len(results) < limit:
+        slot_start, kind, index, slot_end = heapq.heappop(heap)
+
+        if kind == SLOT:
+            results.append((index, slot_start, slot_end))
+            taken[index] += 1
+            if taken[index] >= per_doctor:
+                continue
+        else:
+            streams[index] = schedules[index].free_slots(start, end, duration_minutes)
+
+        head = next(streams[index], None)
+        if head:
+            heapq.heappush(heap, (head[0], SLOT, index, head[1]))
+
+    return results
+
+
+def find_next_available(
+    specialization: Optional[str] = None,
+    department: Optional[str] = None,
+    consultation_mode: Optional[str] = None,
+    start: Optional[datetime] = None,
+    days: int = 14,
+    duration_minutes: int = DEFAULT_APPOINTMENT_MINUTES,
+    limit: int = 10,
+    per_doctor: int = 1,
+) -> Dict[str, Any]:
+    """Earliest bookable slots with any active doctor of a specialization and/or department."""
+    if not specialization and not department:
+        raise ValueError("Give a specialization or a department")
+
+    start = start or datetime.utcnow()
+    start, end = _query_range(start, start + timedelta(days=days))
+
+    # Served by the specialization / department indexes
+    query: Dict[str, Any] = {"status": "active"}
+    if specialization:
+        query["specialization"] = specialization
+    if department:
+        query["department"] = department
+    if consultation_mode:
+        query["consultation_mode"] = {"$in": [consultation_mode, "both"]}
+
+    doctors = list(db.doctors.find(
+        query,
+        {"full_name": 1, "specialization": 1, "department": 1, "consultation_fee": 1, "consultation_mode": 1},
+    ))
+    schedules = schedule_index.schedules([str(doctor["_id"]) for doctor in doctors])
+    candidates = [doctor for doctor in doctors if str(doctor["_id"]) in schedules]
+
+    slots = earliest_slots(
+        [schedules[str(doctor["_id"])] for doctor in candidates],
+        start, end, duration_minutes, limit, per_doctor,
+    )
+
+    return {
+        "doctors_considered": len(candidates),
+        "duration_minutes": duration_minutes,
+        "slots": [
+            {
+                "doctor_id": str(candidates[index]["_id"]),
+                "full_name": candidates[index].get("full_name"),
+                "specialization": candidates[index].get("specialization"),
+                "department": candidates[index].get("department"),
+                "consultation_fee": candidates[index].get("consultation_fee"),
+                "consultation_mode": candidates[index].get("consultation_mode"),
+                "start": slot_start,
+                "end": slot_end,
+            }
+            for index, slot_start, slot_end in slots
+        ],
+    }
+
+
+# ==========================================
+# ⚡ ASYNC VARIANTS (USED BY ROUTERS)
+# ==========================================
+get_free_slots_async = run_in_db_executor(get_free_slots)
+find_next_available_async = run_in_db_executor(find_next_available)
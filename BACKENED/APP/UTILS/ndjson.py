@@ -0,0 +1,49 @@
+from typing import Any, Dict, Iterable, Iterator
+
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Flush to the client once roughly this many bytes are buffered
+CHUNK_SIZE = 64 * 1024
+
+
+# ==========================================
+# 📤 NDJSON STREAMING
+# ==========================================
+def ndjson_stream(documents: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Serialize documents one per line and yield them in ~64KB chunks.
+    Memory stays constant: only the current chunk is held at any time.
+
+    Pass a lazy cursor (find() fetches batches as it is iterated). This is
+    a sync generator, so StreamingResponse drains it in a worker thread and
+    the event loop never blocks on the cursor.
+    """
+    buffer = []
+    buffered = 0
+
+    try:
+        for document in documents:
+            line = (json_util.dumps(document, json_options=RELAXED_JSON_OPTIONS) + "\n").encode()
+            buffer.append(line)
+            buffered += len(line)
+
+            if buffered >= CHUNK_SIZE:
+                yield b"".join(buffer)
+                buffer = []
+                buffered = 0
+
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        # Release the server-side cursor if the client disconnects early
+        close = getattr(documents, "close", None)
+        if close:
+            close()
+
+
+def export_headers(filename: str) -> Dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
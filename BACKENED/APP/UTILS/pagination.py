@@ -0,0 +1,88 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import ASCENDING
+
+from app.config import settings
+
+
+# ==========================================
+# 🔖 CURSOR ENCODING
+# ==========================================
+def encode_cursor(document: Dict[str, Any], sort_key: Optional[str] = None) -> str:
+    """
+    Build an opaque cursor pointing just after `document`.
+    """
+    position = {"id": document["_id"]}
+
+    if sort_key:
+        position["key"] = document.get(sort_key)
+
+    raw = json_util.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    Raises ValueError for anything that was not issued by this API.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+    if not isinstance(position, dict) or "id" not in position:
+        raise ValueError("Invalid pagination cursor")
+
+    return position
+
+
+# ==========================================
+# 📄 KEYSET PAGINATION
+# ==========================================
+def _after_clause(position: Dict[str, Any], sort_key: Optional[str]) -> Dict[str, Any]:
+    if not sort_key:
+        return {"_id": {"$gt": position["id"]}}
+
+    key = position.get("key")
+
+    # Missing keys sort first, and $gt: None matches nothing (type bracketing)
+    later_key = {"$ne": None} if key is None else {"$gt": key}
+
+    return {"$or": [
+        {sort_key: later_key},
+        {sort_key: key, "_id": {"$gt": position["id"]}},
+    ]}
+
+
+def paginate(
+    collection,
+    query: Dict[str, Any],
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    sort_key: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of `collection` ordered by (sort_key, _id), or by _id alone.
+    Returns the documents and the cursor for the next page (None on the last page).
+    """
+    limit = min(limit or settings.PAGE_SIZE_DEFAULT, settings.PAGE_SIZE_MAX)
+
+    if after:
+        query = {"$and": [query, _after_clause(decode_cursor(after), sort_key)]}
+
+    sort = [(sort_key, ASCENDING), ("_id", ASCENDING)] if sort_key else [("_id", ASCENDING)]
+
+    # One extra document tells us whether another page exists
+    documents = list(collection.find(query).sort(sort).limit(limit + 1))
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1], sort_key)
+
+    return documents, next_cursor
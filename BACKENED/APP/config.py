@@ -29,7 +29,52 @@ class Settings:
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     # AI Provider
-    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")  # gemini | fake
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_SECONDS: float = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+    FAKE_LLM_LATENCY_SECONDS: float = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0.2"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_DISK_PATH: str | None = os.getenv("LLM_CACHE_DISK_PATH")  # e.g. ./llm_cache.sqlite3
+    LLM_CACHE_DISK_MAX_ROWS: int = int(os.getenv("LLM_CACHE_DISK_MAX_ROWS", "100000"))
+    LLM_CACHE_DISK_PURGE_EVERY: int = int(os.getenv("LLM_CACHE_DISK_PURGE_EVERY", "1000"))  # puts between expiry sweeps
+    # RAG retrieval
+    RAG_INDEX_DIR: str = os.getenv("RAG_INDEX_DIR", str(BASE_DIR / "rag_index"))
+    RAG_EMBEDDER: str = os.getenv("RAG_EMBEDDER", "hashing")
+    RAG_EMBEDDING_DIM: int = int(os.getenv("RAG_EMBEDDING_DIM", "384"))
+    RAG_CHUNK_WORDS: int = int(os.getenv("RAG_CHUNK_WORDS", "200"))
+    RAG_CHUNK_OVERLAP: int = int(os.getenv("RAG_CHUNK_OVERLAP", "40"))
+    RAG_TOP_K: int = int(os.getenv("RAG_TOP_K", "5"))
+    RAG_SEARCH_MODE: str = os.getenv("RAG_SEARCH_MODE", "auto")  # auto | brute | ivf
+    RAG_IVF_NPROBE: int = int(os.getenv("RAG_IVF_NPROBE", "16"))
+    RAG_IVF_MIN_ROWS: int = int(os.getenv("RAG_IVF_MIN_ROWS", "10000"))
+    RAG_RETRIEVAL: str = os.getenv("RAG_RETRIEVAL", "hybrid")  # hybrid | vector | bm25
+    RAG_FUSION_DEPTH: int = int(os.getenv("RAG_FUSION_DEPTH", "50"))
+    RAG_RRF_K: int = int(os.getenv("RAG_RRF_K", "60"))
+    # AI conversation memory
+    AI_MEMORY_MAX_SESSIONS: int = int(os.getenv("AI_MEMORY_MAX_SESSIONS", "1000"))
+    AI_MEMORY_MAX_TURNS: int = int(os.getenv("AI_MEMORY_MAX_TURNS", "20"))
+    AI_MEMORY_PERSIST: bool = os.getenv("AI_MEMORY_PERSIST", "False").lower() == "true"
+    # Lab drift detection
+    LAB_TREND_ALPHA: float = float(os.getenv("LAB_TREND_ALPHA", "0.3"))
+    LAB_TREND_Z_THRESHOLD: float = float(os.getenv("LAB_TREND_Z_THRESHOLD", "3.0"))
+    LAB_TREND_WARMUP: int = int(os.getenv("LAB_TREND_WARMUP", "3"))
+    LAB_TREND_MAX_PATIENTS: int = int(os.getenv("LAB_TREND_MAX_PATIENTS", "5000"))
+    # Chat prompt context
+    AI_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "3000"))
+    AI_CONTEXT_RECENT_TURNS: int = int(os.getenv("AI_CONTEXT_RECENT_TURNS", "4"))
+    AI_CONTEXT_SUMMARY_TOKENS: int = int(os.getenv("AI_CONTEXT_SUMMARY_TOKENS", "300"))
+    TOKENIZER_ENCODING: str = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+    # Assistant safety screening (defaults to app/AI/safety_lexicon.txt)
+    SAFETY_LEXICON_PATH: str | None = os.getenv("SAFETY_LEXICON_PATH")
+    # Symptom checker knowledge table (defaults to the CSVs in app/AI)
+    SYMPTOM_KNOWLEDGE_DIR: str | None = os.getenv("SYMPTOM_KNOWLEDGE_DIR")
+    # Drug interaction tables (default to the CSVs in app/services)
+    DRUG_INTERACTIONS_PATH: str | None = os.getenv("DRUG_INTERACTIONS_PATH")
+    DRUG_SYNONYMS_PATH: str | None = os.getenv("DRUG_SYNONYMS_PATH")
     ALLOWED_ORIGINS: List[str] = os.getenv(
         "ALLOWED_ORIGINS",
         "http://localhost,http://localhost:3000"
@@ -46,6 +91,21 @@ class Settings:
 
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017/hospital_db")
     MONGO_DB_NAME: str = os.getenv("MONGO_DB_NAME", "hospital_db")
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    # Worker threads used to run blocking pymongo calls off the event loop
+    DB_THREAD_POOL_SIZE: int = int(os.getenv("DB_THREAD_POOL_SIZE", "32"))
+    # List endpoints (keyset pagination)
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", "200"))
+    # Documents fetched per round trip by NDJSON exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Appointment booking: doctor time is reserved in slots of this many minutes
+    APPOINTMENT_SLOT_MINUTES: int = int(os.getenv("APPOINTMENT_SLOT_MINUTES", "15"))
+    # Free-slot search: doctor schedules kept in memory, reloaded after this long
+    FREE_SLOTS_MAX_DOCTORS: int = int(os.getenv("FREE_SLOTS_MAX_DOCTORS", "5000"))
+    FREE_SLOTS_REFRESH_SECONDS: float = float(os.getenv("FREE_SLOTS_REFRESH_SECONDS", "60"))
+    # Weekly availability bitmaps: one bit per this many minutes (5, 10 or 15)
+    AVAILABILITY_QUANTUM_MINUTES: int = int(os.getenv("AVAILABILITY_QUANTUM_MINUTES", "15"))
 settings = Settings()
 
 
@@ -1,6 +1,9 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
-from typing import Optional
+from typing import Optional, Callable, Awaitable, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+import asyncio
 import certifi
 from app.config import settings
 from app.utils.logger import get_logger
@@ -24,10 +27,12 @@ billing = None
 users = None
 reports = None
 ai_conversations = None
+daily_stats = None
+lab_baselines = None
 
 
 def connect_to_database():
-    global client, db, patients, doctors, appointments, prescriptions, billing, users, reports, ai_conversations
+    global client, db, patients, doctors, appointments, prescriptions, billing, users, reports, ai_conversations, daily_stats, lab_baselines
 
     try:
         # Check if using local MongoDB
@@ -38,7 +43,8 @@ def connect_to_database():
             tls=not is_local_mongo,  # TLS only for cloud MongoDB
             tlsCAFile=certifi.where() if not is_local_mongo else None,
             serverSelectionTimeoutMS=5000,  # 5 second timeout
-            connectTimeoutMS=5000
+            connectTimeoutMS=5000,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
         )
         db = client[settings.MONGO_DB_NAME]
 
@@ -51,6 +57,8 @@ def connect_to_database():
         users = db.users
         reports = db.reports
         ai_conversations = db.ai_conversations
+        daily_stats = db.daily_stats
+        lab_baselines = db.lab_baselines
 
         # Test connection
         client.admin.command("ping")
@@ -71,6 +79,16 @@ def connect_to_database():
         db = None
 
 
+def connect_or_exit():
+    """Connect for a command-line tool and return the database, or exit if MongoDB is down."""
+    connect_to_database()
+
+    if db is None:
+        raise SystemExit("MongoDB is not available")
+
+    return db
+
+
 def close_database_connection():
     global client
 
@@ -79,6 +97,31 @@ def close_database_connection():
         logger.info(" MongoDB connection closed")
 
 
+# ==========================================
+# ⚡ ASYNC EXECUTION (NON-BLOCKING DB CALLS)
+# ==========================================
+
+# pymongo is synchronous, so every round trip is pushed onto this pool
+# instead of running on the uvicorn event loop.
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_THREAD_POOL_SIZE,
+    thread_name_prefix="mongo",
+)
+
+
+def run_in_db_executor(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Build an awaitable variant of a blocking database function.
+    """
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_db_executor, partial(func, *args, **kwargs))
+
+    return wrapper
+
+
 # ==========================================
 # 📊 CREATE INDEXES (IMPORTANT FOR PROD)
 # ==========================================
@@ -101,11 +144,36 @@ def create_indexes():
     db.appointments.create_index("doctor_id")
     db.appointments.create_index("patient_id")
     db.appointments.create_index("appointment_date")
+    db.appointments.create_index("id")
+    db.appointments.create_index("series_id", sparse=True)
+    # Keyset pagination: (filter, sort_key, _id)
+    db.appointments.create_index([("appointment_date", 1), ("_id", 1)])
+    db.appointments.create_index([("doctor_id", 1), ("appointment_date", 1), ("_id", 1)])
+    db.appointments.create_index([("patient_id", 1), ("appointment_date", 1), ("_id", 1)])
+    # Booking: one document per reserved slot; the unique index rejects double-booking
+    db.appointment_slots.create_index([("doctor_id", 1), ("slot_start", 1)], unique=True)
+    db.appointment_slots.create_index("appointment_id")
 
     # Billing
     db.billing.create_index("patient_id")
     db.billing.create_index("payment_status")
     db.billing.create_index("created_at")
+    db.billing.create_index([("created_at", 1), ("_id", 1)])
+    db.billing.create_index([("patient_id", 1), ("created_at", 1), ("_id", 1)])
+    db.billing.create_index([("payment_status", 1), ("created_at", 1), ("_id", 1)])
+
+    # Prescriptions
+    db.prescriptions.create_index([("patient_id", 1), ("_id", 1)])
+    db.prescriptions.create_index([("doctor_id", 1), ("_id", 1)])
+    # Interaction checks: a patient's prescriptions still valid today
+    db.prescriptions.create_index([("patient_id", 1), ("valid_until", 1)])
+    # Medicine search / recall lists (multikey over the medications array)
+    db.prescriptions.create_index([("medications.medicine_key", 1), ("issued_date", 1), ("_id", 1)])
+
+    # Reports: per-patient lab history, read in insertion order
+    db.reports.create_index([("patient_id", 1), ("_id", 1)])
+    if "patient_id_1_date_1__id_1" in db.reports.index_information():
+        db.reports.drop_index("patient_id_1_date_1__id_1")
 
     # Users
     db.users.create_index("email", unique=True)
@@ -122,4 +190,7 @@ def check_database_health() -> bool:
         client.admin.command("ping")
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+
+check_database_health_async = run_in_db_executor(check_database_health)
@@ -6,7 +6,8 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 import time
 
 from app.config import settings
-from app.database import connect_to_database, close_database_connection, check_database_health
+from app.database import connect_to_database, close_database_connection, check_database_health_async
+from app.services.drug_interaction_service import load_interaction_index
 from app.utils.logger import get_logger
 
 # Routers
@@ -54,6 +55,7 @@ app.add_middleware(
 async def startup():
     logger.info(" Starting application...")
     connect_to_database()
+    load_interaction_index()
 
 
 @app.on_event("shutdown")
@@ -133,7 +135,7 @@ app.include_router(analytics.router)
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    db_status = check_database_health()
+    db_status = await check_database_health_async()
     return {
         "status": "healthy" if db_status else "database_unavailable",
         "database": db_status,
@@ -1,3 +1,5 @@
+import asyncio
+
 from APP.AI.medical_assitant import MedicalAssistantService
 from APP.SCHEMAS.ai_schema import AIChatRequest, UserRole
 
@@ -12,7 +14,7 @@ def test_chat():
         context=None
     )
 
-    response = assistant.chat(request)
+    response = asyncio.run(assistant.chat(request))
 
     print("\nAI RESPONSE:\n")
     print(response)
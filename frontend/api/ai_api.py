@@ -3,14 +3,19 @@ AI API Client Module
 Handles all frontend HTTP requests to AI backend endpoints
 """
 
+import json
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
 AI_ENDPOINT = f"{BASE_URL}/ai"
 
 
+class AIStreamError(Exception):
+    """The backend reported a failure partway through a streamed reply"""
+
+
 class AIAPIClient:
     """HTTP client for AI-related operations"""
 
@@ -88,6 +93,47 @@ class AIAPIClient:
             print(f"Error in medical assistant chat: {str(e)}")
             return None
 
+    @staticmethod
+    def stream_medical_assistant(
+        message: str,
+        user_id: int = 0,
+        role: str = "patient",
+        session_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Yield reply text from the streaming chat endpoint as it is generated.
+        Raises AIStreamError if the backend fails after the reply has started.
+        """
+        try:
+            with requests.post(
+                f"{AI_ENDPOINT}/chat/stream",
+                json={"message": message, "user_id": user_id, "role": role, "session_id": session_id},
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+
+                event = "message"
+                for line in response.iter_lines(decode_unicode=True):
+                    # A blank line ends the event
+                    if not line:
+                        event = "message"
+                        continue
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        continue
+                    if not line.startswith("data: "):
+                        continue
+
+                    frame = json.loads(line[len("data: "):])
+                    if event == "error":
+                        raise AIStreamError(frame.get("detail", "AI stream failed"))
+                    if frame.get("done"):
+                        return
+                    if frame.get("chunk"):
+                        yield frame["chunk"]
+        except requests.exceptions.RequestException as e:
+            print(f"Error in streaming medical assistant chat: {str(e)}")
+
     @staticmethod
     def generate_prescription_suggestion(symptoms: List[str], condition: str) -> Optional[Dict[str, Any]]:
         """Generate AI-suggested prescription based on symptoms"""
@@ -130,6 +176,11 @@ def chat_medical_assistant(message: str, patient_context: Optional[str] = None)
     return AIAPIClient.chat_medical_assistant(message, patient_context)
 
 
+def stream_medical_assistant(message: str, user_id: int = 0, role: str = "patient", session_id: Optional[str] = None) -> Iterator[str]:
+    """Yield reply text from the streaming chat endpoint; raises AIStreamError on a mid-stream failure"""
+    return AIAPIClient.stream_medical_assistant(message, user_id, role, session_id)
+
+
 def generate_prescription_suggestion(symptoms: List[str], condition: str) -> Optional[Dict[str, Any]]:
     """Generate AI-suggested prescription based on symptoms"""
     return AIAPIClient.generate_prescription_suggestion(symptoms, condition)
\ No newline at end of file
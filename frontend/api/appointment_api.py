@@ -4,7 +4,9 @@ Handles all frontend HTTP requests to appointment backend endpoints
 """
 
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+
+from api.pagination import iter_pages, DEFAULT_PAGE_SIZE
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
@@ -29,13 +31,16 @@ class AppointmentAPIClient:
             print(f"Error creating appointment: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_appointment_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over appointments one page at a time"""
+        return iter_pages(APPOINTMENT_ENDPOINT, page_size=page_size)
+
     @staticmethod
     def get_all_appointments() -> Optional[List[Dict[str, Any]]]:
         """Fetch all appointments"""
         try:
-            response = requests.get(APPOINTMENT_ENDPOINT)
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(APPOINTMENT_ENDPOINT) for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching appointments: {str(e)}")
             return None
@@ -91,24 +96,30 @@ class AppointmentAPIClient:
             print(f"Error deleting appointment: {str(e)}")
             return False
 
+    @staticmethod
+    def iter_patient_appointment_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over appointments for a patient one page at a time"""
+        return iter_pages(f"{APPOINTMENT_ENDPOINT}/patient/{patient_id}", page_size=page_size)
+
     @staticmethod
     def get_patient_appointments(patient_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get all appointments for a patient"""
         try:
-            response = requests.get(f"{APPOINTMENT_ENDPOINT}/patient/{patient_id}")
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(f"{APPOINTMENT_ENDPOINT}/patient/{patient_id}") for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching patient appointments: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_doctor_appointment_pages(doctor_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over appointments for a doctor one page at a time"""
+        return iter_pages(f"{APPOINTMENT_ENDPOINT}/doctor/{doctor_id}", page_size=page_size)
+
     @staticmethod
     def get_doctor_appointments(doctor_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get all appointments for a doctor"""
         try:
-            response = requests.get(f"{APPOINTMENT_ENDPOINT}/doctor/{doctor_id}")
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(f"{APPOINTMENT_ENDPOINT}/doctor/{doctor_id}") for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching doctor appointments: {str(e)}")
             return None
@@ -120,6 +131,11 @@ def create_appointment(appointment_data: Dict[str, Any]) -> Optional[Dict[str, A
     return AppointmentAPIClient.create_appointment(appointment_data)
 
 
+def iter_appointment_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over appointments one page at a time"""
+    return AppointmentAPIClient.iter_appointment_pages(page_size)
+
+
 def get_all_appointments() -> Optional[List[Dict[str, Any]]]:
     """Fetch all appointments"""
     return AppointmentAPIClient.get_all_appointments()
@@ -145,11 +161,21 @@ def delete_appointment(appointment_id: str) -> bool:
     return AppointmentAPIClient.delete_appointment(appointment_id)
 
 
+def iter_patient_appointment_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over appointments for a patient one page at a time"""
+    return AppointmentAPIClient.iter_patient_appointment_pages(patient_id, page_size)
+
+
 def get_patient_appointments(patient_id: str) -> Optional[List[Dict[str, Any]]]:
     """Get all appointments for a patient"""
     return AppointmentAPIClient.get_patient_appointments(patient_id)
 
 
+def iter_doctor_appointment_pages(doctor_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over appointments for a doctor one page at a time"""
+    return AppointmentAPIClient.iter_doctor_appointment_pages(doctor_id, page_size)
+
+
 def get_doctor_appointments(doctor_id: str) -> Optional[List[Dict[str, Any]]]:
     """Get all appointments for a doctor"""
     return AppointmentAPIClient.get_doctor_appointments(doctor_id)
\ No newline at end of file
@@ -4,7 +4,9 @@ Handles all frontend HTTP requests to billing backend endpoints
 """
 
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+
+from api.pagination import iter_pages, DEFAULT_PAGE_SIZE
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
@@ -29,13 +31,16 @@ class BillingAPIClient:
             print(f"Error creating bill: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_bill_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over bills one page at a time"""
+        return iter_pages(BILLING_ENDPOINT, page_size=page_size)
+
     @staticmethod
     def get_all_bills() -> Optional[List[Dict[str, Any]]]:
         """Fetch all bills"""
         try:
-            response = requests.get(BILLING_ENDPOINT)
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(BILLING_ENDPOINT) for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching bills: {str(e)}")
             return None
@@ -106,13 +111,16 @@ class BillingAPIClient:
             print(f"Error deleting bill: {str(e)}")
             return False
 
+    @staticmethod
+    def iter_patient_bill_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over bills for a patient one page at a time"""
+        return iter_pages(f"{BILLING_ENDPOINT}/patient/{patient_id}", page_size=page_size)
+
     @staticmethod
     def get_patient_bills(patient_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get all bills for a patient"""
         try:
-            response = requests.get(f"{BILLING_ENDPOINT}/patient/{patient_id}")
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(f"{BILLING_ENDPOINT}/patient/{patient_id}") for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching patient bills: {str(e)}")
             return None
@@ -135,6 +143,11 @@ def create_bill(bill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return BillingAPIClient.create_bill(bill_data)
 
 
+def iter_bill_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over bills one page at a time"""
+    return BillingAPIClient.iter_bill_pages(page_size)
+
+
 def get_all_bills() -> Optional[List[Dict[str, Any]]]:
     """Fetch all bills"""
     return BillingAPIClient.get_all_bills()
@@ -165,6 +178,11 @@ def delete_bill(bill_id: str) -> bool:
     return BillingAPIClient.delete_bill(bill_id)
 
 
+def iter_patient_bill_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over bills for a patient one page at a time"""
+    return BillingAPIClient.iter_patient_bill_pages(patient_id, page_size)
+
+
 def get_patient_bills(patient_id: str) -> Optional[List[Dict[str, Any]]]:
     """Get all bills for a patient"""
     return BillingAPIClient.get_patient_bills(patient_id)
@@ -4,7 +4,9 @@ Handles all frontend HTTP requests to doctor backend endpoints
 """
 
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+
+from api.pagination import iter_pages, DEFAULT_PAGE_SIZE
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
@@ -29,13 +31,16 @@ class DoctorAPIClient:
             print(f"Error creating doctor: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_doctor_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over doctors one page at a time"""
+        return iter_pages(DOCTOR_ENDPOINT, page_size=page_size)
+
     @staticmethod
     def get_all_doctors() -> Optional[List[Dict[str, Any]]]:
         """Fetch all doctors"""
         try:
-            response = requests.get(DOCTOR_ENDPOINT)
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(DOCTOR_ENDPOINT) for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching doctors: {str(e)}")
             return None
@@ -136,6 +141,11 @@ def create_doctor(doctor_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return DoctorAPIClient.create_doctor(doctor_data)
 
 
+def iter_doctor_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over doctors one page at a time"""
+    return DoctorAPIClient.iter_doctor_pages(page_size)
+
+
 def get_all_doctors() -> Optional[List[Dict[str, Any]]]:
     """Fetch all doctors"""
     return DoctorAPIClient.get_all_doctors()
@@ -0,0 +1,31 @@
+"""
+Pagination Helpers
+Walks cursor-paginated list endpoints ({"items": [...], "next_cursor": ...})
+"""
+
+import requests
+from typing import Dict, List, Any, Optional, Iterator
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def iter_pages(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield one list of items per page until the backend stops returning a cursor"""
+    query = {**(params or {}), "limit": page_size}
+
+    while True:
+        response = requests.get(url, params=query)
+        response.raise_for_status()
+        page = response.json()
+
+        yield page.get("items", [])
+
+        next_cursor = page.get("next_cursor")
+        if not next_cursor:
+            return
+
+        query["after"] = next_cursor
@@ -4,7 +4,9 @@ Handles all frontend HTTP requests to patient backend endpoints
 """
 
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+
+from api.pagination import iter_pages, DEFAULT_PAGE_SIZE
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
@@ -29,13 +31,16 @@ class PatientAPIClient:
             print(f"Error creating patient: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_patient_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over patients one page at a time"""
+        return iter_pages(PATIENT_ENDPOINT, page_size=page_size)
+
     @staticmethod
     def get_all_patients() -> Optional[List[Dict[str, Any]]]:
         """Fetch all patients"""
         try:
-            response = requests.get(PATIENT_ENDPOINT)
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(PATIENT_ENDPOINT) for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching patients: {str(e)}")
             return None
@@ -121,6 +126,11 @@ def create_patient(patient_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return PatientAPIClient.create_patient(patient_data)
 
 
+def iter_patient_pages(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over patients one page at a time"""
+    return PatientAPIClient.iter_patient_pages(page_size)
+
+
 def get_all_patients() -> Optional[List[Dict[str, Any]]]:
     """Fetch all patients"""
     return PatientAPIClient.get_all_patients()
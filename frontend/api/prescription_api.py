@@ -4,7 +4,9 @@ Handles all frontend HTTP requests to prescription backend endpoints
 """
 
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+
+from api.pagination import iter_pages, DEFAULT_PAGE_SIZE
 
 # Backend API base URL
 BASE_URL = "http://localhost:8000/api"
@@ -77,24 +79,30 @@ class PrescriptionAPIClient:
             print(f"Error deleting prescription: {str(e)}")
             return False
 
+    @staticmethod
+    def iter_patient_prescription_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over prescriptions for a patient one page at a time"""
+        return iter_pages(f"{PRESCRIPTION_ENDPOINT}/patient/{patient_id}", page_size=page_size)
+
     @staticmethod
     def get_patient_prescriptions(patient_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get all prescriptions for a patient"""
         try:
-            response = requests.get(f"{PRESCRIPTION_ENDPOINT}/patient/{patient_id}")
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(f"{PRESCRIPTION_ENDPOINT}/patient/{patient_id}") for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching patient prescriptions: {str(e)}")
             return None
 
+    @staticmethod
+    def iter_doctor_prescription_pages(doctor_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over prescriptions issued by a doctor one page at a time"""
+        return iter_pages(f"{PRESCRIPTION_ENDPOINT}/doctor/{doctor_id}", page_size=page_size)
+
     @staticmethod
     def get_doctor_prescriptions(doctor_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get all prescriptions issued by a doctor"""
         try:
-            response = requests.get(f"{PRESCRIPTION_ENDPOINT}/doctor/{doctor_id}")
-            response.raise_for_status()
-            return response.json()
+            return [item for page in iter_pages(f"{PRESCRIPTION_ENDPOINT}/doctor/{doctor_id}") for item in page]
         except requests.exceptions.RequestException as e:
             print(f"Error fetching doctor prescriptions: {str(e)}")
             return None
@@ -141,11 +149,21 @@ def delete_prescription(prescription_id: str) -> bool:
     return PrescriptionAPIClient.delete_prescription(prescription_id)
 
 
+def iter_patient_prescription_pages(patient_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over prescriptions for a patient one page at a time"""
+    return PrescriptionAPIClient.iter_patient_prescription_pages(patient_id, page_size)
+
+
 def get_patient_prescriptions(patient_id: str) -> Optional[List[Dict[str, Any]]]:
     """Get all prescriptions for a patient"""
     return PrescriptionAPIClient.get_patient_prescriptions(patient_id)
 
 
+def iter_doctor_prescription_pages(doctor_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Iterate over prescriptions issued by a doctor one page at a time"""
+    return PrescriptionAPIClient.iter_doctor_prescription_pages(doctor_id, page_size)
+
+
 def get_doctor_prescriptions(doctor_id: str) -> Optional[List[Dict[str, Any]]]:
     """Get all prescriptions issued by a doctor"""
     return PrescriptionAPIClient.get_doctor_prescriptions(doctor_id)
@@ -51,20 +51,73 @@ async def chat_ui():
             const input = document.getElementById("userInput");
             const btn = document.getElementById("sendBtn");
 
+            // Each browser tab keeps its own conversation memory on the backend
+            const sessionId = crypto.randomUUID();
+
+            const escapeHtml = (text) => {
+                const div = document.createElement("div");
+                div.textContent = text;
+                return div.innerHTML;
+            };
+
             btn.onclick = async () => {
                 const message = input.value;
                 if (!message) return;
-                chatbox.innerHTML += '<div class="message user"><b>You:</b> ' + message + '</div>';
+                chatbox.innerHTML += '<div class="message user"><b>You:</b> ' + escapeHtml(message) + '</div>';
                 input.value = "";
 
-                const response = await fetch("/api/chat", {
+                const aiMessage = document.createElement("div");
+                aiMessage.className = "message ai";
+                aiMessage.innerHTML = "<b>AI:</b> ";
+                const aiText = document.createElement("span");
+                aiMessage.appendChild(aiText);
+                chatbox.appendChild(aiMessage);
+
+                const response = await fetch("/api/ai/chat/stream", {
                     method: "POST",
-                    headers: { "Content-Type": "application/x-www-form-urlencoded" },
-                    body: "message=" + encodeURIComponent(message)
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                        user_id: 0,
+                        role: "patient",
+                        session_id: sessionId,
+                        message: message
+                    })
                 });
-                const data = await response.json();
-                chatbox.innerHTML += '<div class="message ai"><b>AI:</b> ' + data.reply + '</div>';
-                chatbox.scrollTop = chatbox.scrollHeight;
+
+                if (!response.ok) {
+                    aiText.textContent = "Sorry, the assistant is unavailable right now.";
+                    return;
+                }
+
+                // Read server-sent events off the body as they arrive
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = "";
+
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+
+                    buffer += decoder.decode(value, { stream: true });
+                    const events = buffer.split("\\n\\n");
+                    buffer = events.pop();
+
+                    for (const event of events) {
+                        const lines = event.split("\\n");
+                        const data = lines.filter(l => l.startsWith("data: ")).map(l => l.slice(6)).join("\\n");
+                        if (!data) continue;
+
+                        if (lines.some(l => l === "event: error")) {
+                            aiText.textContent += " [" + JSON.parse(data).detail + "]";
+                            continue;
+                        }
+
+                        const frame = JSON.parse(data);
+                        aiText.textContent += frame.chunk;
+                    }
+
+                    chatbox.scrollTop = chatbox.scrollHeight;
+                }
             };
         </script>
     </body>